@@ -0,0 +1,115 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+ENTITY_TYPES = (
+    "DOMAIN", "SUBDOMAIN", "IP", "EMAIL", "URL", "CERTIFICATE", "PERSON", "ACCOUNT",
+)
+SCAN_TYPES = ("DOMAIN", "EMAIL", "IP", "HANDLE")
+SCAN_STATUSES = ("QUEUED", "RUNNING", "FAILED", "COMPLETED")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("role", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "scans",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("target", sa.String(), nullable=False),
+        sa.Column("type", sa.Enum(*SCAN_TYPES, name="scantype"), nullable=False),
+        sa.Column("status", sa.Enum(*SCAN_STATUSES, name="scanstatus"), nullable=True),
+        sa.Column("settings", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_scans_id", "scans", ["id"])
+    op.create_index("ix_scans_target", "scans", ["target"])
+    op.create_index("ix_scans_status", "scans", ["status"])
+
+    op.create_table(
+        "entities",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("scan_id", sa.Integer(), nullable=True),
+        sa.Column("type", sa.Enum(*ENTITY_TYPES, name="entitytype"), nullable=False),
+        sa.Column("canonical_value", sa.String(), nullable=False),
+        sa.Column("metadata", sa.JSON(), nullable=True),
+        sa.Column("first_seen", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.Column("last_seen", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["scan_id"], ["scans.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_entities_id", "entities", ["id"])
+    op.create_index("ix_entities_scan_id", "entities", ["scan_id"])
+    op.create_index("ix_entities_type", "entities", ["type"])
+    op.create_index("ix_entities_canonical_value", "entities", ["canonical_value"])
+
+    op.create_table(
+        "findings",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("confidence_score", sa.Float(), nullable=True),
+        sa.Column("raw_result", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["entity_id"], ["entities.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_findings_id", "findings", ["id"])
+    op.create_index("ix_findings_entity_id", "findings", ["entity_id"])
+
+    op.create_table(
+        "reports",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("scan_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("generated_text", sa.Text(), nullable=True),
+        sa.Column("sections", sa.JSON(), nullable=True),
+        sa.Column("score", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["scan_id"], ["scans.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_reports_id", "reports", ["id"])
+    op.create_index("ix_reports_scan_id", "reports", ["scan_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("reports")
+    op.drop_table("findings")
+    op.drop_table("entities")
+    op.drop_table("scans")
+    op.drop_table("users")
+    sa.Enum(name="entitytype").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="scanstatus").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="scantype").drop(op.get_bind(), checkfirst=True)
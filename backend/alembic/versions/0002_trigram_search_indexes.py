@@ -0,0 +1,39 @@
+"""Trigram indexes for substring search
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:10:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # pg_trgm lets GIN indexes answer ILIKE '%q%' and provides similarity()
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_entities_canonical_value_trgm",
+        "entities",
+        ["canonical_value"],
+        postgresql_using="gin",
+        postgresql_ops={"canonical_value": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_scans_target_trgm",
+        "scans",
+        ["target"],
+        postgresql_using="gin",
+        postgresql_ops={"target": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_scans_target_trgm", table_name="scans")
+    op.drop_index("ix_entities_canonical_value_trgm", table_name="entities")
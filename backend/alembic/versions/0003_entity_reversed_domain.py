@@ -0,0 +1,41 @@
+"""Reversed-label domain key on entities
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "entities",
+        sa.Column("reversed_domain", sa.String(collation="C"), nullable=True),
+    )
+    # Backfill: 'api.example.com' -> 'com.example.api' for DNS-name entities
+    op.execute(
+        """
+        UPDATE entities
+        SET reversed_domain = (
+            SELECT string_agg(label, '.' ORDER BY ord DESC)
+            FROM unnest(string_to_array(rtrim(lower(trim(canonical_value)), '.'), '.'))
+                WITH ORDINALITY AS labels(label, ord)
+        )
+        WHERE type IN ('DOMAIN', 'SUBDOMAIN')
+        """
+    )
+    op.create_index("ix_entities_reversed_domain", "entities", ["reversed_domain"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_entities_reversed_domain", table_name="entities")
+    op.drop_column("entities", "reversed_domain")
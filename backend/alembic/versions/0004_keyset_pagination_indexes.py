@@ -0,0 +1,31 @@
+"""Composite indexes for keyset pagination
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_scans_created_at_id", "scans", ["created_at", "id"])
+    op.create_index(
+        "ix_findings_entity_id_created_at_id", "findings", ["entity_id", "created_at", "id"]
+    )
+    op.create_index(
+        "ix_reports_scan_id_created_at_id", "reports", ["scan_id", "created_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reports_scan_id_created_at_id", table_name="reports")
+    op.drop_index("ix_findings_entity_id_created_at_id", table_name="findings")
+    op.drop_index("ix_scans_created_at_id", table_name="scans")
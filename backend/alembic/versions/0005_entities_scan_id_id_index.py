@@ -0,0 +1,23 @@
+"""Composite index for paging a scan's entities
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 09:40:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_entities_scan_id_id", "entities", ["scan_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_entities_scan_id_id", table_name="entities")
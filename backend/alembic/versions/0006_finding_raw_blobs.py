@@ -0,0 +1,27 @@
+"""Blob store references on findings
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 09:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows keep their full payload inline (raw_blob_hash stays NULL)
+    op.add_column("findings", sa.Column("raw_blob_hash", sa.String(length=64), nullable=True))
+    op.add_column("findings", sa.Column("raw_size", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("findings", "raw_size")
+    op.drop_column("findings", "raw_blob_hash")
@@ -0,0 +1,129 @@
+"""Deduplicate findings by content hash and record observations
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.blobstore import payload_hash
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+# Inline payloads hashed per round trip
+BACKFILL_BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    op.create_table(
+        "finding_observations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("finding_id", sa.Integer(), nullable=False),
+        sa.Column("scan_id", sa.Integer(), nullable=True),
+        sa.Column("observed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["finding_id"], ["findings.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["scan_id"], ["scans.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_finding_observations_id", "finding_observations", ["id"])
+    op.create_index("ix_finding_observations_scan_id", "finding_observations", ["scan_id"])
+    op.create_index(
+        "ix_finding_observations_finding_id_observed_at",
+        "finding_observations",
+        ["finding_id", "observed_at"],
+    )
+
+    op.add_column("findings", sa.Column("content_hash", sa.String(length=64), nullable=True))
+    # Offloaded payloads are already addressed by their hash
+    op.execute("UPDATE findings SET content_hash = raw_blob_hash WHERE raw_blob_hash IS NOT NULL")
+    _hash_inline_payloads()
+
+    # Every existing row becomes an observation of the oldest identical
+    # finding. Legacy rows do not record their scan, so the owning entity's
+    # scan is used.
+    op.execute(
+        """
+        WITH keepers AS (
+            SELECT entity_id, source, type, content_hash, min(id) AS id
+            FROM findings
+            GROUP BY entity_id, source, type, content_hash
+        )
+        INSERT INTO finding_observations (finding_id, scan_id, observed_at)
+        SELECT keepers.id, entities.scan_id, findings.created_at
+        FROM findings
+        JOIN keepers USING (entity_id, source, type, content_hash)
+        JOIN entities ON entities.id = findings.entity_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM findings
+        WHERE id NOT IN (
+            SELECT min(id)
+            FROM findings
+            GROUP BY entity_id, source, type, content_hash
+        )
+        """
+    )
+    op.create_unique_constraint(
+        "uq_findings_entity_id_source_type_content_hash",
+        "findings",
+        ["entity_id", "source", "type", "content_hash"],
+    )
+
+
+def _hash_inline_payloads() -> None:
+    """
+    Hash inline legacy payloads with payload_hash(), as scans do
+
+    Done in Python because the hash is taken over canonical orjson, which
+    the database's JSON text does not match; otherwise the next scan seeing
+    an unchanged payload would record it as a new finding.
+    """
+    bind = op.get_bind()
+    findings = sa.table(
+        "findings",
+        sa.column("id", sa.Integer()),
+        sa.column("raw_result", sa.JSON()),
+        sa.column("content_hash", sa.String()),
+    )
+    update = (
+        findings.update()
+        .where(findings.c.id == sa.bindparam("finding_id"))
+        .values(content_hash=sa.bindparam("hash"))
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(findings.c.id, findings.c.raw_result)
+            .where(findings.c.content_hash.is_(None), findings.c.id > last_id)
+            .order_by(findings.c.id)
+            .limit(BACKFILL_BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            # Scans hash an empty payload as {}
+            {"finding_id": row.id, "hash": payload_hash(row.raw_result or {})}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    # Collapsed duplicates are not restored; observations are dropped
+    op.drop_constraint(
+        "uq_findings_entity_id_source_type_content_hash", "findings", type_="unique"
+    )
+    op.drop_column("findings", "content_hash")
+    op.drop_index("ix_finding_observations_finding_id_observed_at", table_name="finding_observations")
+    op.drop_index("ix_finding_observations_scan_id", table_name="finding_observations")
+    op.drop_index("ix_finding_observations_id", table_name="finding_observations")
+    op.drop_table("finding_observations")
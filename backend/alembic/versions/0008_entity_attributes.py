@@ -0,0 +1,102 @@
+"""Append-only entity attributes with a current view
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 10:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "entity_attributes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("value", postgresql.JSONB(), nullable=True),
+        sa.Column("value_type", sa.String(), nullable=False),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("scan_id", sa.Integer(), nullable=True),
+        sa.Column("observed_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["entity_id"], ["entities.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["scan_id"], ["scans.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_entity_attributes_id", "entity_attributes", ["id"])
+    op.create_index("ix_entity_attributes_scan_id", "entity_attributes", ["scan_id"])
+    op.create_index(
+        "ix_entity_attributes_entity_id_key_observed_at",
+        "entity_attributes",
+        ["entity_id", "key", "observed_at"],
+    )
+
+    op.create_table(
+        "entity_attribute_current",
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("value", postgresql.JSONB(), nullable=True),
+        sa.Column("value_type", sa.String(), nullable=False),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("scan_id", sa.Integer(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["entity_id"], ["entities.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["scan_id"], ["scans.id"]),
+        sa.PrimaryKeyConstraint("entity_id", "key"),
+    )
+
+    # Seed history and the current view from the merged metadata JSON
+    op.execute(
+        """
+        INSERT INTO entity_attributes (entity_id, key, value, value_type, source, scan_id, observed_at)
+        SELECT e.id, m.key, m.value,
+               CASE jsonb_typeof(m.value)
+                   WHEN 'string' THEN 'str'
+                   WHEN 'number' THEN CASE WHEN m.value::text ~ '^-?[0-9]+$' THEN 'int' ELSE 'float' END
+                   WHEN 'boolean' THEN 'bool'
+                   WHEN 'array' THEN 'list'
+                   WHEN 'object' THEN 'dict'
+                   ELSE 'null'
+               END,
+               e.metadata::jsonb ->> 'source', e.scan_id, e.last_seen
+        FROM entities e, jsonb_each(e.metadata::jsonb) AS m(key, value)
+        WHERE e.metadata IS NOT NULL AND json_typeof(e.metadata) = 'object'
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO entity_attribute_current (entity_id, key, value, value_type, source, scan_id, updated_at)
+        SELECT entity_id, key, value, value_type, source, scan_id, observed_at
+        FROM entity_attributes
+        """
+    )
+
+
+def downgrade() -> None:
+    # Fold the current view back into the metadata JSON
+    op.execute(
+        """
+        UPDATE entities
+        SET metadata = current.attributes::json
+        FROM (
+            SELECT entity_id, jsonb_object_agg(key, value) AS attributes
+            FROM entity_attribute_current
+            GROUP BY entity_id
+        ) AS current
+        WHERE entities.id = current.entity_id
+        """
+    )
+    op.drop_table("entity_attribute_current")
+    op.drop_index("ix_entity_attributes_entity_id_key_observed_at", table_name="entity_attributes")
+    op.drop_index("ix_entity_attributes_scan_id", table_name="entity_attributes")
+    op.drop_index("ix_entity_attributes_id", table_name="entity_attributes")
+    op.drop_table("entity_attributes")
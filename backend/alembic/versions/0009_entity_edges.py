@@ -0,0 +1,75 @@
+"""Typed relationship edges between entities
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 10:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "entity_edges",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("src_entity_id", sa.Integer(), nullable=False),
+        sa.Column("dst_entity_id", sa.Integer(), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("scan_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["src_entity_id"], ["entities.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["dst_entity_id"], ["entities.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["scan_id"], ["scans.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "src_entity_id", "dst_entity_id", "type",
+            name="uq_entity_edges_src_entity_id_dst_entity_id_type",
+        ),
+    )
+    op.create_index("ix_entity_edges_id", "entity_edges", ["id"])
+    op.create_index(
+        "ix_entity_edges_dst_entity_id_src_entity_id",
+        "entity_edges",
+        ["dst_entity_id", "src_entity_id"],
+    )
+
+    # Recover relationships that so far only lived in entity attributes:
+    # subdomains record their parent_domain, domains their name_servers
+    op.execute(
+        """
+        INSERT INTO entity_edges (src_entity_id, dst_entity_id, type, source, scan_id)
+        SELECT attr.entity_id, parent.id, 'subdomain_of', 'ssl', attr.scan_id
+        FROM entity_attribute_current attr
+        JOIN entities parent
+            ON parent.canonical_value = attr.value #>> '{}' AND parent.type = 'DOMAIN'
+        WHERE attr.key = 'parent_domain' AND jsonb_typeof(attr.value) = 'string'
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO entity_edges (src_entity_id, dst_entity_id, type, source, scan_id)
+        SELECT attr.entity_id, ns.id, 'name_server', 'whois', attr.scan_id
+        FROM entity_attribute_current attr
+        CROSS JOIN LATERAL jsonb_array_elements_text(attr.value) AS name(server)
+        JOIN entities ns
+            ON ns.canonical_value = lower(name.server) AND ns.type = 'DOMAIN'
+        WHERE attr.key = 'name_servers' AND jsonb_typeof(attr.value) = 'array'
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_entity_edges_dst_entity_id_src_entity_id", table_name="entity_edges")
+    op.drop_index("ix_entity_edges_id", table_name="entity_edges")
+    op.drop_table("entity_edges")
@@ -0,0 +1,129 @@
+"""Partition findings and observations by month
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.db.partitions import (
+    FINDINGS_TABLE, OBSERVATIONS_TABLE, create_month_partition_sql,
+    add_months, months_between,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+FINDINGS_INDEXES = (
+    ("ix_findings_id", ["id"]),
+    ("ix_findings_entity_id", ["entity_id"]),
+    ("ix_findings_entity_id_created_at_id", ["entity_id", "created_at", "id"]),
+    ("ix_findings_entity_id_source_type_content_hash", ["entity_id", "source", "type", "content_hash"]),
+)
+OBSERVATIONS_INDEXES = (
+    ("ix_finding_observations_id", ["id"]),
+    ("ix_finding_observations_scan_id", ["scan_id"]),
+    ("ix_finding_observations_finding_id_observed_at", ["finding_id", "observed_at"]),
+)
+
+
+def _swap_table(table: str, column: str, partition_by: str, indexes, foreign_keys) -> None:
+    """Replace `table` by a copy partitioned by `partition_by`, keeping ids"""
+    bind = op.get_bind()
+    legacy = f"{table}_legacy"
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    op.execute(f"UPDATE {legacy} SET {column} = now() WHERE {column} IS NULL")
+    op.execute(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY {partition_by}"
+    )
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+
+    oldest = bind.execute(sa.text(f"SELECT min({column}) FROM {legacy}")).scalar()
+    today = date.today()
+    first = oldest.date() if oldest else today
+    for month in months_between(first, add_months(today.replace(day=1), settings.PARTITION_PREMAKE_MONTHS)):
+        for statement in create_month_partition_sql(table, month):
+            op.execute(statement)
+
+    op.execute(f"INSERT INTO {table} SELECT * FROM {legacy}")
+    # The id sequence belongs to the legacy column and would be dropped with it
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"DROP TABLE {legacy} CASCADE")
+
+    # The partition key must be part of the primary key
+    op.create_primary_key(f"{table}_pkey", table, ["id", column])
+    for name, columns in indexes:
+        op.create_index(name, table, columns)
+    for name, local, remote in foreign_keys:
+        op.create_foreign_key(name, table, remote, [local], ["id"])
+
+
+def _unswap_table(table: str, column: str, indexes, foreign_keys) -> None:
+    """Turn a partitioned table back into a plain one"""
+    partitioned = f"{table}_partitioned"
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {partitioned}")
+    op.execute(f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS)")
+    op.execute(f"INSERT INTO {table} SELECT * FROM {partitioned}")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"DROP TABLE {partitioned} CASCADE")
+
+    op.create_primary_key(f"{table}_pkey", table, ["id"])
+    for name, columns in indexes:
+        op.create_index(name, table, columns)
+    for name, local, remote in foreign_keys:
+        op.create_foreign_key(name, table, remote, [local], ["id"])
+
+
+def upgrade() -> None:
+    # A unique key on a partitioned table must include the partition key,
+    # which would defeat deduplication; writers take an advisory lock instead
+    op.drop_constraint(
+        "uq_findings_entity_id_source_type_content_hash", "findings", type_="unique"
+    )
+    # Observations and findings expire independently, so the reference
+    # between them cannot be a foreign key (it would also need created_at)
+    _swap_table(
+        OBSERVATIONS_TABLE, "observed_at", "RANGE (observed_at)", OBSERVATIONS_INDEXES,
+        [("finding_observations_scan_id_fkey", "scan_id", "scans")],
+    )
+    _swap_table(
+        FINDINGS_TABLE, "created_at", "RANGE (created_at)", FINDINGS_INDEXES,
+        [("findings_entity_id_fkey", "entity_id", "entities")],
+    )
+
+
+def downgrade() -> None:
+    _unswap_table(
+        FINDINGS_TABLE, "created_at", FINDINGS_INDEXES,
+        [("findings_entity_id_fkey", "entity_id", "entities")],
+    )
+    _unswap_table(
+        OBSERVATIONS_TABLE, "observed_at", OBSERVATIONS_INDEXES,
+        [("finding_observations_scan_id_fkey", "scan_id", "scans")],
+    )
+    # Drop observations whose finding no longer exists before restoring the key
+    op.execute(
+        "DELETE FROM finding_observations o "
+        "WHERE NOT EXISTS (SELECT 1 FROM findings f WHERE f.id = o.finding_id)"
+    )
+    op.create_foreign_key(
+        "finding_observations_finding_id_fkey", OBSERVATIONS_TABLE, FINDINGS_TABLE,
+        ["finding_id"], ["id"], ondelete="CASCADE",
+    )
+    op.drop_index("ix_findings_entity_id_source_type_content_hash", table_name="findings")
+    op.create_unique_constraint(
+        "uq_findings_entity_id_source_type_content_hash",
+        "findings",
+        ["entity_id", "source", "type", "content_hash"],
+    )
@@ -0,0 +1,72 @@
+"""Unique canonical key on entities
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 10:40:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Merge concurrent duplicates into the oldest row of each key
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE entity_merge AS
+        SELECT id AS duplicate_id, keeper_id
+        FROM (
+            SELECT id, min(id) OVER (PARTITION BY type, canonical_value) AS keeper_id
+            FROM entities
+        ) ranked
+        WHERE id <> keeper_id
+        """
+    )
+    op.execute(
+        "UPDATE findings f SET entity_id = m.keeper_id "
+        "FROM entity_merge m WHERE f.entity_id = m.duplicate_id"
+    )
+    op.execute(
+        "UPDATE entity_attributes a SET entity_id = m.keeper_id "
+        "FROM entity_merge m WHERE a.entity_id = m.duplicate_id"
+    )
+    # Current values the keeper lacks; its own win
+    op.execute(
+        """
+        INSERT INTO entity_attribute_current (entity_id, key, value, value_type, source, scan_id, updated_at)
+        SELECT m.keeper_id, c.key, c.value, c.value_type, c.source, c.scan_id, c.updated_at
+        FROM entity_attribute_current c
+        JOIN entity_merge m ON m.duplicate_id = c.entity_id
+        ON CONFLICT (entity_id, key) DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO entity_edges (src_entity_id, dst_entity_id, type, source, scan_id, created_at)
+        SELECT coalesce(ms.keeper_id, e.src_entity_id), coalesce(md.keeper_id, e.dst_entity_id),
+               e.type, e.source, e.scan_id, e.created_at
+        FROM entity_edges e
+        LEFT JOIN entity_merge ms ON ms.duplicate_id = e.src_entity_id
+        LEFT JOIN entity_merge md ON md.duplicate_id = e.dst_entity_id
+        WHERE (ms.keeper_id IS NOT NULL OR md.keeper_id IS NOT NULL)
+          AND coalesce(ms.keeper_id, e.src_entity_id) <> coalesce(md.keeper_id, e.dst_entity_id)
+        ON CONFLICT (src_entity_id, dst_entity_id, type) DO NOTHING
+        """
+    )
+    # Remaining attribute and edge rows of duplicates go with them (CASCADE)
+    op.execute("DELETE FROM entities e USING entity_merge m WHERE e.id = m.duplicate_id")
+    op.execute("DROP TABLE entity_merge")
+
+    op.create_unique_constraint(
+        "uq_entities_type_canonical_value", "entities", ["type", "canonical_value"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_entities_type_canonical_value", "entities", type_="unique")
@@ -0,0 +1,24 @@
+"""Scan timeline
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 10:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("scans", sa.Column("timeline", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("scans", "timeline")
@@ -0,0 +1,84 @@
+"""Watchlist of targets rescanned on a schedule
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "watchlist",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("target", sa.String(), nullable=False),
+        # The scantype enum already exists (0001)
+        sa.Column("type", postgresql.ENUM(name="scantype", create_type=False), nullable=False),
+        sa.Column("modules", sa.JSON(), nullable=True),
+        sa.Column("interval_seconds", sa.Integer(), nullable=False),
+        sa.Column("enabled", sa.Boolean(), nullable=False),
+        sa.Column("next_run_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_run_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_scan_id", sa.Integer(), nullable=True),
+        sa.Column("last_change_count", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("target"),
+    )
+    op.create_index("ix_watchlist_id", "watchlist", ["id"])
+    op.create_index("ix_watchlist_enabled_next_run_at", "watchlist", ["enabled", "next_run_at"])
+
+    op.create_table(
+        "watchlist_entities",
+        sa.Column("watchlist_id", sa.Integer(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["watchlist_id"], ["watchlist.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["entity_id"], ["entities.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("watchlist_id", "entity_id"),
+    )
+
+    op.create_table(
+        "watchlist_changes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("watchlist_id", sa.Integer(), nullable=False),
+        sa.Column("scan_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("finding_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.ForeignKeyConstraint(["watchlist_id"], ["watchlist.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["scan_id"], ["scans.id"]),
+        sa.ForeignKeyConstraint(["entity_id"], ["entities.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_watchlist_changes_scan_id", "watchlist_changes", ["scan_id"])
+    op.create_index("ix_watchlist_changes_watchlist_id_id", "watchlist_changes", ["watchlist_id", "id"])
+
+    op.add_column("scans", sa.Column("watchlist_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "scans_watchlist_id_fkey", "scans", "watchlist", ["watchlist_id"], ["id"], ondelete="SET NULL"
+    )
+    op.create_index("ix_scans_watchlist_id", "scans", ["watchlist_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_scans_watchlist_id", table_name="scans")
+    op.drop_constraint("scans_watchlist_id_fkey", "scans", type_="foreignkey")
+    op.drop_column("scans", "watchlist_id")
+    op.drop_index("ix_watchlist_changes_watchlist_id_id", table_name="watchlist_changes")
+    op.drop_index("ix_watchlist_changes_scan_id", table_name="watchlist_changes")
+    op.drop_table("watchlist_changes")
+    op.drop_table("watchlist_entities")
+    op.drop_index("ix_watchlist_enabled_next_run_at", table_name="watchlist")
+    op.drop_index("ix_watchlist_id", table_name="watchlist")
+    op.drop_table("watchlist")
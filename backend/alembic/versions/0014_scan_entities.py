@@ -0,0 +1,60 @@
+"""Entities seen by each scan, for scan diffs
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19 11:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scan_entities",
+        sa.Column("scan_id", sa.Integer(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["scan_id"], ["scans.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["entity_id"], ["entities.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("scan_id", "entity_id"),
+    )
+    # Earlier scans did not record what they saw; rebuild it from what they
+    # wrote: entities they created, attribute changes, edges and observations
+    op.execute(
+        """
+        INSERT INTO scan_entities (scan_id, entity_id)
+        SELECT scan_id, id FROM entities WHERE scan_id IS NOT NULL
+        UNION
+        SELECT scan_id, entity_id FROM entity_attributes WHERE scan_id IS NOT NULL
+        UNION
+        SELECT scan_id, src_entity_id FROM entity_edges WHERE scan_id IS NOT NULL
+        UNION
+        SELECT scan_id, dst_entity_id FROM entity_edges WHERE scan_id IS NOT NULL
+        UNION
+        SELECT finding_observations.scan_id, findings.entity_id
+        FROM finding_observations
+        JOIN findings ON findings.id = finding_observations.finding_id
+        WHERE finding_observations.scan_id IS NOT NULL
+        """
+    )
+
+    # (scan_id, finding_id) answers set operations from the index alone
+    op.create_index(
+        "ix_finding_observations_scan_id_finding_id",
+        "finding_observations",
+        ["scan_id", "finding_id"],
+    )
+    op.drop_index("ix_finding_observations_scan_id", table_name="finding_observations")
+
+
+def downgrade() -> None:
+    op.create_index("ix_finding_observations_scan_id", "finding_observations", ["scan_id"])
+    op.drop_index("ix_finding_observations_scan_id_finding_id", table_name="finding_observations")
+    op.drop_table("scan_entities")
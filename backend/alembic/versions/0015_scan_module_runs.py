@@ -0,0 +1,35 @@
+"""Per-module checkpoints of scans
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scan_module_runs",
+        sa.Column("scan_id", sa.Integer(), nullable=False),
+        sa.Column("module", sa.String(length=50), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["scan_id"], ["scans.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("scan_id", "module"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("scan_module_runs")
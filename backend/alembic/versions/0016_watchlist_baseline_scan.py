@@ -0,0 +1,26 @@
+"""Latest complete run of each watchlist entry
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-19 11:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0016'
+down_revision = '0015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("watchlist", sa.Column("baseline_scan_id", sa.Integer(), nullable=True))
+    # Whether earlier runs were complete is not recorded: start from the latest
+    op.execute("UPDATE watchlist SET baseline_scan_id = last_scan_id")
+
+
+def downgrade() -> None:
+    op.drop_column("watchlist", "baseline_scan_id")
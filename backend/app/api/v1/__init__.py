@@ -2,7 +2,7 @@
 API v1 router
 """
 from fastapi import APIRouter
-from app.api.v1.endpoints import scan, entity, search, report, health
+from app.api.v1.endpoints import scan, entity, search, report, health, domain, export, watchlist
 
 router = APIRouter()
 
@@ -12,6 +12,9 @@ router.include_router(scan.router, prefix="/scan", tags=["scans"])
 router.include_router(entity.router, prefix="/entity", tags=["entities"])
 router.include_router(search.router, prefix="/search", tags=["search"])
 router.include_router(report.router, prefix="/report", tags=["reports"])
+router.include_router(domain.router, prefix="/domain", tags=["domains"])
+router.include_router(export.router, prefix="/export", tags=["export"])
+router.include_router(watchlist.router, prefix="/watchlist", tags=["watchlist"])
 
 
 
@@ -0,0 +1,101 @@
+"""
+Domain hierarchy endpoints
+"""
+from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from app.db.database import get_read_db
+from app.db.pagination import keyset_paginate, page_results
+from app.models.entity import Entity, reverse_domain_labels
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _descendant_filter(domain: str):
+    """
+    Range predicate matching every entity strictly below `domain`
+
+    Descendants of 'example.com' have reversed keys in
+    ['com.example.', 'com.example/'), '/' being the byte after '.'.
+    """
+    prefix = reverse_domain_labels(domain)
+    return (
+        Entity.reversed_domain >= f"{prefix}.",
+        Entity.reversed_domain < f"{prefix}/",
+    )
+
+
+@router.get("/{domain}/subdomains")
+async def list_subdomains(
+    domain: str,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """List known descendants of a domain across all scans, in hierarchy order"""
+    try:
+        query = keyset_paginate(
+            select(
+                Entity.id, Entity.scan_id, Entity.type, Entity.canonical_value,
+                Entity.reversed_domain, Entity.first_seen, Entity.last_seen,
+            ).where(*_descendant_filter(domain)),
+            (Entity.reversed_domain, Entity.id),
+            cursor,
+            limit,
+            descending=False,
+        )
+        result = await db.execute(query)
+        entities, next_cursor = page_results(
+            result.all(), limit, lambda e: (e.reversed_domain, e.id)
+        )
+
+        return ORJSONResponse({
+            "domain": domain,
+            "subdomains": [
+                {
+                    "id": e.id,
+                    "scan_id": e.scan_id,
+                    "type": e.type.value,
+                    "canonical_value": e.canonical_value,
+                    "first_seen": e.first_seen,
+                    "last_seen": e.last_seen,
+                }
+                for e in entities
+            ],
+            "next_cursor": next_cursor,
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing subdomains of {domain}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to list subdomains: {str(e)}"
+        )
+
+
+@router.get("/{domain}/subdomains/count")
+async def count_subdomains(
+    domain: str,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Count known descendants of a domain across all scans"""
+    try:
+        result = await db.execute(
+            select(func.count()).select_from(Entity).where(*_descendant_filter(domain))
+        )
+        return {
+            "domain": domain,
+            "count": result.scalar_one(),
+        }
+    except Exception as e:
+        logger.error(f"Error counting subdomains of {domain}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to count subdomains: {str(e)}"
+        )
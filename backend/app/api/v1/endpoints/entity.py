@@ -1,62 +1,186 @@
 """
 Entity endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import ORJSONResponse, Response
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.db.database import get_db
+from sqlalchemy import select, func, literal, cast, case, or_, Integer
+from app.db.database import get_db, get_read_db
+from app.db.pagination import keyset_paginate, page_results
 from app.models.entity import Entity
+from app.models.attribute import EntityAttribute
+from app.models.edge import EntityEdge
 from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.models.scan import Scan, ScanStatus
+from app.services.attributes import current_attributes
+from app.services.blobstore import get_blob_store, encode_payload, BlobNotFound
+from app.services.cache import response_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Finding columns returned by entity endpoints, read without ORM hydration
+FINDING_COLUMNS = (
+    Finding.id, Finding.source, Finding.type, Finding.confidence_score,
+    Finding.raw_result, Finding.raw_blob_hash, Finding.raw_size, Finding.created_at,
+)
+
+# Walk rows read per requested node before the graph is reported truncated;
+# nodes reachable along several paths appear more than once in the walk
+GRAPH_WALK_FACTOR = 4
+
+
+def _neighbourhood_query(entity_id: int, depth: int, edge_types: Optional[list], row_cap: int):
+    """
+    Breadth-first walk over entity_edges (both directions) as a recursive CTE
+
+    Rows come out level by level, and PostgreSQL evaluates the recursion
+    lazily, so the outer LIMIT stops the walk as soon as enough nodes have
+    been produced instead of expanding every hop around hub entities.
+    """
+    walk = (
+        select(Entity.id.label("node"), cast(literal(0), Integer).label("depth"))
+        .where(Entity.id == entity_id)
+        .cte("walk", recursive=True)
+    )
+    conditions = [
+        or_(EntityEdge.src_entity_id == walk.c.node, EntityEdge.dst_entity_id == walk.c.node),
+        walk.c.depth < depth,
+    ]
+    if edge_types:
+        conditions.append(EntityEdge.type.in_(edge_types))
+    step = select(
+        case(
+            (EntityEdge.src_entity_id == walk.c.node, EntityEdge.dst_entity_id),
+            else_=EntityEdge.src_entity_id,
+        ),
+        walk.c.depth + 1,
+    ).where(*conditions)
+    walk = walk.union(step)
+    return select(walk.c.node, walk.c.depth).limit(row_cap)
+
+
+async def _with_observations(db: AsyncSession, findings) -> list:
+    """
+    Add first_seen, last_seen and times_seen to a page of findings
+
+    Rescans that see an identical payload record an observation instead of
+    a new finding, so these come from the observations table.
+    """
+    ids = [f["id"] for f in findings]
+    stats = {}
+    if ids:
+        result = await db.execute(
+            select(
+                FindingObservation.finding_id,
+                func.min(FindingObservation.observed_at).label("first_seen"),
+                func.max(FindingObservation.observed_at).label("last_seen"),
+                func.count().label("times_seen"),
+            )
+            .where(FindingObservation.finding_id.in_(ids))
+            .group_by(FindingObservation.finding_id)
+        )
+        stats = {row.finding_id: row for row in result.all()}
+    
+    page = []
+    for f in findings:
+        seen = stats.get(f["id"])
+        page.append({
+            **f,
+            "first_seen": seen.first_seen if seen else f["created_at"],
+            "last_seen": seen.last_seen if seen else f["created_at"],
+            "times_seen": seen.times_seen if seen else 1,
+        })
+    return page
+
+
+async def _findings_page(db: AsyncSession, entity_id: int, limit: int, cursor: Optional[str]):
+    """
+    Newest-first page of an entity's findings
+
+    The total count is only computed for the first page (no cursor); later
+    pages return None instead of counting again.
+    """
+    findings_result = await db.execute(
+        keyset_paginate(
+            select(*FINDING_COLUMNS).where(Finding.entity_id == entity_id),
+            (Finding.created_at, Finding.id),
+            cursor,
+            limit,
+        )
+    )
+    findings, next_cursor = page_results(
+        findings_result.mappings().all(), limit, lambda f: (f["created_at"], f["id"])
+    )
+    total = None
+    if not cursor:
+        total = (
+            await db.execute(
+                select(func.count()).select_from(Finding).where(Finding.entity_id == entity_id)
+            )
+        ).scalar_one()
+    return await _with_observations(db, findings), next_cursor, total
+
 
 @router.get("/{entity_id}")
 async def get_entity(
+    request: Request,
     entity_id: int,
+    findings_limit: int = Query(50, ge=1, le=500),
+    # Primary, not the replica: a body built from a lagging replica would
+    # be cached under the version a newer write just bumped
     db: AsyncSession = Depends(get_db)
 ):
-    """Get entity details, findings, and embeddings"""
+    """
+    Get entity details, findings, and embeddings
+
+    Only the newest `findings_limit` findings are embedded; page through the
+    rest with /{entity_id}/findings and `findings_next_cursor`. Entities of
+    completed scans are cached and served with an ETag.
+    """
     try:
-        # Query entity from database
-        result = await db.execute(
-            select(Entity).where(Entity.id == entity_id)
-        )
-        entity = result.scalar_one_or_none()
+        async def build():
+            # Query entity from database
+            result = await db.execute(
+                select(Entity).where(Entity.id == entity_id)
+            )
+            entity = result.scalar_one_or_none()
+            
+            if not entity:
+                raise HTTPException(status_code=404, detail="Entity not found")
+            
+            attributes = await current_attributes(db, [entity.id])
+            
+            # Query findings for this entity
+            findings, next_cursor, total = await _findings_page(
+                db, entity_id, findings_limit, None
+            )
+            
+            # Cacheable once the scan that owns the entity has completed
+            scan_status = None
+            if entity.scan_id is not None:
+                scan_status = (
+                    await db.execute(select(Scan.status).where(Scan.id == entity.scan_id))
+                ).scalar_one_or_none()
+            
+            return {
+                "id": entity.id,
+                "scan_id": entity.scan_id,
+                "type": entity.type.value,
+                "canonical_value": entity.canonical_value,
+                "metadata": attributes.get(entity.id, entity.metadata_json),
+                "first_seen": entity.first_seen,
+                "last_seen": entity.last_seen,
+                "findings": findings,
+                "findings_count": total,
+                "findings_next_cursor": next_cursor,
+            }, scan_status == ScanStatus.COMPLETED
         
-        if not entity:
-            raise HTTPException(status_code=404, detail="Entity not found")
-        
-        # Query findings for this entity
-        findings_result = await db.execute(
-            select(Finding).where(Finding.entity_id == entity_id)
-        )
-        findings = findings_result.scalars().all()
-        
-        return {
-            "id": entity.id,
-            "scan_id": entity.scan_id,
-            "type": entity.type.value,
-            "canonical_value": entity.canonical_value,
-            "metadata": entity.metadata_json,
-            "first_seen": entity.first_seen,
-            "last_seen": entity.last_seen,
-            "findings": [
-                {
-                    "id": f.id,
-                    "source": f.source,
-                    "type": f.type,
-                    "confidence_score": f.confidence_score,
-                    "raw_result": f.raw_result,
-                    "created_at": f.created_at,
-                }
-                for f in findings
-            ],
-            "findings_count": len(findings),
-        }
+        return await response_cache.respond(request, "entity", entity_id, build)
     except HTTPException:
         raise
     except Exception as e:
@@ -70,40 +194,29 @@ async def get_entity(
 @router.get("/{entity_id}/findings")
 async def get_entity_findings(
     entity_id: int,
-    db: AsyncSession = Depends(get_db)
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get all findings for an entity"""
+    """Get findings for an entity, newest first; `total` is only on the first page"""
     try:
         # Verify entity exists
         entity_result = await db.execute(
-            select(Entity).where(Entity.id == entity_id)
+            select(Entity.id).where(Entity.id == entity_id)
         )
-        entity = entity_result.scalar_one_or_none()
         
-        if not entity:
+        if entity_result.scalar_one_or_none() is None:
             raise HTTPException(status_code=404, detail="Entity not found")
         
         # Query findings
-        findings_result = await db.execute(
-            select(Finding).where(Finding.entity_id == entity_id)
-        )
-        findings = findings_result.scalars().all()
+        findings, next_cursor, total = await _findings_page(db, entity_id, limit, cursor)
         
-        return {
+        return ORJSONResponse({
             "entity_id": entity_id,
-            "findings": [
-                {
-                    "id": f.id,
-                    "source": f.source,
-                    "type": f.type,
-                    "confidence_score": f.confidence_score,
-                    "raw_result": f.raw_result,
-                    "created_at": f.created_at,
-                }
-                for f in findings
-            ],
-            "total": len(findings),
-        }
+            "findings": findings,
+            "total": total,
+            "next_cursor": next_cursor,
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -114,13 +227,191 @@ async def get_entity_findings(
         )
 
 
+@router.get("/{entity_id}/attributes")
+async def get_entity_attribute_history(
+    entity_id: int,
+    key: Optional[str] = Query(None, description="Only changes of this attribute"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get the change history of an entity's attributes, newest first"""
+    try:
+        entity_result = await db.execute(
+            select(Entity.id).where(Entity.id == entity_id)
+        )
+        
+        if entity_result.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Entity not found")
+        
+        query = select(
+            EntityAttribute.id, EntityAttribute.key, EntityAttribute.value,
+            EntityAttribute.value_type, EntityAttribute.source, EntityAttribute.scan_id,
+            EntityAttribute.observed_at,
+        ).where(EntityAttribute.entity_id == entity_id)
+        if key is not None:
+            query = query.where(EntityAttribute.key == key)
+        
+        result = await db.execute(
+            keyset_paginate(query, (EntityAttribute.observed_at, EntityAttribute.id), cursor, limit)
+        )
+        changes, next_cursor = page_results(
+            result.mappings().all(), limit, lambda a: (a["observed_at"], a["id"])
+        )
+        
+        return ORJSONResponse({
+            "entity_id": entity_id,
+            "attributes": [dict(a) for a in changes],
+            "next_cursor": next_cursor,
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving attributes for entity {entity_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve attributes: {str(e)}"
+        )
 
 
+@router.get("/{entity_id}/graph")
+async def get_entity_graph(
+    entity_id: int,
+    depth: int = Query(2, ge=1, le=4, description="Number of hops around the entity"),
+    max_nodes: int = Query(200, ge=1, le=2000),
+    max_edges: int = Query(500, ge=1, le=5000),
+    edge_types: Optional[str] = Query(None, description="Comma-separated edge types to follow"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get the k-hop neighbourhood of an entity as nodes and edges
 
+    Nodes are the closest `max_nodes` entities (breadth first); edges are
+    the relationships among them, up to `max_edges`. `truncated` tells
+    whether either cap was hit.
+    """
+    try:
+        types = [t.strip() for t in (edge_types or "").split(",") if t.strip()] or None
+        
+        walk = await db.execute(
+            _neighbourhood_query(entity_id, depth, types, max_nodes * GRAPH_WALK_FACTOR)
+        )
+        depths = {}
+        nodes_truncated = False
+        for node, node_depth in walk.all():
+            if node in depths:
+                continue
+            if len(depths) == max_nodes:
+                nodes_truncated = True
+                break
+            depths[node] = node_depth
+        
+        if not depths:
+            raise HTTPException(status_code=404, detail="Entity not found")
+        
+        node_ids = list(depths)
+        entities_result = await db.execute(
+            select(Entity.id, Entity.type, Entity.canonical_value).where(Entity.id.in_(node_ids))
+        )
+        
+        edges_query = (
+            select(
+                EntityEdge.id, EntityEdge.src_entity_id, EntityEdge.dst_entity_id,
+                EntityEdge.type, EntityEdge.source,
+            )
+            .where(
+                EntityEdge.src_entity_id.in_(node_ids),
+                EntityEdge.dst_entity_id.in_(node_ids),
+            )
+            .order_by(EntityEdge.id)
+            .limit(max_edges + 1)
+        )
+        if types:
+            edges_query = edges_query.where(EntityEdge.type.in_(types))
+        edges = (await db.execute(edges_query)).all()
+        edges_truncated = len(edges) > max_edges
+        
+        return ORJSONResponse({
+            "root": entity_id,
+            "depth": depth,
+            "nodes": sorted(
+                (
+                    {
+                        "id": e.id,
+                        "type": e.type.value,
+                        "value": e.canonical_value,
+                        "depth": depths[e.id],
+                    }
+                    for e in entities_result.all()
+                ),
+                key=lambda n: (n["depth"], n["id"]),
+            ),
+            "edges": [
+                {
+                    "id": e.id,
+                    "source": e.src_entity_id,
+                    "target": e.dst_entity_id,
+                    "type": e.type,
+                    "origin": e.source,
+                }
+                for e in edges[:max_edges]
+            ],
+            "truncated": {"nodes": nodes_truncated, "edges": edges_truncated},
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving graph for entity {entity_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve graph: {str(e)}"
+        )
 
 
+@router.get("/{entity_id}/findings/{finding_id}/raw")
+async def get_finding_raw(
+    request: Request,
+    entity_id: int,
+    finding_id: int,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get the full raw payload of a finding
 
-
-
-
-
+    Findings only carry a summary in `raw_result`; the payload itself is
+    loaded from the blob store on request. Blobs are content-addressed, so
+    the response is immutable and its ETag is the blob hash.
+    """
+    try:
+        result = await db.execute(
+            select(Finding.raw_result, Finding.raw_blob_hash).where(
+                Finding.id == finding_id, Finding.entity_id == entity_id
+            )
+        )
+        finding = result.one_or_none()
+        
+        if finding is None:
+            raise HTTPException(status_code=404, detail="Finding not found")
+        
+        # Findings stored before the blob store hold the payload inline
+        if not finding.raw_blob_hash:
+            return Response(content=encode_payload(finding.raw_result), media_type="application/json")
+        
+        etag = f'"{finding.raw_blob_hash}"'
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        
+        try:
+            body = await get_blob_store().get_bytes(finding.raw_blob_hash)
+        except BlobNotFound:
+            raise HTTPException(status_code=404, detail="Raw payload not found in blob store")
+        return Response(content=body, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving raw payload of finding {finding_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve raw payload: {str(e)}"
+        )
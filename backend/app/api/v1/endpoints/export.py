@@ -0,0 +1,72 @@
+"""
+Bulk export endpoints
+"""
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional, List
+from datetime import datetime
+from app.db.database import ReadSessionLocal
+from app.services.export import (
+    EXPORT_KINDS, MEDIA_TYPES, ExportFilters, check_entity_types, check_format, export_rows,
+    parse_include,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/{kind}")
+async def export(
+    kind: str,
+    format: str = Query("ndjson", description="ndjson, csv or parquet"),
+    scan_id: Optional[List[int]] = Query(None, description="Only rows of these scans (repeatable)"),
+    since: Optional[datetime] = Query(None, description="Created (findings) or first seen (entities) at or after"),
+    until: Optional[datetime] = Query(None, description="... and before"),
+    entity_type: Optional[List[str]] = Query(None, description="Only these entity types (repeatable)"),
+    source: Optional[List[str]] = Query(None, description="Only findings from these sources (repeatable)"),
+    include: Optional[str] = Query(
+        None,
+        description="Comma-separated heavy fields: metadata (entities), raw_result (findings)",
+    ),
+):
+    """
+    Stream every matching entity or finding as NDJSON, CSV or Parquet
+
+    Rows come from a server-side cursor and are encoded batch by batch
+    (one Parquet row group per batch), so memory use does not depend on
+    the size of the export.
+    """
+    if kind not in EXPORT_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {kind}")
+    try:
+        check_format(format)
+        check_entity_types(entity_type or [])
+        fields = parse_include(kind, include)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filters = ExportFilters(
+        scan_ids=scan_id or [],
+        since=since,
+        until=until,
+        entity_types=entity_type or [],
+        sources=source or [],
+    )
+
+    async def generate():
+        async with ReadSessionLocal() as session:
+            try:
+                async for chunk in export_rows(session, kind, format, filters, fields):
+                    yield chunk
+            except Exception as e:
+                # Headers are already sent; the truncated body is all we can signal
+                logger.error(f"Export of {kind} failed: {e}", exc_info=True)
+                raise
+
+    return StreamingResponse(
+        generate(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}"'},
+    )
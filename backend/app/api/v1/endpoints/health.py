@@ -3,6 +3,9 @@ Health check endpoints
 """
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
+from app.core.startup import startup_profile
+from app.db.database import engine, read_engine
+from app.db.pool import pool_status
 
 router = APIRouter()
 
@@ -18,13 +21,19 @@ async def health_check():
     )
 
 
+@router.get("/health/db")
+async def database_health():
+    """Connection pool occupancy and checkout latency for each engine"""
+    pools = {"primary": pool_status(engine)}
+    if read_engine is not engine:
+        pools["read"] = pool_status(read_engine)
+    return JSONResponse(content={"pools": pools})
 
 
-
-
-
-
-
-
-
-
+@router.get("/health/startup")
+async def startup_health():
+    """
+    Startup profile of this process: import time per component and time of
+    each initialization step (recorded with STARTUP_PROFILE=true)
+    """
+    return JSONResponse(content=startup_profile.report())
@@ -1,10 +1,13 @@
 """
 Report endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.db.database import get_db
+from app.db.database import get_read_db
+from app.db.pagination import keyset_paginate, page_results
 from app.models.report import Report
 from app.models.scan import Scan
 import logging
@@ -13,11 +16,17 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Report columns returned by listings, read without ORM hydration
+REPORT_COLUMNS = (
+    Report.id, Report.scan_id, Report.title, Report.generated_text,
+    Report.sections, Report.score, Report.created_at,
+)
+
 
 @router.get("/{report_id}")
 async def get_report(
     report_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get generated LLM report"""
     try:
@@ -51,37 +60,39 @@ async def get_report(
 @router.get("/scan/{scan_id}")
 async def get_scan_reports(
     scan_id: int,
-    db: AsyncSession = Depends(get_db)
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get all reports for a scan"""
+    """
+    Get reports for a scan, newest first
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
     try:
         # Verify scan exists
         scan_result = await db.execute(
-            select(Scan).where(Scan.id == scan_id)
+            select(Scan.id).where(Scan.id == scan_id)
         )
-        scan = scan_result.scalar_one_or_none()
         
-        if not scan:
+        if scan_result.scalar_one_or_none() is None:
             raise HTTPException(status_code=404, detail="Scan not found")
         
         # Get reports
         reports_result = await db.execute(
-            select(Report).where(Report.scan_id == scan_id).order_by(Report.created_at.desc())
+            keyset_paginate(
+                select(*REPORT_COLUMNS).where(Report.scan_id == scan_id),
+                (Report.created_at, Report.id),
+                cursor,
+                limit,
+            )
+        )
+        reports, next_cursor = page_results(
+            reports_result.mappings().all(), limit, lambda r: (r["created_at"], r["id"])
         )
-        reports = reports_result.scalars().all()
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
         
-        return [
-            {
-                "id": r.id,
-                "scan_id": r.scan_id,
-                "title": r.title,
-                "generated_text": r.generated_text,
-                "sections": r.sections,
-                "score": r.score,
-                "created_at": r.created_at,
-            }
-            for r in reports
-        ]
+        return ORJSONResponse([dict(r) for r in reports], headers=headers)
     except HTTPException:
         raise
     except Exception as e:
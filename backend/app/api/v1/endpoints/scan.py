@@ -1,17 +1,29 @@
 """
 Scan endpoints
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
+from enum import Enum
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func, update
+import asyncio
+import orjson
 
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db, ReadSessionLocal
+from app.core.tracing import waterfall
+from app.db.pagination import keyset_paginate, page_results
 from app.models.scan import Scan, ScanStatus, ScanType
 from app.models.entity import Entity
 from app.models.finding import Finding
+from app.models.scan_module_run import ScanModuleRun
+from app.services.attributes import hydrate_metadata
+from app.services.blobstore import hydrate_raw_results
+from app.services.cache import response_cache
+from app.services.diff import ScanDiff, scan_members, scan_observations
+from app.services.events import scan_events, get_scan_snapshot, publish_scan_event, TERMINAL_EVENTS
 from app.tasks.scan import scan_domain_task, scan_email_task
 import logging
 
@@ -19,6 +31,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Rows fetched per round trip when streaming from a server-side cursor
+STREAM_BATCH_SIZE = 500
+
 
 class ScanRequest(BaseModel):
     """Scan request model"""
@@ -36,6 +51,21 @@ class ScanResponse(BaseModel):
     created_at: datetime
 
 
+def _queue_scan(scan: Scan, modules: List[str]) -> None:
+    """Queue the Celery task of a scan based on its type"""
+    if scan.type == ScanType.DOMAIN:
+        scan_domain_task.delay(scan.id, scan.target, modules)
+        logger.info(f"Queued domain scan task for scan_id={scan.id}, target={scan.target}")
+    elif scan.type == ScanType.EMAIL:
+        scan_email_task.delay(scan.id, scan.target, modules)
+        logger.info(f"Queued email scan task for scan_id={scan.id}, target={scan.target}")
+    else:
+        # For IP and HANDLE types, use domain task for now
+        # TODO: Implement dedicated tasks for IP and handle scans
+        scan_domain_task.delay(scan.id, scan.target, modules)
+        logger.info(f"Queued scan task for scan_id={scan.id}, target={scan.target}, type={scan.type}")
+
+
 @router.post("", response_model=ScanResponse)
 async def create_scan(
     request: ScanRequest,
@@ -70,20 +100,7 @@ async def create_scan(
         await db.commit()
         await db.refresh(scan)
         
-        # Queue Celery task based on scan type
-        modules = request.modules or []
-        
-        if scan_type == ScanType.DOMAIN:
-            scan_domain_task.delay(scan.id, request.target, modules)
-            logger.info(f"Queued domain scan task for scan_id={scan.id}, target={request.target}")
-        elif scan_type == ScanType.EMAIL:
-            scan_email_task.delay(scan.id, request.target, modules)
-            logger.info(f"Queued email scan task for scan_id={scan.id}, target={request.target}")
-        else:
-            # For IP and HANDLE types, use domain task for now
-            # TODO: Implement dedicated tasks for IP and handle scans
-            scan_domain_task.delay(scan.id, request.target, modules)
-            logger.info(f"Queued scan task for scan_id={scan.id}, target={request.target}, type={scan_type}")
+        _queue_scan(scan, request.modules or [])
         
         return ScanResponse(
             scan_id=scan.id,
@@ -104,31 +121,172 @@ async def create_scan(
         )
 
 
+@router.post("/{scan_id}/resume", response_model=ScanResponse)
+async def resume_scan(scan_id: int, db: AsyncSession = Depends(get_db)):
+    """
+    Run the unfinished modules of a scan again
+
+    Modules the scan already completed are not run again (their
+    checkpointed results are reused); failed or interrupted ones are.
+    Failed scans can be resumed, and so can completed scans with a module
+    that did not succeed. Queued or running scans, and scans with nothing
+    left to run, cannot (409).
+    """
+    try:
+        scan = await _load_scan(db, scan_id)
+        if scan.status in (ScanStatus.QUEUED, ScanStatus.RUNNING):
+            raise HTTPException(status_code=409, detail=f"Scan is already {scan.status.value}")
+        if scan.status == ScanStatus.COMPLETED:
+            unfinished = (await db.execute(
+                select(ScanModuleRun.module).where(
+                    ScanModuleRun.scan_id == scan_id, ScanModuleRun.status != "success"
+                ).limit(1)
+            )).scalar_one_or_none()
+            if unfinished is None:
+                raise HTTPException(status_code=409, detail="Scan already completed")
+        
+        # Conditional, so that concurrent resumes queue the scan only once
+        queued = await db.execute(
+            update(Scan)
+            .where(Scan.id == scan_id, Scan.status == scan.status)
+            .values(status=ScanStatus.QUEUED)
+        )
+        if queued.rowcount == 0:
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="Scan is already queued")
+        await db.commit()
+        await db.refresh(scan)
+        await response_cache.invalidate("scan", scan_id)
+        # Replaces the previous run's terminal event in the progress snapshot,
+        # which would otherwise close sockets opened before the worker starts
+        await publish_scan_event(scan_id, "scan_queued")
+        _queue_scan(scan, (scan.settings or {}).get("modules") or [])
+        
+        return ScanResponse(
+            scan_id=scan.id,
+            status=scan.status.value,
+            target=scan.target,
+            type=scan.type.value,
+            created_at=scan.created_at,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error resuming scan {scan_id}: {e}", exc_info=True)
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to resume scan: {str(e)}"
+        )
+
+
+# Columns returned by scan listings
+SCAN_COLUMNS = (
+    Scan.id.label("scan_id"), Scan.target, Scan.type, Scan.status, Scan.settings,
+    Scan.created_at, Scan.started_at, Scan.finished_at,
+)
+
+# Columns always returned for embedded entities and findings
+ENTITY_COLUMNS = (
+    Entity.id, Entity.scan_id, Entity.type, Entity.canonical_value,
+    Entity.first_seen, Entity.last_seen,
+)
+FINDING_COLUMNS = (
+    Finding.id, Finding.entity_id, Finding.source, Finding.type,
+    Finding.confidence_score, Finding.raw_blob_hash, Finding.raw_size, Finding.created_at,
+)
+
+# Heavy columns returned only when listed in `include`
+OPTIONAL_FIELDS = {
+    "metadata": Entity.metadata_json.label("metadata"),
+    "raw_result": Finding.raw_result,
+}
+
+
+def _parse_include(include: Optional[str]) -> set:
+    """Validate the comma-separated `include` parameter"""
+    fields = {f.strip() for f in (include or "").split(",") if f.strip()}
+    unknown = fields - OPTIONAL_FIELDS.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include field(s): {', '.join(sorted(unknown))}. "
+                   f"Must be among: {', '.join(sorted(OPTIONAL_FIELDS))}"
+        )
+    return fields
+
+
+def _entity_query(scan_id: int, fields: set):
+    """Projection of the entities a scan saw without ORM hydration"""
+    columns = list(ENTITY_COLUMNS)
+    if "metadata" in fields:
+        columns.append(OPTIONAL_FIELDS["metadata"])
+    return select(*columns).where(Entity.id.in_(scan_members(scan_id)))
+
+
+def _finding_query(scan_id: int, fields: set):
+    """Projection of the findings a scan observed"""
+    columns = list(FINDING_COLUMNS)
+    if "raw_result" in fields:
+        columns.append(OPTIONAL_FIELDS["raw_result"])
+    return select(*columns).where(Finding.id.in_(scan_observations(scan_id)))
+
+
+def _row_dict(row) -> dict:
+    """Map a projected row to a response dict, unwrapping enum values"""
+    data = dict(row._mapping) if hasattr(row, "_mapping") else dict(row)
+    for key in ("type", "status"):
+        if isinstance(data.get(key), Enum):
+            data[key] = data[key].value
+    return data
+
+
+def _scan_summary(scan: Scan) -> dict:
+    """Scan fields shared by the JSON and NDJSON representations"""
+    return {
+        "scan_id": scan.id,
+        "target": scan.target,
+        "type": scan.type.value,
+        "status": scan.status.value,
+        "settings": scan.settings,
+        "created_at": scan.created_at,
+        "started_at": scan.started_at,
+        "finished_at": scan.finished_at,
+    }
+
+
+async def _load_scan(db: AsyncSession, scan_id: int) -> Scan:
+    """Fetch a scan or raise 404"""
+    result = await db.execute(select(Scan).where(Scan.id == scan_id))
+    scan = result.scalar_one_or_none()
+    if not scan:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    return scan
+
+
 @router.get("")
 async def get_scans(
-    db: AsyncSession = Depends(get_db),
-    limit: int = 100
+    db: AsyncSession = Depends(get_read_db),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
 ):
-    """Get all scans"""
+    """
+    Get scans, newest first
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
     try:
         result = await db.execute(
-            select(Scan).order_by(Scan.created_at.desc()).limit(limit)
+            keyset_paginate(select(*SCAN_COLUMNS), (Scan.created_at, Scan.id), cursor, limit)
+        )
+        scans, next_cursor = page_results(
+            result.mappings().all(), limit, lambda s: (s["created_at"], s["scan_id"])
         )
-        scans = result.scalars().all()
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
         
-        return [
-            {
-                "scan_id": scan.id,
-                "target": scan.target,
-                "type": scan.type.value,
-                "status": scan.status.value,
-                "settings": scan.settings,
-                "created_at": scan.created_at,
-                "started_at": scan.started_at,
-                "finished_at": scan.finished_at,
-            }
-            for scan in scans
-        ]
+        return ORJSONResponse([_row_dict(scan) for scan in scans], headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving scans: {e}", exc_info=True)
         raise HTTPException(
@@ -139,69 +297,82 @@ async def get_scans(
 
 @router.get("/{scan_id}")
 async def get_scan(
+    request: Request,
     scan_id: int,
+    include: Optional[str] = Query(
+        "metadata",
+        description="Comma-separated heavy fields to include: metadata, raw_result",
+    ),
+    entities_limit: int = Query(100, ge=1, le=1000),
+    entities_cursor: Optional[str] = Query(None),
+    findings_limit: int = Query(100, ge=1, le=1000),
+    findings_cursor: Optional[str] = Query(None),
+    # Primary, not the replica: a body built from a lagging replica would
+    # be cached under the version a newer write just bumped
     db: AsyncSession = Depends(get_db)
 ):
-    """Get scan status and summary with entities and findings"""
+    """
+    Get scan status and summary with entities and findings
+
+    Entities and findings are paged independently; `raw_result` is only
+    returned when requested through `include`, in which case full payloads
+    are loaded from the blob store for the findings on this page. Completed scans are cached
+    and served with an ETag.
+    """
     try:
-        # Query scan from database
-        result = await db.execute(
-            select(Scan).where(Scan.id == scan_id)
-        )
-        scan = result.scalar_one_or_none()
+        fields = _parse_include(include)
         
-        if not scan:
-            raise HTTPException(status_code=404, detail="Scan not found")
+        async def build():
+            scan = await _load_scan(db, scan_id)
         
-        # Query entities for this scan
-        entities_result = await db.execute(
-            select(Entity).where(Entity.scan_id == scan_id)
-        )
-        entities = entities_result.scalars().all()
+            # Query a page of entities for this scan
+            entities_result = await db.execute(
+                keyset_paginate(
+                    _entity_query(scan_id, fields), (Entity.id,),
+                    entities_cursor, entities_limit, descending=False,
+                )
+            )
+            entities, entities_next_cursor = page_results(
+                entities_result.all(), entities_limit, lambda e: (e.id,)
+            )
         
-        # Query findings for entities in this scan
-        entity_ids = [e.id for e in entities]
-        findings = []
-        if entity_ids:
+            # Query a page of findings for entities in this scan
             findings_result = await db.execute(
-                select(Finding).where(Finding.entity_id.in_(entity_ids))
+                keyset_paginate(
+                    _finding_query(scan_id, fields), (Finding.id,),
+                    findings_cursor, findings_limit, descending=False,
+                )
+            )
+            findings, findings_next_cursor = page_results(
+                findings_result.all(), findings_limit, lambda f: (f.id,)
             )
-            findings = findings_result.scalars().all()
         
-        return {
-            "scan_id": scan.id,
-            "target": scan.target,
-            "type": scan.type.value,
-            "status": scan.status.value,
-            "settings": scan.settings,
-            "created_at": scan.created_at,
-            "started_at": scan.started_at,
-            "finished_at": scan.finished_at,
-            "entities": [
-                {
-                    "id": e.id,
-                    "scan_id": e.scan_id,
-                    "type": e.type.value,
-                    "canonical_value": e.canonical_value,
-                    "metadata": e.metadata_json,
-                    "first_seen": e.first_seen,
-                    "last_seen": e.last_seen,
-                }
-                for e in entities
-            ],
-            "findings": [
-                {
-                    "id": f.id,
-                    "entity_id": f.entity_id,
-                    "source": f.source,
-                    "type": f.type,
-                    "confidence_score": f.confidence_score,
-                    "raw_result": f.raw_result,
-                    "created_at": f.created_at,
-                }
-                for f in findings
-            ],
-        }
+            entities_count = (
+                await db.execute(select(func.count()).select_from(scan_members(scan_id).subquery()))
+            ).scalar_one()
+            findings_count = (
+                await db.execute(select(func.count()).select_from(scan_observations(scan_id).subquery()))
+            ).scalar_one()
+        
+            entities_page = [_row_dict(e) for e in entities]
+            if "metadata" in fields:
+                entities_page = await hydrate_metadata(db, entities_page)
+            findings_page = [_row_dict(f) for f in findings]
+            if "raw_result" in fields:
+                findings_page = await hydrate_raw_results(findings_page)
+        
+            return {
+                **_scan_summary(scan),
+                "entities": entities_page,
+                "entities_count": entities_count,
+                "entities_next_cursor": entities_next_cursor,
+                "findings": findings_page,
+                "findings_count": findings_count,
+                "findings_next_cursor": findings_next_cursor,
+            }, scan.status == ScanStatus.COMPLETED
+        
+        # Completed scans are immutable until a later write invalidates them
+        return await response_cache.respond(request, "scan", scan_id, build)
     except HTTPException:
         raise
     except Exception as e:
@@ -212,10 +383,170 @@ async def get_scan(
         )
 
 
-@router.websocket("/{scan_id}/ws")
-async def scan_websocket(scan_id: str):
-    """WebSocket endpoint for real-time scan updates"""
-    # TODO: Implement WebSocket for live scan progress
-    pass
+@router.get("/{scan_id}/timeline")
+async def get_scan_timeline(scan_id: int, db: AsyncSession = Depends(get_read_db)):
+    """
+    Waterfall of the scan's last run: phases, their nesting and durations,
+    and the DB statements and writes aggregated under each of them
+
+    `spans` is empty until a run has finished.
+    """
+    try:
+        scan = await _load_scan(db, scan_id)
+        return ORJSONResponse({
+            "scan_id": scan.id,
+            "status": scan.status.value,
+            **waterfall(scan.timeline),
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving timeline of scan {scan_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve scan timeline: {str(e)}"
+        )
 
 
+@router.get("/{scan_id}/diff/{other_scan_id}")
+async def diff_scans(
+    scan_id: int,
+    other_scan_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    What changed from one scan to another: entities added, removed or with
+    changed attributes, and findings added, removed or changed
+
+    Computed in the database from the two scans' entity and finding sets,
+    so the cost follows the size of the change. Changes are paged by
+    `cursor`; the first page also carries the count per kind of change.
+    """
+    try:
+        before = await _load_scan(db, scan_id)
+        after = await _load_scan(db, other_scan_id)
+        diff = ScanDiff(before.id, after.id)
+        changes, next_cursor = await diff.page(db, limit, cursor)
+        return ORJSONResponse({
+            "scan_id": before.id,
+            "other_scan_id": after.id,
+            "summary": None if cursor else await diff.summary(db),
+            "changes": changes,
+            "next_cursor": next_cursor,
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error diffing scans {scan_id} and {other_scan_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to diff scans: {str(e)}"
+        )
+
+
+def _ndjson_line(kind: str, data: dict) -> bytes:
+    """Encode one NDJSON record"""
+    return orjson.dumps({"kind": kind, **data}, option=orjson.OPT_APPEND_NEWLINE)
+
+
+@router.get("/{scan_id}/stream")
+async def stream_scan(
+    scan_id: int,
+    include: Optional[str] = Query(
+        "metadata",
+        description="Comma-separated heavy fields to include: metadata, raw_result",
+    ),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Stream a scan as NDJSON: one scan record, then every entity and finding
+
+    Rows are read from a server-side cursor and written as they arrive, so
+    memory use does not grow with the size of the scan.
+    """
+    fields = _parse_include(include)
+    scan = await _load_scan(db, scan_id)
+    summary = _scan_summary(scan)
+
+    async def generate():
+        # The request-scoped session may be closed before the body is sent
+        async with ReadSessionLocal() as session:
+            yield _ndjson_line("scan", summary)
+            for kind, query in (
+                ("entity", _entity_query(scan_id, fields).order_by(Entity.id)),
+                ("finding", _finding_query(scan_id, fields).order_by(Finding.id)),
+            ):
+                result = await session.stream(
+                    query.execution_options(yield_per=STREAM_BATCH_SIZE)
+                )
+                async for partition in result.partitions():
+                    rows = [_row_dict(row) for row in partition]
+                    if kind == "entity" and "metadata" in fields:
+                        rows = await hydrate_metadata(session, rows)
+                    if kind == "finding" and "raw_result" in fields:
+                        rows = await hydrate_raw_results(rows)
+                    for row in rows:
+                        yield _ndjson_line(kind, row)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.websocket("/{scan_id}/ws")
+async def scan_websocket(websocket: WebSocket, scan_id: int):
+    """
+    WebSocket endpoint for real-time scan updates
+
+    Sends a snapshot of the scan's progress first, then every progress
+    event published by the worker, and closes after the scan completes or
+    fails. Everything is served from Redis; the database is not queried.
+    """
+    await websocket.accept()
+    # Subscribe before reading the snapshot so no event falls in between
+    try:
+        queue = await scan_events.subscribe(scan_id)
+    except Exception as e:
+        logger.error(f"Cannot subscribe to events of scan {scan_id}: {e}")
+        await websocket.close(code=1011)
+        return
+    
+    async def drain_client():
+        # Returns once the client disconnects
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+    
+    async def forward_events():
+        snapshot = await get_scan_snapshot(scan_id)
+        # Text frames: browsers hand binary ones to onmessage as Blobs
+        await websocket.send_text(orjson.dumps(snapshot).decode())
+        scan_state = snapshot.get("scan") or {}
+        if scan_state.get("event") in TERMINAL_EVENTS:
+            return
+        while True:
+            payload = await queue.get()
+            await websocket.send_text(payload.decode())
+            if orjson.loads(payload).get("event") in TERMINAL_EVENTS:
+                return
+    
+    client_task = asyncio.create_task(drain_client())
+    events_task = asyncio.create_task(forward_events())
+    try:
+        done, pending = await asyncio.wait(
+            {client_task, events_task}, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in pending:
+            task.cancel()
+        if events_task in done:
+            if events_task.exception():
+                logger.warning(f"Scan {scan_id} event stream failed: {events_task.exception()}")
+            await websocket.close()
+    except Exception as e:
+        logger.warning(f"Scan {scan_id} websocket closed with error: {e}")
+    finally:
+        await scan_events.unsubscribe(scan_id, queue)
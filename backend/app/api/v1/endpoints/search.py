@@ -2,10 +2,12 @@
 Search endpoints
 """
 from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
-from app.db.database import get_db
+from sqlalchemy import select, func, literal, cast, union_all, and_, or_, Float
+from app.db.database import get_read_db
+from app.db.pagination import encode_cursor, decode_cursor
 from app.models.entity import Entity
 from app.models.scan import Scan
 import logging
@@ -15,82 +17,146 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _substring_pattern(q: str) -> str:
+    """Build an ILIKE pattern matching q anywhere, with LIKE wildcards escaped"""
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _rank_expression(column, q: str, dialect: str):
+    """
+    Relevance of a substring match
+
+    On PostgreSQL this is pg_trgm similarity(). Other databases (SQLite in
+    tests) fall back to the share of the value covered by the query, which
+    orders exact matches first and long values containing q last.
+    """
+    if dialect == "postgresql":
+        return func.similarity(column, q)
+    return literal(float(len(q))) / cast(func.length(column), Float)
+
+
 @router.get("")
 async def search(
-    q: str = Query(..., description="Search query"),
+    q: str = Query(..., min_length=1, description="Search query"),
     limit: Optional[int] = Query(10, ge=1, le=100),
-    offset: Optional[int] = Query(0, ge=0),
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Search entities and scans"""
+    """Search entities and scans, ranked by relevance"""
     try:
-        search_term = f"%{q.lower()}%"
-        
-        # Search entities
-        entities_result = await db.execute(
-            select(Entity)
-            .where(Entity.canonical_value.ilike(search_term))
-            .limit(limit)
-            .offset(offset)
+        dialect = db.bind.dialect.name
+        pattern = _substring_pattern(q)
+
+        # Both ILIKE filters are served by the trigram GIN indexes on PostgreSQL
+        entity_matches = select(
+            literal("entity").label("kind"),
+            Entity.id.label("id"),
+            _rank_expression(Entity.canonical_value, q, dialect).label("rank"),
+        ).where(Entity.canonical_value.ilike(pattern, escape="\\"))
+
+        scan_matches = select(
+            literal("scan").label("kind"),
+            Scan.id.label("id"),
+            _rank_expression(Scan.target, q, dialect).label("rank"),
+        ).where(Scan.target.ilike(pattern, escape="\\"))
+
+        ranked = union_all(entity_matches, scan_matches).subquery("ranked")
+
+        total = (
+            await db.execute(select(func.count()).select_from(ranked))
+        ).scalar_one()
+
+        # Keyset over (rank DESC, kind, id) instead of OFFSET
+        page_query = (
+            select(ranked.c.kind, ranked.c.id, ranked.c.rank)
+            .order_by(ranked.c.rank.desc(), ranked.c.kind, ranked.c.id)
+            .limit(limit + 1)
         )
-        entities = entities_result.scalars().all()
-        
-        # Search scans
-        scans_result = await db.execute(
-            select(Scan)
-            .where(Scan.target.ilike(search_term))
-            .limit(limit)
-            .offset(offset)
-        )
-        scans = scans_result.scalars().all()
-        
-        # Combine results
+        after = decode_cursor(cursor, 3)
+        if after:
+            rank, kind, last_id = after
+            if (
+                isinstance(rank, bool) or not isinstance(rank, (int, float))
+                or kind not in ("entity", "scan")
+                or isinstance(last_id, bool) or not isinstance(last_id, int)
+            ):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            page_query = page_query.where(
+                or_(
+                    ranked.c.rank < rank,
+                    and_(ranked.c.rank == rank, ranked.c.kind > kind),
+                    and_(ranked.c.rank == rank, ranked.c.kind == kind, ranked.c.id > last_id),
+                )
+            )
+        page = (await db.execute(page_query)).all()
+
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_cursor(page[-1].rank, page[-1].kind, page[-1].id)
+
+        # Hydrate only the rows on this page
+        entity_ids = [row.id for row in page if row.kind == "entity"]
+        scan_ids = [row.id for row in page if row.kind == "scan"]
+
+        entities = {}
+        if entity_ids:
+            entities_result = await db.execute(
+                select(
+                    Entity.id, Entity.canonical_value, Entity.type,
+                    Entity.scan_id, Entity.first_seen,
+                ).where(Entity.id.in_(entity_ids))
+            )
+            entities = {e.id: e for e in entities_result.all()}
+
+        scans = {}
+        if scan_ids:
+            scans_result = await db.execute(
+                select(
+                    Scan.id, Scan.target, Scan.type, Scan.status, Scan.created_at,
+                ).where(Scan.id.in_(scan_ids))
+            )
+            scans = {s.id: s for s in scans_result.all()}
+
+        # Combine results in rank order
         results = []
-        
-        # Add entities
-        for entity in entities:
-            results.append({
-                "type": "entity",
-                "id": entity.id,
-                "value": entity.canonical_value,
-                "entity_type": entity.type.value,
-                "scan_id": entity.scan_id,
-                "first_seen": entity.first_seen,
-            })
-        
-        # Add scans
-        for scan in scans:
-            results.append({
-                "type": "scan",
-                "id": scan.id,
-                "target": scan.target,
-                "scan_type": scan.type.value,
-                "status": scan.status.value,
-                "created_at": scan.created_at,
-            })
-        
-        return {
+        for row in page:
+            if row.kind == "entity" and row.id in entities:
+                entity = entities[row.id]
+                results.append({
+                    "type": "entity",
+                    "id": entity.id,
+                    "value": entity.canonical_value,
+                    "entity_type": entity.type.value,
+                    "scan_id": entity.scan_id,
+                    "first_seen": entity.first_seen,
+                    "score": row.rank,
+                })
+            elif row.kind == "scan" and row.id in scans:
+                scan = scans[row.id]
+                results.append({
+                    "type": "scan",
+                    "id": scan.id,
+                    "target": scan.target,
+                    "scan_type": scan.type.value,
+                    "status": scan.status.value,
+                    "created_at": scan.created_at,
+                    "score": row.rank,
+                })
+
+        return ORJSONResponse({
             "query": q,
             "results": results,
-            "total": len(results),
+            "total": total,
             "limit": limit,
-            "offset": offset,
-        }
+            "next_cursor": next_cursor,
+        })
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error searching: {e}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Search failed: {str(e)}"
         )
-
-
-
-
-
-
-
-
-
-
-
-
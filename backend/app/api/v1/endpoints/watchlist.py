@@ -0,0 +1,317 @@
+"""
+Watchlist endpoints
+
+Targets on the watchlist are rescanned every `interval_seconds` by Celery
+beat (app.tasks.watchlist); each rescan records what changed since the
+previous one.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime, timezone
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.database import get_db, get_read_db
+from app.db.dialect import insert_for
+from app.db.pagination import keyset_paginate, page_results
+from app.models.entity import Entity
+from app.models.scan import ScanType
+from app.models.watchlist import WatchlistChange, WatchlistEntity, WatchlistEntry
+from app.services.watchlist import first_run_at
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Shortest accepted rescan interval (seconds)
+MIN_INTERVAL_SECONDS = 300
+
+# Entries accepted per bulk request
+BULK_MAX_ENTRIES = 1000
+
+
+class WatchlistRequest(BaseModel):
+    """Watchlist entry to create"""
+    target: str
+    type: str = "domain"  # domain, email, ip, handle
+    modules: Optional[List[str]] = None
+    interval_seconds: Optional[int] = Field(None, ge=MIN_INTERVAL_SECONDS)
+    enabled: bool = True
+    run_now: bool = False  # first run at the next tick instead of a random point of the interval
+
+
+class WatchlistUpdate(BaseModel):
+    """Fields of a watchlist entry to change"""
+    modules: Optional[List[str]] = None
+    interval_seconds: Optional[int] = Field(None, ge=MIN_INTERVAL_SECONDS)
+    enabled: Optional[bool] = None
+
+
+class WatchlistBulkRequest(BaseModel):
+    """Entries to create, or update when their target is already watched"""
+    entries: List[WatchlistRequest] = Field(..., max_length=BULK_MAX_ENTRIES)
+
+
+def _scan_type(value: str) -> ScanType:
+    try:
+        return ScanType(value.lower())
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid scan type: {value}. Must be one of: domain, email, ip, handle"
+        )
+
+
+def _entry_dict(entry: WatchlistEntry) -> dict:
+    return {
+        "id": entry.id,
+        "target": entry.target,
+        "type": entry.type.value,
+        "modules": entry.modules or [],
+        "interval_seconds": entry.interval_seconds,
+        "enabled": entry.enabled,
+        "next_run_at": entry.next_run_at,
+        "last_run_at": entry.last_run_at,
+        "last_scan_id": entry.last_scan_id,
+        "last_change_count": entry.last_change_count,
+        "created_at": entry.created_at,
+    }
+
+
+def _new_entry(request: WatchlistRequest, now: datetime) -> dict:
+    """Column values of a new entry, its first run spread over the interval"""
+    interval = request.interval_seconds or settings.WATCHLIST_DEFAULT_INTERVAL
+    return {
+        "target": request.target,
+        "type": _scan_type(request.type),
+        "modules": request.modules or [],
+        "interval_seconds": interval,
+        "enabled": request.enabled,
+        "next_run_at": now if request.run_now else first_run_at(interval, now),
+    }
+
+
+async def _load_entry(db: AsyncSession, entry_id: int) -> WatchlistEntry:
+    """Fetch a watchlist entry or raise 404"""
+    result = await db.execute(select(WatchlistEntry).where(WatchlistEntry.id == entry_id))
+    entry = result.scalar_one_or_none()
+    if not entry:
+        raise HTTPException(status_code=404, detail="Watchlist entry not found")
+    return entry
+
+
+@router.post("")
+async def create_entry(request: WatchlistRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Add a target to the watchlist
+
+    - **interval_seconds**: Time between rescans (default WATCHLIST_DEFAULT_INTERVAL)
+    - **run_now**: Scan at the next tick; otherwise the first scan happens
+      at a random point of the first interval
+    """
+    try:
+        values = _new_entry(request, datetime.now(timezone.utc))
+        existing = await db.execute(
+            select(WatchlistEntry.id).where(WatchlistEntry.target == request.target)
+        )
+        if existing.scalar_one_or_none() is not None:
+            raise HTTPException(status_code=409, detail=f"{request.target} is already on the watchlist")
+
+        entry = WatchlistEntry(**values)
+        db.add(entry)
+        await db.commit()
+        await db.refresh(entry)
+        return ORJSONResponse(_entry_dict(entry), status_code=201)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error creating watchlist entry: {e}", exc_info=True)
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to create watchlist entry: {str(e)}"
+        )
+
+
+@router.post("/bulk")
+async def bulk_upsert_entries(request: WatchlistBulkRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Add or update many targets at once
+
+    Targets already watched get the given type, modules, interval and
+    enabled flag but keep their schedule.
+    """
+    try:
+        now = datetime.now(timezone.utc)
+        rows = {entry.target: _new_entry(entry, now) for entry in request.entries}
+        known = set((await db.execute(
+            select(WatchlistEntry.target).where(WatchlistEntry.target.in_(rows))
+        )).scalars())
+
+        insert = insert_for(db)
+        statement = insert(WatchlistEntry).values(list(rows.values()))
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[WatchlistEntry.target],
+                set_={
+                    column: statement.excluded[column]
+                    for column in ("type", "modules", "interval_seconds", "enabled")
+                },
+            )
+        )
+        await db.commit()
+        return {"created": len(rows.keys() - known), "updated": len(known)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error importing watchlist entries: {e}", exc_info=True)
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to import watchlist entries: {str(e)}"
+        )
+
+
+@router.get("")
+async def list_entries(
+    enabled: Optional[bool] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    List watchlist entries in creation order
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    try:
+        query = select(WatchlistEntry)
+        if enabled is not None:
+            query = query.where(WatchlistEntry.enabled.is_(enabled))
+        result = await db.execute(
+            keyset_paginate(query, (WatchlistEntry.id,), cursor, limit, descending=False)
+        )
+        entries, next_cursor = page_results(result.scalars().all(), limit, lambda e: (e.id,))
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+
+        return ORJSONResponse([_entry_dict(entry) for entry in entries], headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing watchlist: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to list watchlist: {str(e)}"
+        )
+
+
+@router.get("/{entry_id}")
+async def get_entry(entry_id: int, db: AsyncSession = Depends(get_read_db)):
+    """Get a watchlist entry and its schedule"""
+    try:
+        return ORJSONResponse(_entry_dict(await _load_entry(db, entry_id)))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving watchlist entry {entry_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve watchlist entry: {str(e)}"
+        )
+
+
+@router.patch("/{entry_id}")
+async def update_entry(entry_id: int, request: WatchlistUpdate, db: AsyncSession = Depends(get_db)):
+    """
+    Change the modules, interval or enabled flag of an entry
+
+    A new interval reschedules the next run within it.
+    """
+    try:
+        entry = await _load_entry(db, entry_id)
+        if request.modules is not None:
+            entry.modules = request.modules
+        if request.enabled is not None:
+            entry.enabled = request.enabled
+        if request.interval_seconds is not None and request.interval_seconds != entry.interval_seconds:
+            entry.interval_seconds = request.interval_seconds
+            entry.next_run_at = first_run_at(request.interval_seconds, datetime.now(timezone.utc))
+        await db.commit()
+        await db.refresh(entry)
+        return ORJSONResponse(_entry_dict(entry))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating watchlist entry {entry_id}: {e}", exc_info=True)
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to update watchlist entry: {str(e)}"
+        )
+
+
+@router.delete("/{entry_id}", status_code=204)
+async def delete_entry(entry_id: int, db: AsyncSession = Depends(get_db)):
+    """Remove a target from the watchlist, with its recorded changes"""
+    try:
+        entry = await _load_entry(db, entry_id)
+        for table in (WatchlistChange, WatchlistEntity):
+            await db.execute(delete(table).where(table.watchlist_id == entry.id))
+        await db.delete(entry)
+        await db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error deleting watchlist entry {entry_id}: {e}", exc_info=True)
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to delete watchlist entry: {str(e)}"
+        )
+
+
+@router.get("/{entry_id}/changes")
+async def list_changes(
+    entry_id: int,
+    scan_id: Optional[int] = Query(None, description="Only the changes of this rescan"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Changes recorded by the rescans of an entry, newest first
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
+    try:
+        await _load_entry(db, entry_id)
+        query = (
+            select(
+                WatchlistChange.id, WatchlistChange.scan_id, WatchlistChange.kind,
+                WatchlistChange.entity_id, WatchlistChange.finding_id, WatchlistChange.created_at,
+                Entity.type.label("entity_type"), Entity.canonical_value,
+            )
+            .join(Entity, Entity.id == WatchlistChange.entity_id)
+            .where(WatchlistChange.watchlist_id == entry_id)
+        )
+        if scan_id is not None:
+            query = query.where(WatchlistChange.scan_id == scan_id)
+        result = await db.execute(keyset_paginate(query, (WatchlistChange.id,), cursor, limit))
+        changes, next_cursor = page_results(result.mappings().all(), limit, lambda c: (c["id"],))
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+
+        return ORJSONResponse(
+            [{**change, "entity_type": change["entity_type"].value} for change in changes],
+            headers=headers,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error listing changes of watchlist entry {entry_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to list watchlist changes: {str(e)}"
+        )
@@ -0,0 +1,111 @@
+"""
+Command line tools
+
+Usage:
+    python -m app.cli export findings --format parquet --output findings.parquet \
+        --scan-id 12 --scan-id 13 --since 2026-01-01 --source ssl
+    python -m app.cli import inventory.csv.gz
+    python -m app.cli import findings.ndjson --background
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+import orjson
+
+from app.db.database import AsyncSessionLocal, ReadSessionLocal
+from app.services.export import (
+    EXPORT_FORMATS, EXPORT_KINDS, ExportFilters, check_entity_types, check_format, export_rows,
+    parse_include,
+)
+from app.services.importer import (
+    IMPORT_FORMATS, ImportReport, detect_format, import_stream, open_input,
+)
+
+
+async def _export(args: argparse.Namespace) -> None:
+    filters = ExportFilters(
+        scan_ids=args.scan_id,
+        since=args.since,
+        until=args.until,
+        entity_types=args.entity_type,
+        sources=args.source,
+    )
+    out = open(args.output, "wb") if args.output != "-" else sys.stdout.buffer
+    try:
+        async with ReadSessionLocal() as session:
+            async for chunk in export_rows(session, args.kind, args.format, filters, args.fields):
+                out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+
+def _print_progress(report: ImportReport) -> None:
+    print(
+        f"{report.rows_read} rows read, {report.rows_rejected} rejected, "
+        f"{report.findings_created} findings created ({report.rows_per_second:.0f} rows/s)",
+        file=sys.stderr,
+    )
+
+
+async def _import(args: argparse.Namespace) -> ImportReport:
+    async with AsyncSessionLocal() as db:
+        with open_input(args.path) as stream:
+            return await import_stream(db, stream, args.format, on_progress=_print_progress)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Stream entities or findings to a file")
+    export.add_argument("kind", choices=EXPORT_KINDS)
+    export.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    export.add_argument("--output", "-o", default="-", help="Output file (default: stdout)")
+    export.add_argument("--scan-id", type=int, action="append", default=[])
+    export.add_argument("--since", type=datetime.fromisoformat)
+    export.add_argument("--until", type=datetime.fromisoformat)
+    export.add_argument("--entity-type", action="append", default=[])
+    export.add_argument("--source", action="append", default=[])
+    export.add_argument("--include", default="", help="metadata (entities), raw_result (findings)")
+
+    load = commands.add_parser("import", help="Load entities and findings from CSV or NDJSON")
+    load.add_argument("path", help="Input file (.csv, .ndjson or .jsonl, optionally .gz)")
+    load.add_argument("--format", choices=IMPORT_FORMATS, help="Default: from the file name")
+    load.add_argument(
+        "--background", action="store_true",
+        help="Queue the import on a Celery worker (the path must be readable there)",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        try:
+            check_format(args.format)
+            check_entity_types(args.entity_type)
+            args.fields = parse_include(args.kind, args.include)
+        except ValueError as e:
+            parser.error(str(e))
+        asyncio.run(_export(args))
+    elif args.command == "import":
+        try:
+            args.format = args.format or detect_format(args.path)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.background:
+            from app.tasks.imports import import_file_task
+            task = import_file_task.delay(os.path.abspath(args.path), args.format)
+            print(f"Queued import task {task.id}")
+            return 0
+        report = asyncio.run(_import(args))
+        for error in report.errors:
+            print(error, file=sys.stderr)
+        print(orjson.dumps(report.as_dict(), option=orjson.OPT_INDENT_2).decode())
+        return 1 if report.rows_rejected else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+Prometheus metrics
+
+Every label takes its values from a small fixed set (module names, status
+classes, SQL verbs, ...) so series counts stay bounded; free-form values
+such as import sources are folded into "other".
+
+The API serves the metrics at /metrics. Celery workers start their own
+exporter on METRICS_WORKER_PORT. With several processes per service
+(gunicorn workers, the Celery prefork pool), set PROMETHEUS_MULTIPROC_DIR
+to a shared empty directory so every process's samples are aggregated.
+"""
+import os
+import time
+from typing import Iterable, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY,
+    generate_latest, start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Label values accepted as is; anything else is reported as "other"
+MODULES = ("whois", "ssl", "mx", "mail_auth", "hibp", "import")
+UPSTREAMS = ("crtsh", "hibp", "dns", "ollama", "openai")
+SQL_OPERATIONS = ("select", "insert", "update", "delete")
+
+# Scans produce from a handful to tens of thousands of entities
+SCAN_SIZE_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+MODULE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+LLM_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+MODULE_DURATION = Histogram(
+    "osint_module_duration_seconds",
+    "Wall time of one OSINT module run within a scan",
+    ["module", "outcome"],
+    buckets=MODULE_BUCKETS,
+)
+UPSTREAM_RESPONSES = Counter(
+    "osint_upstream_responses_total",
+    "Responses from upstream services by status class (or timeout/error)",
+    ["upstream", "status"],
+)
+ENTITIES_WRITTEN = Counter(
+    "osint_entities_written_total",
+    "Entities created or refreshed",
+    ["module"],
+)
+FINDINGS_WRITTEN = Counter(
+    "osint_findings_written_total",
+    "Findings recorded (new findings and observations of known ones)",
+    ["module"],
+)
+SCAN_ENTITIES = Histogram(
+    "osint_scan_entities",
+    "Entities written per scan",
+    buckets=SCAN_SIZE_BUCKETS,
+)
+SCAN_FINDINGS = Histogram(
+    "osint_scan_findings",
+    "Findings written per scan",
+    buckets=SCAN_SIZE_BUCKETS,
+)
+DB_QUERY_DURATION = Histogram(
+    "osint_db_query_duration_seconds",
+    "Duration of SQL statements (the count is the number of queries)",
+    ["engine", "operation"],
+    buckets=DB_BUCKETS,
+)
+LLM_DURATION = Histogram(
+    "osint_llm_request_duration_seconds",
+    "Latency of LLM backend calls",
+    ["backend", "operation", "outcome"],
+    buckets=LLM_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "osint_llm_tokens_total",
+    "Tokens processed by LLM backends",
+    ["backend", "kind"],
+)
+
+
+def bounded(value: Optional[str], allowed: Iterable[str]) -> str:
+    """`value` if it is an expected label value, else "other" """
+    return value if value in allowed else "other"
+
+
+def status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+def record_upstream(upstream: str, status: str) -> None:
+    """Count one upstream response: a status class, "timeout" or "error" """
+    UPSTREAM_RESPONSES.labels(upstream=bounded(upstream, UPSTREAMS), status=status).inc()
+
+
+def record_module(module: str, outcome: str, started: float) -> None:
+    """Observe a module run that began at time.perf_counter() `started`"""
+    MODULE_DURATION.labels(module=bounded(module, MODULES), outcome=outcome).observe(
+        time.perf_counter() - started
+    )
+
+
+def record_written(module: str, entities: int = 0, findings: int = 0) -> None:
+    module = bounded(module, MODULES)
+    if entities:
+        ENTITIES_WRITTEN.labels(module=module).inc(entities)
+    if findings:
+        FINDINGS_WRITTEN.labels(module=module).inc(findings)
+
+
+def record_llm_tokens(backend: str, prompt: Optional[int], completion: Optional[int]) -> None:
+    if prompt:
+        LLM_TOKENS.labels(backend=backend, kind="prompt").inc(prompt)
+    if completion:
+        LLM_TOKENS.labels(backend=backend, kind="completion").inc(completion)
+
+
+def sql_operation(statement: str) -> str:
+    """Bounded label for a SQL statement: its verb, or "other\""""
+    verb = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    return bounded(verb, SQL_OPERATIONS)
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Time every statement executed by an (async) engine"""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+    histograms = {
+        op: DB_QUERY_DURATION.labels(engine=name, operation=op)
+        for op in SQL_OPERATIONS + ("other",)
+    }
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        histograms[sql_operation(statement)].observe(time.perf_counter() - started)
+
+
+class _ScrapeTimeCollector:
+    """Gauges read when scraped: Celery queue depth and DB pool occupancy"""
+
+    def collect(self):
+        depth = GaugeMetricFamily(
+            "osint_celery_queue_depth", "Tasks waiting in a Celery queue", labels=["queue"]
+        )
+        for queue, length in _queue_depths():
+            depth.add_metric([queue], length)
+        yield depth
+
+        from app.db.database import engine, read_engine
+        from app.db.pool import pool_status
+
+        pool = GaugeMetricFamily(
+            "osint_db_pool_connections", "Connections of the DB pool", labels=["engine", "state"]
+        )
+        engines = [("primary", engine)] + ([("replica", read_engine)] if read_engine is not engine else [])
+        for name, eng in engines:
+            status = pool_status(eng)
+            for state in ("checked_out", "checked_in", "overflow"):
+                if state in status:
+                    pool.add_metric([name, state], status[state])
+        yield pool
+
+
+def _queue_depths() -> Iterable[Tuple[str, int]]:
+    """Length of each Celery queue in the Redis broker (empty if unreachable)"""
+    import redis
+
+    queues = [q.strip() for q in settings.METRICS_CELERY_QUEUES.split(",") if q.strip()]
+    try:
+        with redis.Redis.from_url(
+            settings.CELERY_BROKER_URL,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            socket_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        ) as client, client.pipeline() as pipe:
+            for queue in queues:
+                pipe.llen(queue)
+            lengths = pipe.execute()
+        return list(zip(queues, lengths))
+    except Exception as e:
+        logger.warning(f"Cannot read Celery queue depth: {e}")
+        return []
+
+
+def _registry() -> CollectorRegistry:
+    """Registry to expose: per process, or aggregated in multiprocess mode"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+_api_registry: Optional[CollectorRegistry] = None
+
+
+def api_metrics() -> Tuple[bytes, str]:
+    """Body and content type of the API's /metrics"""
+    global _api_registry
+    if _api_registry is None:
+        _api_registry = _registry()
+        _api_registry.register(_ScrapeTimeCollector())
+    return generate_latest(_api_registry), CONTENT_TYPE_LATEST
+
+
+def start_worker_exporter() -> None:
+    """Serve a Celery worker's metrics on METRICS_WORKER_PORT"""
+    try:
+        start_http_server(settings.METRICS_WORKER_PORT, registry=_registry())
+        logger.info(f"Metrics exporter listening on :{settings.METRICS_WORKER_PORT}")
+    except OSError as e:
+        logger.warning(f"Metrics exporter not started: {e}")
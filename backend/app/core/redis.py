@@ -0,0 +1,32 @@
+"""
+Shared async Redis client
+"""
+import asyncio
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+_client: Optional[aioredis.Redis] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_redis() -> aioredis.Redis:
+    """
+    Return the Redis client for the running event loop
+
+    Celery tasks run each scan under a fresh asyncio.run() loop, and an
+    asyncio Redis connection cannot be reused across loops, so the client is
+    rebuilt whenever the loop changes.
+    """
+    global _client, _loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _loop is not loop:
+        _client = aioredis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            socket_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        )
+        _loop = loop
+    return _client
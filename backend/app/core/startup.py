@@ -0,0 +1,134 @@
+"""
+Startup profiling
+
+With STARTUP_PROFILE=true, a process start (API or Celery worker) records
+how long importing each component and each initialization step took, logs
+the report once startup is over, and the API serves it at
+/api/v1/health/startup.
+
+Imports are timed by wrapping builtins.__import__ until startup finishes.
+Each module's own import time (its nested imports excluded) is charged to
+its component: the top-level package, or the subpackage for app.*.
+
+Only the standard library is used here, so this module can be imported
+before everything it measures.
+"""
+import builtins
+import importlib.util
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Read from the environment directly: settings are part of what is measured
+ENABLED = os.getenv("STARTUP_PROFILE", "false").lower() == "true"
+
+# Components listed in the logged report
+REPORT_TOP = 15
+
+
+def component(module: str) -> str:
+    """Component an imported module is charged to"""
+    parts = module.split(".")
+    return ".".join(parts[:2]) if parts[0] == "app" and len(parts) > 1 else parts[0]
+
+
+class StartupProfile:
+    """Import and initialization times of one process start"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.imports: Dict[str, float] = {}
+        self.phases: List[tuple] = []
+        self._children: List[float] = []
+        self._original_import = None
+
+    def install(self) -> None:
+        """Start timing imports"""
+        if self._original_import is not None:
+            return
+        original = self._original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            module = self._loading(name, globals, fromlist, level)
+            if module is None:
+                return original(name, globals, locals, fromlist, level)
+            started = time.perf_counter()
+            self._children.append(0.0)
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - started
+                own = elapsed - self._children.pop()
+                key = component(module)
+                self.imports[key] = self.imports.get(key, 0.0) + own
+                if self._children:
+                    self._children[-1] += elapsed
+
+        builtins.__import__ = timed_import
+
+    @staticmethod
+    def _loading(name, globals, fromlist, level) -> Optional[str]:
+        """Module an import statement is about to load, or None if all are loaded"""
+        if level:
+            try:
+                name = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                return None
+        if name not in sys.modules:
+            return name
+        for attribute in fromlist or ():
+            submodule = f"{name}.{attribute}"
+            if attribute != "*" and submodule not in sys.modules:
+                module = sys.modules[name]
+                if not hasattr(module, attribute) and hasattr(module, "__path__"):
+                    return submodule
+        return None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time an initialization step"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def finish(self) -> None:
+        """Stop timing imports and log the report"""
+        if self.finished is not None:
+            return
+        self.finished = time.perf_counter()
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+        if ENABLED:
+            report = self.report()
+            lines = [f"Startup took {report['total_ms']:.0f} ms ({report['imports_ms']:.0f} ms importing)"]
+            lines += [f"  import {c['name']}: {c['ms']:.1f} ms" for c in report["components"][:REPORT_TOP]]
+            lines += [f"  {p['name']}: {p['ms']:.1f} ms" for p in report["phases"]]
+            logger.info("\n".join(lines))
+
+    def report(self) -> Dict[str, Any]:
+        """Time per imported component (slowest first) and per step"""
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return {
+            "enabled": ENABLED,
+            "total_ms": round((end - self.started) * 1000, 3),
+            "imports_ms": round(sum(self.imports.values()) * 1000, 3),
+            "components": [
+                {"name": name, "ms": round(seconds * 1000, 3)}
+                for name, seconds in sorted(self.imports.items(), key=lambda item: -item[1])
+            ],
+            "phases": [{"name": name, "ms": round(seconds * 1000, 3)} for name, seconds in self.phases],
+        }
+
+
+startup_profile = StartupProfile()
+if ENABLED:
+    startup_profile.install()
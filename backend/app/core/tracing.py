@@ -0,0 +1,359 @@
+"""
+Lightweight per-scan tracing
+
+A scan runs under a trace (start_trace); phases inside it open spans
+(span), which nest through a context variable. Hot, repetitive operations
+such as DB statements, entity upserts and HTTP calls are aggregated per
+parent span (count, total and max duration) instead of being kept one by
+one, so a scan writing thousands of rows still yields a timeline of a few
+kilobytes, persisted on Scan.timeline.
+
+Identifiers and attribute names follow OpenTelemetry (32/16 hex trace and
+span ids, semantic-convention keys such as db.operation or
+http.response.status_code). When TRACE_EXPORT_PATH is set, each finished
+trace is also appended there as one OTLP/JSON line, the format read by
+the OpenTelemetry Collector's otlpjsonfile receiver.
+
+A scan whose stages run as separate Celery tasks traces each stage on its
+own, under a shared trace id; combine() merges the stage timelines into
+the scan's.
+
+Outside a trace, span() and aggregate() cost one context variable lookup.
+"""
+import functools
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import sql_operation
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """One timed phase of a trace"""
+    __slots__ = ("trace", "index", "parent", "span_id", "name", "attributes",
+                 "start", "end", "status")
+
+    def __init__(self, trace: "Trace", index: int, parent: Optional["Span"], name: str,
+                 attributes: Dict[str, Any]):
+        self.trace = trace
+        self.index = index
+        self.parent = parent
+        self.span_id = secrets.token_hex(8)
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+
+class Trace:
+    """Spans and aggregates of one traced operation (a scan)"""
+
+    def __init__(self, max_spans: int, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.started_at = datetime.now(timezone.utc)
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        # (parent span index, name) -> [count, total seconds, max seconds]
+        self.aggregates: Dict[tuple, List[float]] = {}
+        self.dropped = 0
+
+    @property
+    def origin(self) -> float:
+        return self.spans[0].start
+
+    def _ms(self, seconds: float) -> float:
+        return round(seconds * 1000, 3)
+
+    def timeline(self) -> Dict[str, Any]:
+        """Compact JSON form persisted on the scan"""
+        root = self.spans[0]
+        end = root.end if root.end is not None else time.perf_counter()
+        spans = []
+        for s in self.spans:
+            entry = {
+                "id": s.index,
+                "parent": s.parent.index if s.parent is not None else None,
+                "name": s.name,
+                "start_ms": self._ms(s.start - self.origin),
+                "duration_ms": self._ms((s.end if s.end is not None else end) - s.start),
+            }
+            if s.status != "ok":
+                entry["status"] = s.status
+            if s.attributes:
+                entry["attributes"] = s.attributes
+            spans.append(entry)
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self._ms(end - root.start),
+            "spans": spans,
+            "aggregates": [
+                {
+                    "parent": parent,
+                    "name": name,
+                    "count": int(count),
+                    "total_ms": self._ms(total),
+                    "max_ms": self._ms(longest),
+                }
+                for (parent, name), (count, total, longest) in self.aggregates.items()
+            ],
+            "dropped_spans": self.dropped,
+        }
+
+    def otlp(self) -> Dict[str, Any]:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest"""
+        origin_ns = int(self.started_at.timestamp() * 1e9)
+
+        def ns(t: float) -> str:
+            return str(origin_ns + int((t - self.origin) * 1e9))
+
+        def attributes(values: Dict[str, Any]) -> List[Dict]:
+            out = []
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    typed = {"boolValue": value}
+                elif isinstance(value, int):
+                    typed = {"intValue": str(value)}
+                elif isinstance(value, float):
+                    typed = {"doubleValue": value}
+                else:
+                    typed = {"stringValue": str(value)}
+                out.append({"key": key, "value": typed})
+            return out
+
+        aggregated: Dict[int, Dict[str, Any]] = {}
+        for (parent, name), (count, total, longest) in self.aggregates.items():
+            values = aggregated.setdefault(parent, {})
+            values[f"osint.{name}.count"] = int(count)
+            values[f"osint.{name}.total_ms"] = self._ms(total)
+
+        end = self.spans[0].end or time.perf_counter()
+        spans = [{
+            "traceId": self.trace_id,
+            "spanId": s.span_id,
+            "parentSpanId": s.parent.span_id if s.parent is not None else "",
+            "name": s.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": ns(s.start),
+            "endTimeUnixNano": ns(s.end if s.end is not None else end),
+            "attributes": attributes({**s.attributes, **aggregated.get(s.index, {})}),
+            "status": {"code": 2 if s.status == "error" else 1},
+        } for s in self.spans]
+        return {"resourceSpans": [{
+            "resource": {"attributes": attributes({"service.name": "osint-kit"})},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+        }]}
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def _open(trace: Trace, parent: Optional[Span], name: str, attributes: Dict[str, Any]) -> Span:
+    span_ = Span(trace, len(trace.spans), parent, name, attributes)
+    trace.spans.append(span_)
+    return span_
+
+
+@contextmanager
+def start_trace(name: str, trace_id: Optional[str] = None, **attributes: Any) -> Iterator[Trace]:
+    """
+    Trace everything run inside the block under a root span `name`
+
+    Pass the `trace_id` of an earlier part to continue the same trace.
+    """
+    trace = Trace(settings.TRACE_MAX_SPANS, trace_id)
+    root = _open(trace, None, name, attributes)
+    token = _current.set(root)
+    try:
+        yield trace
+    except BaseException:
+        root.status = "error"
+        raise
+    finally:
+        root.end = time.perf_counter()
+        _current.reset(token)
+        _export(trace)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time a phase as a child of the current span (no-op outside a trace)"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    trace = parent.trace
+    if len(trace.spans) >= trace.max_spans:
+        # Over budget: keep the timing, as an aggregate
+        trace.dropped += 1
+        with aggregate(name):
+            yield None
+        return
+    child = _open(trace, parent, name, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException:
+        child.status = "error"
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current.reset(token)
+
+
+def record(name: str, seconds: float) -> None:
+    """Add one occurrence of `name` to the current span's aggregates"""
+    parent = _current.get()
+    if parent is None:
+        return
+    entry = parent.trace.aggregates.setdefault((parent.index, name), [0, 0.0, 0.0])
+    entry[0] += 1
+    entry[1] += seconds
+    entry[2] = max(entry[2], seconds)
+
+
+@contextmanager
+def aggregate(name: str) -> Iterator[None]:
+    """Time a repetitive operation into the current span's aggregates"""
+    if _current.get() is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def aggregated(name: str):
+    """Decorator timing every call of a coroutine function with aggregate()"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with aggregate(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_engine(engine) -> None:
+    """Aggregate the SQL statements an (async) engine runs inside a trace"""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("trace_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["trace_start"].pop()
+        if _current.get() is not None:
+            record(f"db.{sql_operation(statement)}", time.perf_counter() - started)
+
+
+def combine(name: str, timelines: List[Optional[Dict[str, Any]]], **attributes: Any) -> Optional[Dict[str, Any]]:
+    """
+    Merge the timelines of a trace's parts under a new root span `name`
+
+    Parts may come from different processes, so they are placed by their
+    wall-clock start; each part's root becomes a child of the new root.
+    """
+    parts = [t for t in timelines if t and t.get("spans")]
+    if not parts:
+        return None
+    starts = [datetime.fromisoformat(t["started_at"]) for t in parts]
+    origin = min(starts)
+    offsets = [(start - origin).total_seconds() * 1000 for start in starts]
+    duration = max(offset + t["duration_ms"] for offset, t in zip(offsets, parts))
+
+    root = {"id": 0, "parent": None, "name": name, "start_ms": 0.0, "duration_ms": round(duration, 3)}
+    if attributes:
+        root["attributes"] = attributes
+    spans, aggregates = [root], []
+    for offset, part in zip(offsets, parts):
+        base = len(spans)
+        spans += [
+            {
+                **s,
+                "id": base + s["id"],
+                "parent": 0 if s["parent"] is None else base + s["parent"],
+                "start_ms": round(s["start_ms"] + offset, 3),
+            }
+            for s in part["spans"]
+        ]
+        aggregates += [{**a, "parent": base + a["parent"]} for a in part.get("aggregates", [])]
+    return {
+        "trace_id": parts[0]["trace_id"],
+        "started_at": origin.isoformat(),
+        "duration_ms": round(duration, 3),
+        "spans": spans,
+        "aggregates": aggregates,
+        "dropped_spans": sum(t.get("dropped_spans", 0) for t in parts),
+    }
+
+
+def waterfall(timeline: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Where the time of a persisted timeline went
+
+    Spans come in start order with their depth, their self time (duration
+    not covered by child spans), their share of the whole trace and the
+    aggregates recorded under them, slowest first.
+    """
+    if not timeline or not timeline.get("spans"):
+        return {"trace_id": None, "duration_ms": 0.0, "spans": [], "dropped_spans": 0}
+    total = timeline["duration_ms"] or 0.0
+    spans = {s["id"]: {**s, "depth": 0, "self_ms": s["duration_ms"], "aggregates": []}
+             for s in timeline["spans"]}
+    for s in timeline["spans"]:
+        # Spans are recorded after their parent, so depths resolve in one pass
+        parent = spans.get(s["parent"])
+        if parent is not None:
+            spans[s["id"]]["depth"] = parent["depth"] + 1
+            parent["self_ms"] = round(parent["self_ms"] - s["duration_ms"], 3)
+    for entry in timeline.get("aggregates", []):
+        if entry["parent"] in spans:
+            spans[entry["parent"]]["aggregates"].append(
+                {k: v for k, v in entry.items() if k != "parent"}
+            )
+    for s in spans.values():
+        s["self_ms"] = max(s["self_ms"], 0.0)
+        s["share"] = round(s["duration_ms"] / total, 4) if total else 0.0
+        s["aggregates"].sort(key=lambda a: a["total_ms"], reverse=True)
+    return {
+        "trace_id": timeline["trace_id"],
+        "started_at": timeline.get("started_at"),
+        "duration_ms": total,
+        "spans": sorted(spans.values(), key=lambda s: (s["start_ms"], s["id"])),
+        "dropped_spans": timeline.get("dropped_spans", 0),
+    }
+
+
+def _export(trace: Trace) -> None:
+    """Append the trace to TRACE_EXPORT_PATH as one OTLP/JSON line"""
+    if not settings.TRACE_EXPORT_PATH:
+        return
+    try:
+        with open(settings.TRACE_EXPORT_PATH, "ab") as f:
+            f.write(orjson.dumps(trace.otlp(), option=orjson.OPT_APPEND_NEWLINE))
+    except OSError as e:
+        logger.warning(f"Cannot export trace {trace.trace_id}: {e}")
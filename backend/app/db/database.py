@@ -1,26 +1,100 @@
 """
 Database connection and session management
 """
+import asyncio
+from typing import Any, Coroutine, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.tracing import trace_engine
+from app.db.migrations import database_revision, migration_head
+from app.db.pool import InstrumentedQueuePool
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Values of DB_INIT_MODE
+DB_INIT_MODES = ("auto", "create_all", "skip")
+
 
-# Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
+def _create_engine(url: str):
+    """Async engine with the configured, instrumented connection pool"""
+    options = {"echo": settings.DEBUG}
+    # SQLite (tests, local tooling) keeps SQLAlchemy's default pool
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    return create_async_engine(url, **options)
+
+
+# Primary engine: every write, and reads that must see them
+engine = _create_engine(settings.DATABASE_URL)
+
+# Read engine: a replica when DATABASE_READ_URL is set, else the primary
+read_engine = (
+    _create_engine(settings.DATABASE_READ_URL)
+    if settings.DATABASE_READ_URL
+    else engine
 )
 
-# Create async session factory
+instrument_engine(engine, "primary")
+trace_engine(engine)
+if read_engine is not engine:
+    instrument_engine(read_engine, "replica")
+
+# Create async session factories
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False,
 )
 
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
 # Base class for models
 Base = declarative_base()
 
+T = TypeVar("T")
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection of the primary and read engines"""
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine under a new event loop, from a Celery task
+
+    asyncpg connections belong to the loop that opened them, and a worker
+    process runs many tasks with one asyncio.run() each: the pools are
+    emptied before the loop closes so the next task does not check out a
+    connection of a closed loop.
+    """
+    async def main() -> T:
+        try:
+            return await coro
+        finally:
+            await dispose_engines()
+
+    return asyncio.run(main())
+
 
 async def get_db() -> AsyncSession:
     """Dependency for getting database session"""
@@ -31,12 +105,47 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_read_db() -> AsyncSession:
+    """
+    Dependency for a read-only session, served by the replica if configured
+
+    Replicas may lag the primary slightly; endpoints that must see their own
+    writes should use get_db instead.
+    """
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
 async def init_db():
-    """Initialize database (create tables)"""
+    """
+    Prepare the schema, per DB_INIT_MODE
+
+    create_all is skipped in auto mode when the database is already at the
+    latest migration: Alembic owns the schema then, and inspecting every
+    table on each start only slows cold starts down.
+    """
+    mode = settings.DB_INIT_MODE
+    if mode not in DB_INIT_MODES:
+        raise ValueError(f"Invalid DB_INIT_MODE: {mode}. Must be one of: {', '.join(DB_INIT_MODES)}")
+    if mode == "skip":
+        return
+    
     async with engine.begin() as conn:
+        if mode == "auto":
+            head = migration_head()
+            if head is not None and await database_revision(conn) == head:
+                logger.info(f"Database at migration {head}, skipping create_all")
+                return
+        
         # Import all models here to ensure they're registered
-        from app.models import user, scan, entity, finding, report  # noqa
+        from app.models import user, scan, entity, attribute, edge, finding, observation, report, scan_entity, scan_module_run, watchlist  # noqa
+        
+        # Trigram search indexes depend on the pg_trgm extension
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         
         # Create all tables
         await conn.run_sync(Base.metadata.create_all)
-
@@ -0,0 +1,46 @@
+"""
+Dialect-specific statement helpers
+"""
+import hashlib
+from typing import Hashable, Iterable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def insert_for(db: AsyncSession):
+    """
+    The INSERT construct of the session's dialect
+
+    Both PostgreSQL and SQLite (tests) support ON CONFLICT through their own
+    insert(); the generic one does not.
+    """
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+def advisory_lock_key(key: Iterable[Hashable]) -> int:
+    """64-bit advisory lock id of a tuple key"""
+    name = ":".join(str(part) for part in key)
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+
+
+async def advisory_xact_locks(db: AsyncSession, keys: Iterable[tuple]) -> None:
+    """
+    Hold a PostgreSQL advisory lock per key until the transaction ends
+
+    Locks are taken in lock id order, so writers locking overlapping sets
+    cannot deadlock. SQLite (tests) serializes writers, so nothing is done.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return
+    lock_ids = sorted({advisory_lock_key(key) for key in keys})
+    if lock_ids:
+        # unnest yields the ids in array order: one round trip, still ordered
+        await db.execute(
+            text("SELECT pg_advisory_xact_lock(k) FROM unnest(CAST(:ids AS bigint[])) AS k"),
+            {"ids": lock_ids},
+        )
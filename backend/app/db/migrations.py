@@ -0,0 +1,43 @@
+"""
+Alembic revision of the code and of the database
+
+The head revision is read from the migration files themselves (their
+`revision = '...'` and `down_revision = '...'` lines) rather than through
+Alembic, which the API and workers do not otherwise need to import.
+"""
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import inspect, text
+
+VERSIONS_DIR = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+
+_REVISION = re.compile(r"^revision = ['\"]([^'\"]+)['\"]", re.MULTILINE)
+_DOWN_REVISION = re.compile(r"^down_revision = (.+)$", re.MULTILINE)
+_QUOTED = re.compile(r"['\"]([^'\"]+)['\"]")
+
+
+@lru_cache(maxsize=None)
+def migration_head(versions_dir: Path = VERSIONS_DIR) -> Optional[str]:
+    """Revision no migration revises; None without a single head"""
+    revisions, revised = set(), set()
+    for path in versions_dir.glob("*.py"):
+        source = path.read_text()
+        revision = _REVISION.search(source)
+        if revision:
+            revisions.add(revision.group(1))
+            # A merge revises several: down_revision = ('a', 'b')
+            for down_revision in _DOWN_REVISION.findall(source):
+                revised.update(_QUOTED.findall(down_revision))
+    heads = revisions - revised
+    return heads.pop() if len(heads) == 1 else None
+
+
+async def database_revision(conn) -> Optional[str]:
+    """Revision the database was migrated to, None if never migrated"""
+    has_table = await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table("alembic_version"))
+    if not has_table:
+        return None
+    return (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar_one_or_none()
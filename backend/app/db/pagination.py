@@ -0,0 +1,109 @@
+"""
+Keyset (cursor) pagination helpers
+
+Pages are selected with a row-value comparison against the sort key of the
+last row already returned, e.g. (created_at, id) < (:created_at, :id), so an
+index on the sort columns answers any page in the same time as the first.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+
+# JSON types a cursor carries a value of each column Python type as; bool is
+# excluded separately since it is an int subclass
+_CURSOR_TYPES = {datetime: (str,), int: (int,), float: (int, float), str: (str,)}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=_json_default)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises a 400 if the cursor is malformed or does not carry `size`
+    scalar values.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if any(isinstance(value, (dict, list)) for value in values):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def _coerce(column, value: Any) -> Any:
+    """
+    Turn a JSON-decoded cursor value back into the column's Python type
+
+    Raises a 400 for a value of another type, as only a crafted cursor has.
+    """
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    expected = _CURSOR_TYPES.get(python_type)
+    if expected is None:
+        return value
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if python_type is datetime:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value
+
+
+def keyset_paginate(
+    query: Select,
+    sort_columns: Sequence,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = True,
+) -> Select:
+    """
+    Apply cursor filter, ordering and limit to a query
+
+    One extra row is fetched so page_results can tell whether another page
+    follows without a COUNT.
+    """
+    after = decode_cursor(cursor, len(sort_columns))
+    if after is not None:
+        key = tuple_(*sort_columns)
+        bound = tuple_(*(_coerce(c, v) for c, v in zip(sort_columns, after)))
+        query = query.where(key < bound if descending else key > bound)
+    order = [c.desc() if descending else c.asc() for c in sort_columns]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def page_results(
+    rows: Sequence,
+    limit: int,
+    sort_key: Callable[[Any], Tuple],
+) -> Tuple[List, Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the next page"""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(*sort_key(rows[-1]))
+    return rows, None
@@ -0,0 +1,108 @@
+"""
+Time partitioning of findings and finding observations (PostgreSQL)
+
+Both tables are RANGE partitioned by month on their timestamp. Findings
+partitions are further LIST partitioned by source, so each (month, source)
+is a separate table that retention can drop or detach in O(1):
+
+    findings
+      findings_p202610            FOR VALUES FROM ('2026-10-01') TO ('2026-11-01')
+        findings_p202610_whois    FOR VALUES IN ('whois')
+        findings_p202610_ssl      FOR VALUES IN ('ssl')
+        findings_p202610_default  DEFAULT
+    finding_observations
+      finding_observations_p202610
+
+Partition names encode their bounds; app.tasks.retention relies on that.
+The helpers here only build SQL so that both the Alembic migration and the
+maintenance task can use them.
+"""
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+
+FINDINGS_TABLE = "findings"
+OBSERVATIONS_TABLE = "finding_observations"
+
+# Partition key of each time-partitioned table
+PARTITION_COLUMNS = {
+    FINDINGS_TABLE: "created_at",
+    OBSERVATIONS_TABLE: "observed_at",
+}
+
+# Sources with their own findings subpartition; others go to _default
+PARTITIONED_SOURCES = ("whois", "ssl")
+
+DEFAULT_SUBPARTITION = "default"
+
+
+def month_start(day: date) -> date:
+    """First day of the month containing `day`"""
+    return day.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    """First day of the month `count` months after `month`"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date, source: Optional[str] = None) -> str:
+    """Name of a month partition, or of its subpartition for `source`"""
+    name = f"{table}_p{month:%Y%m}"
+    return f"{name}_{source}" if source else name
+
+
+def parse_partition_name(table: str, name: str) -> Optional[Tuple[date, Optional[str]]]:
+    """(month, source) encoded in a partition name, None for foreign tables"""
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})(?:_(\w+))?", name)
+    if not match:
+        return None
+    year, month, source = match.groups()
+    return date(int(year), int(month), 1), source
+
+
+def create_month_partition_sql(table: str, month: date) -> List[str]:
+    """Statements creating one month of `table` (idempotent)"""
+    name = partition_name(table, month)
+    bounds = (
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+    )
+    if table != FINDINGS_TABLE:
+        return [f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} {bounds}"]
+
+    statements = [
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} {bounds} PARTITION BY LIST (source)"
+    ]
+    for source in PARTITIONED_SOURCES:
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table, month, source)} "
+            f"PARTITION OF {name} FOR VALUES IN ('{source}')"
+        )
+    statements.append(
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month, DEFAULT_SUBPARTITION)} "
+        f"PARTITION OF {name} DEFAULT"
+    )
+    return statements
+
+
+def months_between(first: date, last: date) -> List[date]:
+    """Every month from `first` through `last`, inclusive"""
+    months = []
+    month = month_start(first)
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+IS_PARTITIONED_SQL = "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+
+CHILD_TABLES_SQL = """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = to_regclass(:table)
+    ORDER BY child.relname
+"""
@@ -0,0 +1,110 @@
+"""
+Connection pool instrumentation
+
+The engines in app.db.database use InstrumentedQueuePool, which times how
+long each checkout waits for a connection. Together with the pool's own
+counters this tells whether requests are queueing for connections (pool
+too small, or starved by long transactions) rather than waiting on queries.
+"""
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Checkout waits kept for percentile estimates
+LATENCY_WINDOW = 1024
+
+
+class PoolStats:
+    """Checkout latency and timeout counters for one pool"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._waits: Deque[float] = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self._waits.append(wait)
+            if wait > self.max_wait:
+                self.max_wait = wait
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus p50/p95/p99 checkout wait (ms) over the recent window"""
+        with self._lock:
+            waits = sorted(self._waits)
+            checkouts, timeouts, max_wait = self.checkouts, self.timeouts, self.max_wait
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 3)
+
+        return {
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "wait_ms": {
+                "mean": round(statistics.fmean(waits) * 1000, 3) if waits else 0.0,
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(max_wait * 1000, 3),
+            },
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long each checkout waited"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+
+def pool_status(engine) -> Dict[str, Any]:
+    """Occupancy and checkout latency of an async engine's pool"""
+    pool = engine.sync_engine.pool
+    status: Dict[str, Any] = {"pool": type(pool).__name__}
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return status
+
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    status.update({
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "saturation": round(checked_out / capacity, 3) if capacity else None,
+    })
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
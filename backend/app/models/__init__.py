@@ -5,10 +5,16 @@ from app.db.database import Base
 from app.models.user import User
 from app.models.scan import Scan
 from app.models.entity import Entity
+from app.models.attribute import EntityAttribute, EntityAttributeCurrent
+from app.models.edge import EntityEdge, EdgeType
 from app.models.finding import Finding
+from app.models.observation import FindingObservation
 from app.models.report import Report
+from app.models.scan_entity import ScanEntity
+from app.models.scan_module_run import ScanModuleRun
+from app.models.watchlist import WatchlistEntry, WatchlistEntity, WatchlistChange, ChangeKind
 
-__all__ = ["Base", "User", "Scan", "Entity", "Finding", "Report"]
+__all__ = ["Base", "User", "Scan", "Entity", "EntityAttribute", "EntityAttributeCurrent", "EntityEdge", "EdgeType", "Finding", "FindingObservation", "Report", "ScanEntity", "ScanModuleRun", "WatchlistEntry", "WatchlistEntity", "WatchlistChange", "ChangeKind"]
 
 
 
@@ -0,0 +1,41 @@
+"""
+Entity attribute models
+"""
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+# JSONB on PostgreSQL so values can be compared for change detection
+AttributeValue = JSON().with_variant(JSONB(), "postgresql")
+
+
+class EntityAttribute(Base):
+    """One observed change of an entity attribute (append-only history)"""
+    __tablename__ = "entity_attributes"
+    __table_args__ = (
+        # History of one attribute, newest first
+        Index("ix_entity_attributes_entity_id_key_observed_at", "entity_id", "key", "observed_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    entity_id = Column(Integer, ForeignKey("entities.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String, nullable=False)
+    value = Column(AttributeValue, nullable=True)
+    value_type = Column(String, nullable=False)  # str, int, float, bool, list, dict, null
+    source = Column(String, nullable=True)  # whois, ssl, ...
+    scan_id = Column(Integer, ForeignKey("scans.id"), nullable=True, index=True)
+    observed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class EntityAttributeCurrent(Base):
+    """Latest value of every attribute of an entity, one row per key"""
+    __tablename__ = "entity_attribute_current"
+    
+    entity_id = Column(Integer, ForeignKey("entities.id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(AttributeValue, nullable=True)
+    value_type = Column(String, nullable=False)
+    source = Column(String, nullable=True)
+    scan_id = Column(Integer, ForeignKey("scans.id"), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
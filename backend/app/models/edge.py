@@ -0,0 +1,38 @@
+"""
+Entity edge model
+"""
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+import enum
+from app.db.database import Base
+
+
+class EdgeType(str, enum.Enum):
+    """Relationship types between entities (src -> dst)"""
+    NAME_SERVER = "name_server"  # domain -> its name server
+    SUBDOMAIN_OF = "subdomain_of"  # subdomain -> parent domain
+    MAIL_SERVER = "mail_server"  # domain -> its MX host
+    EMAIL_DOMAIN = "email_domain"  # email address -> its domain
+
+
+class EntityEdge(Base):
+    """Typed, directed relationship between two entities"""
+    __tablename__ = "entity_edges"
+    __table_args__ = (
+        # One edge per pair and type; also serves outgoing traversal
+        UniqueConstraint(
+            "src_entity_id", "dst_entity_id", "type",
+            name="uq_entity_edges_src_entity_id_dst_entity_id_type",
+        ),
+        # Incoming traversal
+        Index("ix_entity_edges_dst_entity_id_src_entity_id", "dst_entity_id", "src_entity_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    src_entity_id = Column(Integer, ForeignKey("entities.id", ondelete="CASCADE"), nullable=False)
+    dst_entity_id = Column(Integer, ForeignKey("entities.id", ondelete="CASCADE"), nullable=False)
+    # EdgeType value; a plain string so new types need no migration
+    type = Column(String, nullable=False)
+    source = Column(String, nullable=True)  # module that observed the relationship
+    scan_id = Column(Integer, ForeignKey("scans.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
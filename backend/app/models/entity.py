@@ -1,7 +1,7 @@
 """
 Entity model
 """
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, JSON, Index, UniqueConstraint, Enum as SQLEnum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -20,14 +20,57 @@ class EntityType(str, enum.Enum):
     ACCOUNT = "account"
 
 
+# Entity types whose canonical value is a DNS name
+DOMAIN_ENTITY_TYPES = (EntityType.DOMAIN, EntityType.SUBDOMAIN)
+
+
+def reverse_domain_labels(name: str) -> str:
+    """
+    Reverse the labels of a DNS name: 'api.example.com' -> 'com.example.api'
+
+    Every descendant of a domain then shares the parent's reversed key plus
+    a '.', so "all subdomains of X" becomes a prefix (index range) lookup.
+    """
+    return ".".join(reversed(name.strip().lower().rstrip(".").split(".")))
+
+
+def _default_reversed_domain(context):
+    """Column default deriving reversed_domain from the inserted row"""
+    params = context.get_current_parameters()
+    if params.get("type") in DOMAIN_ENTITY_TYPES and params.get("canonical_value"):
+        return reverse_domain_labels(params["canonical_value"])
+    return None
+
+
 class Entity(Base):
     """Entity model"""
     __tablename__ = "entities"
+    __table_args__ = (
+        # Trigram index serving substring search (requires pg_trgm)
+        Index(
+            "ix_entities_canonical_value_trgm",
+            "canonical_value",
+            postgresql_using="gin",
+            postgresql_ops={"canonical_value": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_entities_reversed_domain", "reversed_domain"),
+        # Paging a scan's entities
+        Index("ix_entities_scan_id_id", "scan_id", "id"),
+        # One entity per canonical key, across scans and imports
+        UniqueConstraint("type", "canonical_value", name="uq_entities_type_canonical_value"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     scan_id = Column(Integer, ForeignKey("scans.id"), nullable=True, index=True)
     type = Column(SQLEnum(EntityType), nullable=False, index=True)
     canonical_value = Column(String, nullable=False, index=True)
+    # Reversed-label key for domain hierarchy queries (e.g. 'com.example.api').
+    # C collation keeps byte ordering so the B-tree serves prefix ranges.
+    reversed_domain = Column(
+        String().with_variant(String(collation="C"), "postgresql"),
+        nullable=True,
+        default=_default_reversed_domain,
+    )
     # NOTE: 'metadata' is a reserved attribute name in SQLAlchemy declarative models.
     # Use a safe attribute name while keeping the DB column name as 'metadata'.
     metadata_json = Column("metadata", JSON, nullable=True)  # raw info from sources
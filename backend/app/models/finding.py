@@ -1,7 +1,7 @@
 """
 Finding model
 """
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, JSON, Float
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, JSON, Float, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
@@ -10,13 +10,29 @@ from app.db.database import Base
 class Finding(Base):
     """Finding model"""
     __tablename__ = "findings"
+    __table_args__ = (
+        # Keyset pagination order for an entity's findings
+        Index("ix_findings_entity_id_created_at_id", "entity_id", "created_at", "id"),
+        # Lookup of an identical earlier payload; repeats become observations.
+        # Not unique: on PostgreSQL findings are partitioned by created_at, and
+        # a unique key would have to include it (writers take an advisory lock).
+        Index(
+            "ix_findings_entity_id_source_type_content_hash",
+            "entity_id", "source", "type", "content_hash",
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     entity_id = Column(Integer, ForeignKey("entities.id"), nullable=False, index=True)
     source = Column(String, nullable=False)  # whois, shodan, ssl, htb, scraping
     type = Column(String, nullable=False)  # breach, open_port, leaked_creds, suspicious_ssl
     confidence_score = Column(Float, default=0.0)
+    # Small summary; the full payload lives in the blob store under raw_blob_hash
+    # (rows without a hash predate the blob store and hold the full payload)
     raw_result = Column(JSON, nullable=True)
+    raw_blob_hash = Column(String(64), nullable=True)
+    raw_size = Column(Integer, nullable=True)  # uncompressed bytes
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the canonical payload
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
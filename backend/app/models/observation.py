@@ -0,0 +1,24 @@
+"""
+Finding observation model
+"""
+from sqlalchemy import Column, DateTime, Integer, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class FindingObservation(Base):
+    """A scan seeing an already known finding again"""
+    __tablename__ = "finding_observations"
+    __table_args__ = (
+        # First/last seen per finding
+        Index("ix_finding_observations_finding_id_observed_at", "finding_id", "observed_at"),
+        # Findings of a scan, as a set compared by scan diffs
+        Index("ix_finding_observations_scan_id_finding_id", "scan_id", "finding_id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: both tables are partitioned by time on PostgreSQL and
+    # expire independently (see app.tasks.retention)
+    finding_id = Column(Integer, nullable=False)
+    scan_id = Column(Integer, ForeignKey("scans.id"), nullable=True)
+    observed_at = Column(DateTime(timezone=True), server_default=func.now())
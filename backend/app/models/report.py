@@ -1,7 +1,7 @@
 """
 Report model
 """
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, JSON, Text
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, JSON, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
@@ -10,6 +10,10 @@ from app.db.database import Base
 class Report(Base):
     """Report model"""
     __tablename__ = "reports"
+    __table_args__ = (
+        # Keyset pagination order for a scan's reports
+        Index("ix_reports_scan_id_created_at_id", "scan_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     scan_id = Column(Integer, ForeignKey("scans.id"), nullable=False, index=True)
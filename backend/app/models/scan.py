@@ -1,7 +1,7 @@
 """
 Scan model
 """
-from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, JSON, Index, Enum as SQLEnum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -27,6 +27,17 @@ class ScanType(str, enum.Enum):
 class Scan(Base):
     """Scan model"""
     __tablename__ = "scans"
+    __table_args__ = (
+        # Trigram index serving substring search (requires pg_trgm)
+        Index(
+            "ix_scans_target_trgm",
+            "target",
+            postgresql_using="gin",
+            postgresql_ops={"target": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # Keyset pagination order for scan listings
+        Index("ix_scans_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -37,6 +48,9 @@ class Scan(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     started_at = Column(DateTime(timezone=True), nullable=True)
     finished_at = Column(DateTime(timezone=True), nullable=True)
+    timeline = Column(JSON, nullable=True)  # phase spans of the last run (app.core.tracing)
+    # Watchlist entry that scheduled this scan, if any
+    watchlist_id = Column(Integer, ForeignKey("watchlist.id", ondelete="SET NULL"), nullable=True, index=True)
     
     # Relationships
     entities = relationship("Entity", back_populates="scan")
@@ -0,0 +1,14 @@
+"""
+Scan membership model
+"""
+from sqlalchemy import Column, Integer, ForeignKey
+from app.db.database import Base
+
+
+class ScanEntity(Base):
+    """An entity seen by a scan; scan diffs compare these sets"""
+    __tablename__ = "scan_entities"
+    
+    # The primary key orders each scan's set by entity id
+    scan_id = Column(Integer, ForeignKey("scans.id", ondelete="CASCADE"), primary_key=True)
+    entity_id = Column(Integer, ForeignKey("entities.id", ondelete="CASCADE"), primary_key=True)
@@ -0,0 +1,24 @@
+"""
+Scan module checkpoint model
+"""
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, JSON
+from app.db.database import Base
+
+
+class ScanModuleRun(Base):
+    """
+    Checkpoint of one module of a scan
+
+    A module that succeeded keeps its result (ids of the entities and
+    findings it saw, counts, timeline); a retried or resumed scan reuses it
+    instead of running the module again.
+    """
+    __tablename__ = "scan_module_runs"
+    
+    scan_id = Column(Integer, ForeignKey("scans.id", ondelete="CASCADE"), primary_key=True)
+    module = Column(String(50), primary_key=True)
+    status = Column(String(20), nullable=False)  # running, success, failure, error
+    attempts = Column(Integer, nullable=False, default=0)
+    result = Column(JSON, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
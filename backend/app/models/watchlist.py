@@ -0,0 +1,66 @@
+"""
+Watchlist models
+"""
+from sqlalchemy import Column, String, DateTime, Integer, Boolean, ForeignKey, JSON, Index, Enum as SQLEnum
+from sqlalchemy.sql import func
+import enum
+from app.db.database import Base
+from app.models.scan import ScanType
+
+
+class ChangeKind(str, enum.Enum):
+    """What a rescan found different from the previous run"""
+    ENTITY_ADDED = "entity_added"
+    ENTITY_REMOVED = "entity_removed"
+    FINDING_ADDED = "finding_added"  # first finding of its source and type for the entity
+    FINDING_CHANGED = "finding_changed"  # new payload replacing an earlier one
+
+
+class WatchlistEntry(Base):
+    """A target rescanned on its own interval (app.tasks.watchlist)"""
+    __tablename__ = "watchlist"
+    __table_args__ = (
+        # Due entries, oldest first
+        Index("ix_watchlist_enabled_next_run_at", "enabled", "next_run_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    target = Column(String, nullable=False, unique=True)
+    type = Column(SQLEnum(ScanType), nullable=False)
+    modules = Column(JSON, nullable=True)  # scan modules; empty means the defaults
+    interval_seconds = Column(Integer, nullable=False)
+    enabled = Column(Boolean, nullable=False, default=True)
+    next_run_at = Column(DateTime(timezone=True), nullable=False)
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    # No foreign key: scans already reference their watchlist entry
+    last_scan_id = Column(Integer, nullable=True)
+    baseline_scan_id = Column(Integer, nullable=True)  # last run where every module succeeded
+    last_change_count = Column(Integer, nullable=True)  # changes recorded by the last run
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class WatchlistEntity(Base):
+    """Entity seen by the latest completed run of a watchlist entry"""
+    __tablename__ = "watchlist_entities"
+
+    watchlist_id = Column(Integer, ForeignKey("watchlist.id", ondelete="CASCADE"), primary_key=True)
+    entity_id = Column(Integer, ForeignKey("entities.id", ondelete="CASCADE"), primary_key=True)
+
+
+class WatchlistChange(Base):
+    """One difference between a rescan and the run before it"""
+    __tablename__ = "watchlist_changes"
+    __table_args__ = (
+        # Changes of an entry, newest first
+        Index("ix_watchlist_changes_watchlist_id_id", "watchlist_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    watchlist_id = Column(Integer, ForeignKey("watchlist.id", ondelete="CASCADE"), nullable=False)
+    scan_id = Column(Integer, ForeignKey("scans.id"), nullable=False, index=True)
+    # ChangeKind value; a plain string so new kinds need no migration
+    kind = Column(String, nullable=False)
+    entity_id = Column(Integer, ForeignKey("entities.id", ondelete="CASCADE"), nullable=False)
+    # No foreign key: findings are partitioned by time on PostgreSQL
+    finding_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
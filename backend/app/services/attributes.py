@@ -0,0 +1,156 @@
+"""
+Append-only entity attributes
+
+Modules report entity attributes as flat dicts. Rather than merging them
+into the entity's metadata JSON (one large rewrite per touch), each key is
+compared with the current view in entity_attribute_current and only the
+keys whose value changed are written: a history row in entity_attributes
+and an upsert of that key's current row. Re-observing an unchanged entity,
+such as a name server shared by many domains, writes nothing.
+
+Entities created before attribute rows existed keep their values in
+metadata_json; readers fall back to it when an entity has no current rows.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+from sqlalchemy import select, update, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.dialect import insert_for
+from app.models.attribute import EntityAttribute, EntityAttributeCurrent
+from app.models.entity import Entity
+
+
+def value_type(value: Any) -> str:
+    """Type tag stored next to each attribute value"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "str"
+    if isinstance(value, (list, tuple)):
+        return "list"
+    return "dict"
+
+
+def _normalize(value: Any) -> Any:
+    """Value as it reads back from a JSON column (tuples become lists, ...)"""
+    return orjson.loads(orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS))
+
+
+async def record_attributes(
+    db: AsyncSession,
+    entity_id: int,
+    attributes: Dict[str, Any],
+    source: Optional[str] = None,
+    scan_id: Optional[int] = None,
+) -> List[str]:
+    """
+    Record attribute values observed for an entity
+
+    Returns the keys whose value changed. Nothing is committed; the caller
+    owns the transaction.
+    """
+    if not attributes:
+        return []
+
+    result = await db.execute(
+        select(EntityAttributeCurrent.key, EntityAttributeCurrent.value).where(
+            EntityAttributeCurrent.entity_id == entity_id,
+            EntityAttributeCurrent.key.in_(list(attributes)),
+        )
+    )
+    current = {row.key: row.value for row in result.all()}
+
+    rows = []
+    for key, value in attributes.items():
+        value = _normalize(value)
+        if key in current and current[key] == value:
+            continue
+        rows.append({
+            "entity_id": entity_id,
+            "key": key,
+            "value": value,
+            "value_type": value_type(value),
+            "source": source,
+            "scan_id": scan_id,
+        })
+    if not rows:
+        return []
+
+    await db.execute(EntityAttribute.__table__.insert(), rows)
+
+    insert = insert_for(db)
+    stmt = insert(EntityAttributeCurrent).values(rows)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[EntityAttributeCurrent.entity_id, EntityAttributeCurrent.key],
+            set_={
+                "value": stmt.excluded.value,
+                "value_type": stmt.excluded.value_type,
+                "source": stmt.excluded.source,
+                "scan_id": stmt.excluded.scan_id,
+                "updated_at": func.now(),
+            },
+        )
+    )
+    return [row["key"] for row in rows]
+
+
+async def current_attributes(
+    db: AsyncSession, entity_ids: Iterable[int]
+) -> Dict[int, Dict[str, Any]]:
+    """Current attribute values of each entity that has any"""
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return {}
+    result = await db.execute(
+        select(
+            EntityAttributeCurrent.entity_id,
+            EntityAttributeCurrent.key,
+            EntityAttributeCurrent.value,
+        ).where(EntityAttributeCurrent.entity_id.in_(entity_ids))
+    )
+    attributes: Dict[int, Dict[str, Any]] = {}
+    for row in result.all():
+        attributes.setdefault(row.entity_id, {})[row.key] = row.value
+    return attributes
+
+
+async def hydrate_metadata(db: AsyncSession, entities: List[dict]) -> List[dict]:
+    """Fill `metadata` of entity dicts from the current view (legacy rows keep metadata_json)"""
+    attributes = await current_attributes(db, [e["id"] for e in entities])
+    for entity in entities:
+        if entity["id"] in attributes:
+            entity["metadata"] = attributes[entity["id"]]
+    return entities
+
+
+async def touch_last_seen(db: AsyncSession, entity_id: int) -> bool:
+    """
+    Move last_seen forward, at most once per ENTITY_LAST_SEEN_RESOLUTION
+
+    A single conditional UPDATE: entities seen recently match no row and
+    are neither written nor locked.
+    """
+    threshold = datetime.now(timezone.utc) - timedelta(
+        seconds=settings.ENTITY_LAST_SEEN_RESOLUTION
+    )
+    result = await db.execute(
+        update(Entity)
+        .where(
+            Entity.id == entity_id,
+            or_(Entity.last_seen.is_(None), Entity.last_seen < threshold),
+        )
+        .values(last_seen=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
@@ -0,0 +1,232 @@
+"""
+Content-addressed blob store for large raw finding payloads
+
+Payloads are serialized to canonical JSON (sorted keys), addressed by the
+SHA-256 of those bytes and stored zlib-compressed, so a payload that is
+byte-identical to one already stored costs nothing on rescans. Blobs are
+immutable: a hash always resolves to the same content.
+
+Two backends are available, selected by BLOB_STORE_BACKEND:
+
+- local: files under BLOB_STORE_PATH, fanned out by hash prefix
+- s3: an S3-compatible bucket (AWS, MinIO, ...); needs the optional boto3
+
+Blocking I/O runs in worker threads so callers can stay on the event loop.
+"""
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+import os
+import tempfile
+import logging
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import orjson
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_LEVEL = 6
+
+# Limits for the inline summary kept on a finding next to its blob hash
+SUMMARY_MAX_STRING = 200
+SUMMARY_MAX_ITEMS = 10
+
+
+class BlobNotFound(KeyError):
+    """No blob stored under the requested hash"""
+
+
+class BlobRef(NamedTuple):
+    """Address and uncompressed size of a stored payload"""
+    hash: str
+    size: int
+
+
+def encode_payload(payload: Any) -> bytes:
+    """Canonical JSON encoding used for hashing and storage"""
+    return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+
+
+def payload_hash(payload: Any) -> str:
+    """Content address of a payload (the hash it is stored under)"""
+    return hashlib.sha256(encode_payload(payload)).hexdigest()
+
+
+def summarize_payload(raw_result: dict) -> dict:
+    """
+    Small inline view of a raw payload
+
+    Scalars are kept (long strings truncated), short lists of scalars are
+    kept, and longer lists are replaced by a `<key>_count` entry.
+    """
+    summary = {}
+    for key, value in raw_result.items():
+        if isinstance(value, str):
+            summary[key] = value[:SUMMARY_MAX_STRING]
+        elif value is None or isinstance(value, (bool, int, float)):
+            summary[key] = value
+        elif isinstance(value, list):
+            if len(value) <= SUMMARY_MAX_ITEMS and all(
+                isinstance(item, (str, int, float, bool)) for item in value
+            ):
+                summary[key] = [
+                    item[:SUMMARY_MAX_STRING] if isinstance(item, str) else item
+                    for item in value
+                ]
+            else:
+                summary[f"{key}_count"] = len(value)
+    return summary
+
+
+class BlobStore(ABC):
+    """Base class: subclasses implement the raw compressed read/write"""
+
+    @abstractmethod
+    def _exists(self, blob_hash: str) -> bool:
+        """Whether a blob is stored under `blob_hash`"""
+
+    @abstractmethod
+    def _read(self, blob_hash: str) -> bytes:
+        """Compressed bytes of a blob; raises BlobNotFound if missing"""
+
+    @abstractmethod
+    def _write(self, blob_hash: str, data: bytes) -> None:
+        """Store the compressed bytes of a blob"""
+
+    def _put_bytes(self, body: bytes) -> BlobRef:
+        blob_hash = hashlib.sha256(body).hexdigest()
+        if not self._exists(blob_hash):
+            self._write(blob_hash, zlib.compress(body, COMPRESSION_LEVEL))
+        return BlobRef(blob_hash, len(body))
+
+    async def put(self, payload: Any) -> BlobRef:
+        """Store a JSON-serializable payload, once per distinct content"""
+        return await asyncio.to_thread(self._put_bytes, encode_payload(payload))
+
+    async def get_bytes(self, blob_hash: str) -> bytes:
+        """Uncompressed JSON bytes of a stored payload"""
+        data = await asyncio.to_thread(self._read, blob_hash)
+        return zlib.decompress(data)
+
+    async def get(self, blob_hash: str) -> Any:
+        """Decoded payload stored under `blob_hash`"""
+        return orjson.loads(await self.get_bytes(blob_hash))
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under a directory, e.g. ab/cd/abcd...ef.z"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, blob_hash: str) -> Path:
+        return self.root / blob_hash[:2] / blob_hash[2:4] / f"{blob_hash}.z"
+
+    def _exists(self, blob_hash: str) -> bool:
+        return self._path(blob_hash).exists()
+
+    def _read(self, blob_hash: str) -> bytes:
+        try:
+            return self._path(blob_hash).read_bytes()
+        except FileNotFoundError:
+            raise BlobNotFound(blob_hash) from None
+
+    def _write(self, blob_hash: str, data: bytes) -> None:
+        path = self._path(blob_hash)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so concurrent readers never see a partial blob
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+class S3BlobStore(BlobStore):
+    """Blobs as objects in an S3-compatible bucket"""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None):
+        try:
+            import boto3
+        except ImportError as e:
+            raise RuntimeError(
+                "BLOB_STORE_BACKEND=s3 requires boto3 (pip install boto3)"
+            ) from e
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._client = boto3.client("s3", endpoint_url=endpoint_url or None)
+
+    def _key(self, blob_hash: str) -> str:
+        key = f"{blob_hash[:2]}/{blob_hash}.z"
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _exists(self, blob_hash: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=self._key(blob_hash))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def _read(self, blob_hash: str) -> bytes:
+        try:
+            response = self._client.get_object(Bucket=self.bucket, Key=self._key(blob_hash))
+        except self._client.exceptions.NoSuchKey:
+            raise BlobNotFound(blob_hash) from None
+        return response["Body"].read()
+
+    def _write(self, blob_hash: str, data: bytes) -> None:
+        self._client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(blob_hash),
+            Body=data,
+        )
+
+
+_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Return the process-wide blob store configured in settings"""
+    global _store
+    if _store is None:
+        if settings.BLOB_STORE_BACKEND == "s3":
+            _store = S3BlobStore(
+                settings.BLOB_S3_BUCKET,
+                prefix=settings.BLOB_S3_PREFIX,
+                endpoint_url=settings.BLOB_S3_ENDPOINT_URL,
+            )
+        elif settings.BLOB_STORE_BACKEND == "local":
+            _store = LocalBlobStore(settings.BLOB_STORE_PATH)
+        else:
+            raise RuntimeError(f"Unknown BLOB_STORE_BACKEND: {settings.BLOB_STORE_BACKEND}")
+    return _store
+
+
+async def hydrate_raw_results(findings: List[Dict]) -> List[Dict]:
+    """Swap the stored summaries of finding dicts for their full payloads"""
+    hashes = list({f["raw_blob_hash"] for f in findings if f.get("raw_blob_hash")})
+    if not hashes:
+        return findings
+    store = get_blob_store()
+    fetched = await asyncio.gather(*(store.get(h) for h in hashes), return_exceptions=True)
+    payloads = {}
+    for blob_hash, payload in zip(hashes, fetched):
+        if isinstance(payload, Exception):
+            # Serve the summary rather than fail the whole page
+            logger.warning(f"Failed to load raw payload {blob_hash}: {payload}")
+        else:
+            payloads[blob_hash] = payload
+    for finding in findings:
+        if finding.get("raw_blob_hash") in payloads:
+            finding["raw_result"] = payloads[finding["raw_blob_hash"]]
+    return findings
@@ -0,0 +1,157 @@
+"""
+Response cache for immutable read endpoints
+
+Completed scans (and entities belonging to them) are cached as encoded JSON
+bodies in a per-process LRU backed by Redis, and served with strong ETags.
+
+Every cached body is keyed by a per-object version counter kept in Redis.
+Writers bump the counter through invalidate() after committing, so entries
+built from older data stop matching in every API process at once, without
+having to reach into their local memory. If Redis is unreachable the cache
+is bypassed rather than risking stale responses.
+"""
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, NamedTuple, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "osint:cache"
+
+
+class CachedBody(NamedTuple):
+    """Encoded response body and its strong ETag"""
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the exact response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip() for tag in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+class ResponseCache:
+    """Two-level (process LRU + Redis) cache of encoded JSON responses"""
+
+    def __init__(self, redis_factory=get_redis, max_entries: int = 512, ttl: int = 86400):
+        self._redis_factory = redis_factory
+        self._local: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+    @staticmethod
+    def _version_key(kind: str, key_id: Any) -> str:
+        return f"{KEY_PREFIX}:version:{kind}:{key_id}"
+
+    @staticmethod
+    def _body_key(kind: str, key_id: Any, version: int, variant: str) -> str:
+        digest = hashlib.sha1(variant.encode()).hexdigest()[:16]
+        return f"{KEY_PREFIX}:body:{kind}:{key_id}:{version}:{digest}"
+
+    def _remember(self, key: str, entry: CachedBody) -> None:
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(
+        self, kind: str, key_id: Any, variant: str
+    ) -> Tuple[Optional[CachedBody], Optional[int]]:
+        """
+        Look up a cached body
+
+        Returns (entry, version); version is None when Redis is unavailable,
+        in which case nothing may be cached.
+        """
+        try:
+            redis = self._redis_factory()
+            version = int(await redis.get(self._version_key(kind, key_id)) or 0)
+            key = self._body_key(kind, key_id, version, variant)
+            entry = self._local.get(key)
+            if entry is not None:
+                self._local.move_to_end(key)
+                return entry, version
+            body = await redis.get(key)
+        except Exception as e:
+            logger.debug(f"Response cache unavailable: {e}")
+            return None, None
+
+        if body is None:
+            return None, version
+        entry = CachedBody(body, make_etag(body))
+        self._remember(key, entry)
+        return entry, version
+
+    async def set(self, kind: str, key_id: Any, variant: str, version: int, body: bytes) -> CachedBody:
+        """Store a body under the version observed by the matching get()"""
+        entry = CachedBody(body, make_etag(body))
+        key = self._body_key(kind, key_id, version, variant)
+        self._remember(key, entry)
+        try:
+            await self._redis_factory().set(key, body, ex=self.ttl)
+        except Exception as e:
+            logger.debug(f"Failed to write response cache: {e}")
+        return entry
+
+    async def invalidate(self, kind: str, key_id: Any) -> None:
+        """Bump the object's version so existing entries stop matching"""
+        if key_id is None:
+            return
+        try:
+            await self._redis_factory().incr(self._version_key(kind, key_id))
+        except Exception as e:
+            logger.warning(f"Failed to invalidate cached {kind} {key_id}: {e}")
+
+    async def respond(
+        self,
+        request: Request,
+        kind: str,
+        key_id: Any,
+        build: Callable[[], Awaitable[Tuple[Any, bool]]],
+    ) -> Response:
+        """
+        Serve a JSON response through the cache
+
+        `build` returns (content, cacheable). Cacheable responses carry a
+        strong ETag and are answered with 304 when If-None-Match matches.
+        """
+        variant = str(sorted(request.query_params.multi_items()))
+        entry, version = (None, None)
+        if settings.CACHE_ENABLED:
+            entry, version = await self.get(kind, key_id, variant)
+
+        if entry is None:
+            content, cacheable = await build()
+            body = orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+            if not cacheable:
+                return Response(content=body, media_type="application/json")
+            if version is not None:
+                entry = await self.set(kind, key_id, variant, version, body)
+            else:
+                entry = CachedBody(body, make_etag(body))
+
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request, entry.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache(
+    max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+    ttl=settings.CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,191 @@
+"""
+Scan diffs
+
+Compares what two scans saw, from `before` to `after`, inside the database.
+Each scan's entities (scan_entities) and findings (finding_observations)
+are sets ordered by an index on (scan_id, id), so the differences are
+EXCEPT queries over index entries and only the rows that differ are
+fetched:
+
+    entity_added      seen by after, not by before
+    entity_removed    seen by before, not by after
+    entity_changed    seen by both, with attribute changes recorded by the
+                      scans from before (excluded) to after (included)
+    finding_added     observed by after, no finding of the same entity,
+                      source and type observed by before
+    finding_removed   the reverse
+    finding_changed   observed by after, replacing another payload of the
+                      same entity, source and type observed by before
+
+Changes are returned section by section, in entity or finding id order,
+and paged with a cursor over (section, id).
+"""
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, except_, exists, func, intersect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.db.pagination import decode_cursor, encode_cursor
+from app.models.attribute import EntityAttribute
+from app.models.entity import Entity
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.models.scan_entity import ScanEntity
+
+SECTIONS = (
+    "entity_added", "entity_removed", "entity_changed",
+    "finding_added", "finding_removed", "finding_changed",
+)
+
+
+def scan_members(scan_id: int) -> Select:
+    """Ids of the entities a scan saw"""
+    return select(ScanEntity.entity_id).where(ScanEntity.scan_id == scan_id)
+
+
+def scan_observations(scan_id: int) -> Select:
+    """Ids of the findings a scan observed"""
+    return select(FindingObservation.finding_id).where(FindingObservation.scan_id == scan_id)
+
+
+def _counterpart(finding, others) -> Any:
+    """Another finding of the same entity, source and type among `others`"""
+    other = aliased(Finding)
+    return exists().where(
+        other.id.in_(others),
+        other.entity_id == finding.entity_id,
+        other.source == finding.source,
+        other.type == finding.type,
+    )
+
+
+class ScanDiff:
+    """Queries of the differences between two scans"""
+
+    def __init__(self, before: int, after: int):
+        self.before = before
+        self.after = after
+
+    def _ids(self, section: str) -> Select:
+        """Entity or finding ids of a section"""
+        before, after = self.before, self.after
+        if section == "entity_added":
+            return except_(scan_members(after), scan_members(before))
+        if section == "entity_removed":
+            return except_(scan_members(before), scan_members(after))
+        if section == "entity_changed":
+            low, high = sorted((before, after))
+            return (
+                select(EntityAttribute.entity_id)
+                .where(
+                    EntityAttribute.scan_id > low,
+                    EntityAttribute.scan_id <= high,
+                    EntityAttribute.entity_id.in_(intersect(scan_members(before), scan_members(after))),
+                )
+                .distinct()
+            )
+
+        only_after = except_(scan_observations(after), scan_observations(before))
+        only_before = except_(scan_observations(before), scan_observations(after))
+        ids, others = (only_before, only_after) if section == "finding_removed" else (only_after, only_before)
+        counterpart = _counterpart(Finding, others)
+        return select(Finding.id).where(
+            Finding.id.in_(ids),
+            counterpart if section == "finding_changed" else ~counterpart,
+        )
+
+    def _rows(self, section: str) -> Tuple[Select, Any]:
+        """Rows of a section in id order, and the id column"""
+        if section.startswith("entity_"):
+            return (
+                select(Entity.id.label("entity_id"), Entity.type, Entity.canonical_value)
+                .where(Entity.id.in_(self._ids(section)))
+                .order_by(Entity.id)
+            ), Entity.id
+        return (
+            select(
+                Finding.id.label("finding_id"), Finding.entity_id, Entity.type.label("entity_type"),
+                Entity.canonical_value, Finding.source, Finding.type, Finding.confidence_score,
+            )
+            .join(Entity, Entity.id == Finding.entity_id)
+            .where(Finding.id.in_(self._ids(section)))
+            .order_by(Finding.id)
+        ), Finding.id
+
+    async def summary(self, db: AsyncSession) -> Dict[str, int]:
+        """Number of changes per section"""
+        counts = {}
+        for section in SECTIONS:
+            ids = self._ids(section).subquery()
+            counts[section] = (await db.execute(select(func.count()).select_from(ids))).scalar_one()
+        return counts
+
+    async def _details(self, db: AsyncSession, section: str, rows: List[Dict]) -> None:
+        """Changed attribute keys, or replaced findings, of a page of changes"""
+        if section == "entity_changed":
+            low, high = sorted((self.before, self.after))
+            keys = await db.execute(
+                select(EntityAttribute.entity_id, EntityAttribute.key)
+                .where(
+                    EntityAttribute.entity_id.in_([row["entity_id"] for row in rows]),
+                    EntityAttribute.scan_id > low,
+                    EntityAttribute.scan_id <= high,
+                )
+                .distinct()
+            )
+            by_entity: Dict[int, set] = {}
+            for entity_id, key in keys:
+                by_entity.setdefault(entity_id, set()).add(key)
+            for row in rows:
+                row["keys"] = sorted(by_entity.get(row["entity_id"], ()))
+        elif section == "finding_changed":
+            previous = await db.execute(
+                select(Finding.id, Finding.entity_id, Finding.source, Finding.type)
+                .where(
+                    Finding.id.in_(except_(scan_observations(self.before), scan_observations(self.after))),
+                    Finding.entity_id.in_({row["entity_id"] for row in rows}),
+                )
+            )
+            replaced = {(e, s, t): f for f, e, s, t in previous}
+            for row in rows:
+                row["previous_finding_id"] = replaced.get((row["entity_id"], row["source"], row["type"]))
+
+    async def page(
+        self,
+        db: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Up to `limit` changes after `cursor`, and the cursor of the next page"""
+        section_index, after_id = decode_cursor(cursor, 2) or (0, 0)
+        if (
+            not isinstance(section_index, int) or not isinstance(after_id, int)
+            or not 0 <= section_index < len(SECTIONS)
+        ):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        changes: List[Dict] = []
+        for index in range(section_index, len(SECTIONS)):
+            section = SECTIONS[index]
+            id_key = "entity_id" if section.startswith("entity_") else "finding_id"
+            start = after_id if index == section_index else 0
+            remaining = limit - len(changes)
+
+            query, id_column = self._rows(section)
+            if start:
+                query = query.where(id_column > start)
+            rows = [
+                {k: v.value if isinstance(v, Enum) else v for k, v in row.items()}
+                for row in (await db.execute(query.limit(remaining + 1))).mappings()
+            ]
+            more = len(rows) > remaining
+            rows = rows[:remaining]
+            if rows:
+                await self._details(db, section, rows)
+            changes += [{"change": section, **row} for row in rows]
+            if more:
+                return changes, encode_cursor(index, rows[-1][id_key] if rows else start)
+        return changes, None
@@ -0,0 +1,191 @@
+"""
+Scan progress events over Redis pub/sub
+
+Workers publish progress events per scan and keep a compact snapshot hash
+next to the channel, so WebSocket clients that join late get the current
+state without the API touching Postgres.
+
+Each API process holds a single ScanEventHub: one pub/sub connection that
+subscribes to a scan's channel while at least one local socket watches it
+and fans every message out to per-socket queues.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Set
+
+import orjson
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "osint:scan"
+
+# Snapshots outlive the scan long enough for dashboards to catch up
+SNAPSHOT_TTL_SECONDS = 24 * 60 * 60
+
+# Events buffered per socket before the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Events that end a scan's stream
+TERMINAL_EVENTS = {"scan_completed", "scan_failed"}
+
+
+def events_channel(scan_id: int) -> str:
+    """Pub/sub channel carrying a scan's progress events"""
+    return f"{KEY_PREFIX}:{scan_id}:events"
+
+
+def snapshot_key(scan_id: int) -> str:
+    """Hash holding the latest state of a scan and each of its modules"""
+    return f"{KEY_PREFIX}:{scan_id}:progress"
+
+
+async def publish_scan_event(
+    scan_id: int,
+    event: str,
+    module: Optional[str] = None,
+    **data: Any,
+) -> None:
+    """
+    Publish a progress event and fold it into the scan's snapshot
+
+    Progress reporting is best effort: failures are logged, never raised
+    into the scan.
+    """
+    message = {
+        "scan_id": scan_id,
+        "event": event,
+        "module": module,
+        "data": data,
+        "ts": time.time(),
+    }
+    payload = orjson.dumps(message)
+    try:
+        redis = get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            if module:
+                pipe.hset(snapshot_key(scan_id), f"module:{module}", payload)
+            else:
+                pipe.hset(snapshot_key(scan_id), "scan", payload)
+            pipe.expire(snapshot_key(scan_id), SNAPSHOT_TTL_SECONDS)
+            pipe.publish(events_channel(scan_id), payload)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to publish {event} for scan {scan_id}: {e}")
+
+
+async def get_scan_snapshot(scan_id: int) -> Dict[str, Any]:
+    """Latest scan-level event and latest event of every module"""
+    raw = await get_redis().hgetall(snapshot_key(scan_id))
+    snapshot: Dict[str, Any] = {"scan_id": scan_id, "event": "snapshot", "scan": None, "modules": {}}
+    for field, payload in raw.items():
+        field = field.decode() if isinstance(field, bytes) else field
+        if field == "scan":
+            snapshot["scan"] = orjson.loads(payload)
+        elif field.startswith("module:"):
+            snapshot["modules"][field[len("module:"):]] = orjson.loads(payload)
+    return snapshot
+
+
+class ScanEventHub:
+    """Per-process fan-out of scan events to WebSocket subscribers"""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, scan_id: int) -> asyncio.Queue:
+        """Register a subscriber queue, subscribing the channel if it is new"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = get_redis().pubsub()
+            subscribers = self._subscribers.setdefault(scan_id, set())
+            if not subscribers:
+                await self._pubsub.subscribe(events_channel(scan_id))
+            subscribers.add(queue)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+        return queue
+
+    async def unsubscribe(self, scan_id: int, queue: asyncio.Queue) -> None:
+        """Drop a subscriber queue, unsubscribing the channel when it was the last"""
+        async with self._lock:
+            subscribers = self._subscribers.get(scan_id)
+            if not subscribers:
+                return
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[scan_id]
+                try:
+                    await self._pubsub.unsubscribe(events_channel(scan_id))
+                except Exception as e:
+                    logger.warning(f"Failed to unsubscribe from scan {scan_id}: {e}")
+
+    async def close(self) -> None:
+        """Stop the reader and release the pub/sub connection"""
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
+
+    def _dispatch(self, scan_id: int, payload: bytes) -> None:
+        for queue in self._subscribers.get(scan_id, ()):
+            if queue.full():
+                # Slow consumer: drop its oldest event rather than block the hub
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    async def _read(self) -> None:
+        """Single reader loop shared by every subscriber in this process"""
+        while self._subscribers:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except Exception as e:
+                logger.warning(f"Scan event subscription failed, retrying: {e}")
+                await asyncio.sleep(1.0)
+                await self._resubscribe()
+                continue
+            if not message or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            try:
+                scan_id = int(channel.split(":")[2])
+            except (IndexError, ValueError):
+                continue
+            self._dispatch(scan_id, message["data"])
+
+    async def _resubscribe(self) -> None:
+        """Recreate the pub/sub connection after an error"""
+        async with self._lock:
+            try:
+                await self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = get_redis().pubsub()
+            channels = [events_channel(scan_id) for scan_id in self._subscribers]
+            if channels:
+                try:
+                    await self._pubsub.subscribe(*channels)
+                except Exception as e:
+                    logger.warning(f"Failed to resubscribe to scan events: {e}")
+
+
+scan_events = ScanEventHub()
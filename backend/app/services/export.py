@@ -0,0 +1,281 @@
+"""
+Streaming bulk export of entities and findings
+
+Rows are read from a server-side cursor EXPORT_BATCH_SIZE at a time and
+encoded batch by batch, so memory use stays constant whatever the size of
+the export. Three formats are available:
+
+- ndjson: one JSON object per line
+- csv: a header row, nested values (metadata, raw_result) as JSON text
+- parquet: one row group per batch; needs the optional pyarrow
+
+Used by both GET /api/v1/export/{kind} and `python -m app.cli export`.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import orjson
+from sqlalchemy import select, DateTime, Float, Integer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.entity import Entity, EntityType
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.models.scan_entity import ScanEntity
+from app.services.attributes import hydrate_metadata
+from app.services.blobstore import hydrate_raw_results
+
+# Rows fetched per round trip, and per Parquet row group
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_KINDS = ("entities", "findings")
+EXPORT_FORMATS = ("ndjson", "csv", "parquet")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+ENTITY_EXPORT_COLUMNS = (
+    Entity.id, Entity.scan_id, Entity.type, Entity.canonical_value,
+    Entity.first_seen, Entity.last_seen,
+)
+FINDING_EXPORT_COLUMNS = (
+    Finding.id, Finding.entity_id, Entity.scan_id, Entity.type.label("entity_type"),
+    Entity.canonical_value.label("entity_value"), Finding.source, Finding.type,
+    Finding.confidence_score, Finding.content_hash, Finding.raw_blob_hash,
+    Finding.raw_size, Finding.created_at,
+)
+
+# Heavy columns exported only when listed in `include`
+EXPORT_OPTIONAL_FIELDS = {
+    "entities": {"metadata": Entity.metadata_json.label("metadata")},
+    "findings": {"raw_result": Finding.raw_result},
+}
+
+
+@dataclass
+class ExportFilters:
+    """Row filters; empty lists and None match everything"""
+    # Entities the scans saw, findings they observed
+    scan_ids: List[int] = field(default_factory=list)
+    # Entities are filtered on first_seen, findings on created_at
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    entity_types: List[str] = field(default_factory=list)
+    # Entities: those with at least one finding from these sources
+    sources: List[str] = field(default_factory=list)
+
+
+def check_format(fmt: str) -> None:
+    """Raise ValueError if `fmt` cannot be produced here"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format: {fmt}. Must be among: {', '.join(EXPORT_FORMATS)}")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export requires pyarrow (pip install pyarrow)") from None
+
+
+def check_entity_types(entity_types: List[str]) -> None:
+    """Raise ValueError if any of `entity_types` is not an EntityType value"""
+    unknown = set(entity_types) - {t.value for t in EntityType}
+    if unknown:
+        raise ValueError(f"Unknown entity type(s): {', '.join(sorted(unknown))}")
+
+
+def parse_include(kind: str, include: Optional[str]) -> set:
+    """Optional fields named in a comma-separated `include`; ValueError for unknown ones"""
+    fields = {f.strip() for f in (include or "").split(",") if f.strip()}
+    unknown = fields - EXPORT_OPTIONAL_FIELDS[kind].keys()
+    if unknown:
+        raise ValueError(f"Unknown include field(s) for {kind}: {', '.join(sorted(unknown))}")
+    return fields
+
+
+def export_query(kind: str, filters: ExportFilters, fields: set):
+    """Projection of the rows to export, in id order"""
+    if kind == "entities":
+        query = select(*ENTITY_EXPORT_COLUMNS)
+        timestamp = Entity.first_seen
+        if filters.sources:
+            query = query.where(Entity.id.in_(
+                select(Finding.entity_id).where(Finding.source.in_(filters.sources))
+            ))
+        order = Entity.id
+    else:
+        query = select(*FINDING_EXPORT_COLUMNS).join(Entity, Finding.entity_id == Entity.id)
+        timestamp = Finding.created_at
+        if filters.sources:
+            query = query.where(Finding.source.in_(filters.sources))
+        order = Finding.id
+
+    for name, column in EXPORT_OPTIONAL_FIELDS[kind].items():
+        if name in fields:
+            query = query.add_columns(column)
+    if filters.scan_ids:
+        if kind == "entities":
+            query = query.where(Entity.id.in_(
+                select(ScanEntity.entity_id).where(ScanEntity.scan_id.in_(filters.scan_ids))
+            ))
+        else:
+            query = query.where(Finding.id.in_(
+                select(FindingObservation.finding_id).where(FindingObservation.scan_id.in_(filters.scan_ids))
+            ))
+    if filters.entity_types:
+        query = query.where(Entity.type.in_([EntityType(t) for t in filters.entity_types]))
+    if filters.since is not None:
+        query = query.where(timestamp >= filters.since)
+    if filters.until is not None:
+        query = query.where(timestamp < filters.until)
+    return query.order_by(order)
+
+
+async def _batches(
+    session: AsyncSession, kind: str, query, fields: set
+) -> AsyncIterator[List[Dict]]:
+    result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    async for partition in result.partitions():
+        rows = [dict(row._mapping) for row in partition]
+        if kind == "entities" and "metadata" in fields:
+            rows = await hydrate_metadata(session, rows)
+        if kind == "findings" and "raw_result" in fields:
+            rows = await hydrate_raw_results(rows)
+        yield rows
+
+
+def _plain(value: Any) -> Any:
+    """Value as written to NDJSON (enums unwrapped)"""
+    return value.value if isinstance(value, Enum) else value
+
+
+def _flat(value: Any) -> Any:
+    """Value as written to a CSV cell or Parquet column"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    return value
+
+
+def _encode_ndjson(rows: List[Dict]) -> bytes:
+    return b"".join(
+        orjson.dumps({k: _plain(v) for k, v in row.items()}, option=orjson.OPT_APPEND_NEWLINE)
+        for row in rows
+    )
+
+
+class _CsvEncoder:
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self._header = True
+
+    def encode(self, rows: List[Dict]) -> bytes:
+        out = io.StringIO()
+        writer = csv.writer(out)
+        if self._header:
+            writer.writerow(self.columns)
+            self._header = False
+        for row in rows:
+            writer.writerow([
+                value.isoformat() if isinstance(value, datetime) else _flat(value)
+                for value in (row.get(c) for c in self.columns)
+            ])
+        return out.getvalue().encode()
+
+    def finish(self) -> bytes:
+        # An empty export still gets its header
+        return self.encode([]) if self._header else b""
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file handing written bytes out in chunks; tell() keeps counting"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _ParquetEncoder:
+    def __init__(self, query):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        fields = []
+        for name, column in zip(query.selected_columns.keys(), query.selected_columns):
+            if isinstance(column.type, Integer):
+                arrow_type = pa.int64()
+            elif isinstance(column.type, Float):
+                arrow_type = pa.float64()
+            elif isinstance(column.type, DateTime):
+                arrow_type = pa.timestamp("us", tz="UTC")
+            else:
+                # Strings, enums and JSON (as text)
+                arrow_type = pa.string()
+            fields.append(pa.field(name, arrow_type))
+        self.schema = pa.schema(fields)
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression="zstd")
+
+    def encode(self, rows: List[Dict]) -> bytes:
+        table = self._pa.Table.from_pylist(
+            [{k: _flat(v) for k, v in row.items()} for row in rows], schema=self.schema
+        )
+        self._writer.write_table(table, row_group_size=max(len(rows), 1))
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+async def export_rows(
+    session: AsyncSession,
+    kind: str,
+    fmt: str,
+    filters: Optional[ExportFilters] = None,
+    fields: Optional[set] = None,
+) -> AsyncIterator[bytes]:
+    """Encoded export of `kind` in `fmt`, as a stream of byte chunks"""
+    filters = filters or ExportFilters()
+    fields = fields or set()
+    query = export_query(kind, filters, fields)
+    if fmt == "ndjson":
+        encoder = None
+    elif fmt == "csv":
+        encoder = _CsvEncoder(list(query.selected_columns.keys()))
+    else:
+        encoder = _ParquetEncoder(query)
+
+    async for rows in _batches(session, kind, query, fields):
+        chunk = _encode_ndjson(rows) if encoder is None else encoder.encode(rows)
+        if chunk:
+            yield chunk
+    if encoder is not None:
+        chunk = encoder.finish()
+        if chunk:
+            yield chunk
@@ -2,9 +2,13 @@
 LLM Runner abstraction
 Supports local (Ollama) and cloud (OpenAI) backends
 """
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import Awaitable, List, Dict, Any, TypeVar
 from app.core.config import settings
+from app.core.metrics import LLM_DURATION, record_llm_tokens, record_upstream, status_class
+
+T = TypeVar("T")
 
 
 class LLMDriver(ABC):
@@ -49,8 +53,11 @@ class LocalOllamaDriver(LLMDriver):
                 },
                 timeout=120.0,
             )
+            record_upstream("ollama", status_class(response.status_code))
             response.raise_for_status()
-            return response.json().get("response", "")
+            data = response.json()
+            record_llm_tokens("ollama", data.get("prompt_eval_count"), data.get("eval_count"))
+            return data.get("response", "")
     
     async def embed(self, text: str) -> List[float]:
         """Generate embeddings using Ollama"""
@@ -65,6 +72,7 @@ class LocalOllamaDriver(LLMDriver):
                 },
                 timeout=30.0,
             )
+            record_upstream("ollama", status_class(response.status_code))
             response.raise_for_status()
             return response.json().get("embedding", [])
     
@@ -74,6 +82,7 @@ class LocalOllamaDriver(LLMDriver):
         
         async with httpx.AsyncClient() as client:
             response = await client.get(f"{self.base_url}/api/tags")
+            record_upstream("ollama", status_class(response.status_code))
             response.raise_for_status()
             models = response.json().get("models", [])
             return [model.get("name", "") for model in models]
@@ -104,6 +113,10 @@ class OpenAIDriver(LLMDriver):
             ],
         )
         
+        if response.usage:
+            record_llm_tokens(
+                "openai", response.usage.prompt_tokens, response.usage.completion_tokens
+            )
         return response.choices[0].message.content or ""
     
     async def embed(self, text: str) -> List[float]:
@@ -119,6 +132,8 @@ class OpenAIDriver(LLMDriver):
             input=text,
         )
         
+        if response.usage:
+            record_llm_tokens("openai", response.usage.prompt_tokens, None)
         return response.data[0].embedding
     
     async def available_models(self) -> List[str]:
@@ -138,14 +153,30 @@ class LLMRunner:
             self.driver = OpenAIDriver()
         else:
             raise ValueError(f"Unknown LLM backend: {backend}")
+        self.backend = backend
+    
+    async def _timed(self, operation: str, call: Awaitable[T]) -> T:
+        """Await a driver call, recording its latency and outcome"""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await call
+            outcome = "success"
+            return result
+        finally:
+            LLM_DURATION.labels(
+                backend=self.backend, operation=operation, outcome=outcome
+            ).observe(time.perf_counter() - started)
     
     async def generate_summary(self, context: str, prompt_template: str) -> str:
         """Generate summary using configured driver"""
-        return await self.driver.generate_summary(context, prompt_template)
+        return await self._timed(
+            "generate", self.driver.generate_summary(context, prompt_template)
+        )
     
     async def embed(self, text: str) -> List[float]:
         """Generate embeddings using configured driver"""
-        return await self.driver.embed(text)
+        return await self._timed("embed", self.driver.embed(text))
     
     async def available_models(self) -> List[str]:
         """Get available models"""
@@ -0,0 +1,109 @@
+"""
+Shared domain-level lookups
+
+Email scans look up facts of the address's domain (MX, SPF/DMARC) that
+every address of the domain shares. Successful results are kept in Redis
+for DOMAIN_LOOKUP_TTL seconds, so thousands of addresses at one domain
+cost one lookup per interval. A short lock makes scans that miss the cache
+at the same time wait for the first one's result instead of all querying
+(single flight). Failures are not cached, and without Redis every scan
+runs its own lookup.
+"""
+import asyncio
+import logging
+import secrets
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+import orjson
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "osint:lookup"
+
+# Seconds between cache reads while another scan runs the lookup
+WAIT_POLL_SECONDS = 0.1
+
+# Deletes the lock only while it still holds our token, in one step: a
+# lock that expired and was taken by another scan is left alone
+RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class DomainLookups:
+    """Redis-shared results of per-domain lookups"""
+
+    def __init__(self, redis_factory=get_redis):
+        self._redis_factory = redis_factory
+
+    @staticmethod
+    def _key(kind: str, domain: str) -> str:
+        return f"{KEY_PREFIX}:{kind}:{domain}"
+
+    async def get(
+        self,
+        kind: str,
+        domain: str,
+        lookup: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        Result of `lookup` for a domain, run at most once per TTL
+
+        `lookup` returns an OSINT module result ({"success": ..., ...});
+        shared results carry "shared": True.
+        """
+        key = self._key(kind, domain)
+        try:
+            redis = self._redis_factory()
+            cached = await redis.get(key)
+            if cached is not None:
+                return {**orjson.loads(cached), "shared": True}
+            token = secrets.token_hex(8)
+            leader = await redis.set(f"{key}:lock", token, nx=True, ex=settings.DOMAIN_LOOKUP_WAIT)
+        except Exception as e:
+            logger.debug(f"Domain lookup cache unavailable: {e}")
+            return await lookup()
+
+        if not leader:
+            shared = await self._wait(redis, key)
+            if shared is not None:
+                return {**shared, "shared": True}
+            # The other scan failed or is too slow: look it up ourselves
+            return await lookup()
+
+        try:
+            result = await lookup()
+            if result.get("success"):
+                await redis.set(key, orjson.dumps(result), ex=settings.DOMAIN_LOOKUP_TTL)
+            return result
+        finally:
+            try:
+                await redis.eval(RELEASE_LOCK, 1, f"{key}:lock", token)
+            except Exception as e:
+                logger.debug(f"Failed to release domain lookup lock: {e}")
+
+    async def _wait(self, redis, key: str):
+        """Result another scan is computing, None if it ends without one"""
+        deadline = time.monotonic() + settings.DOMAIN_LOOKUP_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(WAIT_POLL_SECONDS)
+            try:
+                cached = await redis.get(key)
+                if cached is not None:
+                    return orjson.loads(cached)
+                if not await redis.exists(f"{key}:lock"):
+                    return None
+            except Exception as e:
+                logger.debug(f"Domain lookup cache unavailable: {e}")
+                return None
+        return None
+
+
+domain_lookups = DomainLookups()
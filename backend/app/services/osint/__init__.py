@@ -1,6 +1,7 @@
 """OSINT modules"""
 from app.services.osint.whois import run_whois
 from app.services.osint.ssl import run_ssl
+from app.services.osint.mail import run_mx, run_mail_auth
+from app.services.osint.hibp import run_hibp
 
-__all__ = ["run_whois", "run_ssl"]
-
+__all__ = ["run_whois", "run_ssl", "run_mx", "run_mail_auth", "run_hibp"]
@@ -0,0 +1,110 @@
+"""
+HaveIBeenPwned module
+Breaches an email address appears in (requires HIBP_API_KEY)
+"""
+import asyncio
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from datetime import datetime
+from urllib.parse import quote
+from app.core.config import settings
+from app.core.metrics import record_upstream, status_class
+from app.core.tracing import span
+import logging
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+HIBP_API_URL = "https://haveibeenpwned.com/api/v3"
+
+# Breach fields kept in the finding
+BREACH_FIELDS = ("Name", "Domain", "BreachDate", "AddedDate", "PwnCount", "DataClasses", "IsVerified", "IsSensitive")
+
+# Rate-limited requests are retried after the Retry-After the API sends,
+# at most this many times and only when it asks for at most this many seconds
+RATE_LIMIT_RETRIES = 2
+RATE_LIMIT_MAX_WAIT = 10.0
+
+
+def _failed(error: str) -> Dict[str, Any]:
+    return {"success": False, "error": error, "timestamp": datetime.utcnow().isoformat()}
+
+
+def _retry_after(response: "httpx.Response") -> Optional[float]:
+    """Seconds a 429 asks to wait, None when missing or unparseable"""
+    try:
+        return max(float(response.headers["retry-after"]), 0.0)
+    except (KeyError, ValueError):
+        return None
+
+
+async def run_hibp(email: str, client: Optional["httpx.AsyncClient"] = None) -> Dict[str, Any]:
+    """
+    Look up the breaches an email address appears in
+    
+    Args:
+        email: Email address
+        client: HTTP client to use; a new one is opened when omitted
+        
+    Returns:
+        Dictionary with the breaches (empty when the address is in none)
+    """
+    import httpx
+    
+    if not settings.HIBP_API_KEY:
+        return _failed("HIBP_API_KEY not configured")
+    
+    try:
+        async with nullcontext(client) if client is not None else httpx.AsyncClient(timeout=30.0) as client:
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                with span("http GET haveibeenpwned.com", **{
+                    "http.request.method": "GET", "server.address": "haveibeenpwned.com",
+                }) as request_span:
+                    response = await client.get(
+                        f"{HIBP_API_URL}/breachedaccount/{quote(email)}",
+                        params={"truncateResponse": "false"},
+                        headers={"hibp-api-key": settings.HIBP_API_KEY, "user-agent": "ai-osint-kit"},
+                    )
+                    record_upstream("hibp", status_class(response.status_code))
+                    if request_span is not None:
+                        request_span.set_attribute("http.response.status_code", response.status_code)
+                if response.status_code != 429:
+                    break
+                wait = _retry_after(response)
+                if wait is None or wait > RATE_LIMIT_MAX_WAIT or attempt == RATE_LIMIT_RETRIES:
+                    return _failed(f"Rate limited (retry after {response.headers.get('retry-after', '?')}s)")
+                await asyncio.sleep(wait)
+            
+            # 404: the address is in no breach
+            if response.status_code == 404:
+                breaches = []
+            else:
+                response.raise_for_status()
+                breaches = [
+                    {field: breach.get(field) for field in BREACH_FIELDS}
+                    for breach in response.json()
+                ]
+            
+            return {
+                "success": True,
+                "data": {
+                    "email": email,
+                    "breach_count": len(breaches),
+                    "breaches": sorted(breaches, key=lambda b: b.get("BreachDate") or ""),
+                },
+                "timestamp": datetime.utcnow().isoformat(),
+            }
+    
+    except httpx.TimeoutException:
+        record_upstream("hibp", "timeout")
+        logger.error(f"Timeout querying HIBP for {email}")
+        return _failed("Request timeout")
+    except httpx.HTTPStatusError as e:
+        logger.error(f"HTTP error querying HIBP for {email}: {e}")
+        return _failed(f"HTTP error: {e.response.status_code}")
+    except Exception as e:
+        record_upstream("hibp", "error")
+        logger.error(f"Error querying HIBP for {email}: {e}", exc_info=True)
+        return _failed(str(e))
@@ -0,0 +1,147 @@
+"""
+Mail DNS module
+MX records and SPF/DMARC policies of an email domain
+
+dnspython is imported on first use, like the other OSINT clients.
+"""
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from app.core.metrics import record_upstream
+from app.core.tracing import span
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds a whole DNS query (all retries) may take
+DNS_LIFETIME = 10.0
+
+
+def _resolver():
+    import dns.asyncresolver
+    
+    resolver = dns.asyncresolver.Resolver()
+    resolver.lifetime = DNS_LIFETIME
+    return resolver
+
+
+async def _query(resolver, name: str, rdtype: str) -> List[Any]:
+    """Records of one type; empty when the name or the records do not exist"""
+    import dns.exception
+    import dns.resolver
+    
+    with span(f"dns {rdtype}", **{"dns.question.name": name}):
+        try:
+            answer = await resolver.resolve(name, rdtype)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+            record_upstream("dns", "empty")
+            return []
+        except dns.exception.Timeout:
+            record_upstream("dns", "timeout")
+            raise
+        except dns.exception.DNSException:
+            record_upstream("dns", "error")
+            raise
+        record_upstream("dns", "ok")
+        return list(answer)
+
+
+def _txt(record) -> str:
+    """Text of a TXT record (long ones are split into several strings)"""
+    return b"".join(record.strings).decode(errors="replace")
+
+
+def _tags(record: str) -> Dict[str, str]:
+    """Tags of a DMARC record: 'v=DMARC1; p=reject' -> {'v': 'DMARC1', 'p': 'reject'}"""
+    tags = {}
+    for part in record.split(";"):
+        key, sep, value = part.partition("=")
+        if sep:
+            tags[key.strip().lower()] = value.strip()
+    return tags
+
+
+# SPF qualifier of the final "all" mechanism -> result for other senders
+SPF_ALL = {"-": "fail", "~": "softfail", "?": "neutral", "+": "pass"}
+
+
+def _spf_all(record: str) -> Optional[str]:
+    for term in record.split():
+        term = term.lower()
+        if term.endswith("all") and term.lstrip("-~?+") == "all":
+            return SPF_ALL.get(term[0], "pass")
+    return None
+
+
+def _failed(target: str, error: Exception) -> Dict[str, Any]:
+    logger.error(f"DNS lookup failed for {target}: {error}")
+    return {
+        "success": False,
+        "error": f"DNS lookup failed: {type(error).__name__}",
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+async def run_mx(domain: str, resolver=None) -> Dict[str, Any]:
+    """
+    Look up the mail servers of a domain
+    
+    Args:
+        domain: Email domain
+        resolver: DNS resolver to use (an object with an async resolve());
+            a dnspython resolver when omitted
+        
+    Returns:
+        Dictionary with the MX hosts, lowest preference first
+    """
+    try:
+        records = await _query(resolver or _resolver(), domain, "MX")
+        mx = sorted(
+            ({"preference": r.preference, "host": str(r.exchange).rstrip(".").lower()} for r in records),
+            key=lambda m: (m["preference"], m["host"]),
+        )
+        return {
+            "success": True,
+            "data": {"domain": domain, "mx": mx},
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+    except Exception as e:
+        return _failed(domain, e)
+
+
+async def run_mail_auth(domain: str, resolver=None) -> Dict[str, Any]:
+    """
+    Look up the SPF and DMARC policies of a domain
+    
+    Args:
+        domain: Email domain
+        resolver: DNS resolver to use; a dnspython resolver when omitted
+        
+    Returns:
+        Dictionary with the raw records and the policy they state (None
+        where the domain publishes no record)
+    """
+    try:
+        resolver = resolver or _resolver()
+        spf = [t for t in map(_txt, await _query(resolver, domain, "TXT")) if t.lower().startswith("v=spf1")]
+        dmarc = [
+            t for t in map(_txt, await _query(resolver, f"_dmarc.{domain}", "TXT"))
+            if t.lower().startswith("v=dmarc1")
+        ]
+        dmarc_tags = _tags(dmarc[0]) if dmarc else {}
+        return {
+            "success": True,
+            "data": {
+                "domain": domain,
+                "spf": spf[0] if spf else None,
+                # More than one SPF record is a permanent error for receivers
+                "spf_valid": len(spf) == 1,
+                "spf_all": _spf_all(spf[0]) if spf else None,
+                "dmarc": dmarc[0] if dmarc else None,
+                "dmarc_policy": dmarc_tags.get("p"),
+                "dmarc_subdomain_policy": dmarc_tags.get("sp"),
+                "dmarc_rua": dmarc_tags.get("rua"),
+            },
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+    except Exception as e:
+        return _failed(domain, e)
@@ -1,33 +1,70 @@
 """
 SSL Certificate module
 Queries certificate transparency logs from crt.sh
+
+httpx is imported on first use: the API imports this module (through the
+scan tasks) without ever running it.
 """
-import httpx
-from typing import Dict, Any, List
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
 from datetime import datetime
+from app.core.metrics import record_upstream, status_class
+from app.core.tracing import span
 import logging
 
+if TYPE_CHECKING:
+    import httpx
+
 logger = logging.getLogger(__name__)
 
 CRTSH_API_URL = "https://crt.sh"
 
 
-async def run_ssl(target: str) -> Dict[str, Any]:
+def _record_failure(error: Exception) -> None:
+    """Count a crt.sh request that got no response"""
+    import httpx
+    
+    if isinstance(error, httpx.TimeoutException):
+        record_upstream("crtsh", "timeout")
+    elif isinstance(error, httpx.TransportError):
+        record_upstream("crtsh", "error")
+
+
+async def _query(client: "httpx.AsyncClient", url: str, params: Dict[str, str]) -> Any:
+    """One crt.sh query: the decoded JSON response"""
+    with span("http GET crt.sh", **{
+        "http.request.method": "GET", "server.address": "crt.sh", "url.query": params["q"],
+    }) as request_span:
+        response = await client.get(url, params=params, follow_redirects=True)
+        record_upstream("crtsh", status_class(response.status_code))
+        if request_span is not None:
+            request_span.set_attribute("http.response.status_code", response.status_code)
+            request_span.set_attribute("http.response.body.size", len(response.content))
+        response.raise_for_status()
+    with span("crtsh.decode"):
+        return response.json()
+
+
+async def run_ssl(target: str, client: Optional["httpx.AsyncClient"] = None) -> Dict[str, Any]:
     """
     Query certificate transparency logs for a domain
     
     Args:
         target: Domain name to query
+        client: HTTP client to use (e.g. one on a mock transport); a new
+            client is opened and closed when omitted
         
     Returns:
         Dictionary with SSL certificate data
     """
+    import httpx
+    
     try:
         # Remove protocol if present
         domain = target.replace("https://", "").replace("http://", "").split("/")[0]
         
         # Query crt.sh API
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with nullcontext(client) if client is not None else httpx.AsyncClient(timeout=30.0) as client:
             # Query for certificates matching the domain
             # crt.sh API: https://crt.sh/?q=%.example.com&output=json
             # Try both with and without wildcard
@@ -38,16 +75,13 @@ async def run_ssl(target: str) -> Dict[str, Any]:
             }
             
             try:
-                response = await client.get(url, params=params, follow_redirects=True)
-                response.raise_for_status()
-                certificates = response.json()
+                certificates = await _query(client, url, params)
             except Exception as e:
+                _record_failure(e)
                 # If wildcard query fails, try exact match
                 logger.warning(f"Wildcard query failed, trying exact match: {e}")
                 params["q"] = domain
-                response = await client.get(url, params=params, follow_redirects=True)
-                response.raise_for_status()
-                certificates = response.json()
+                certificates = await _query(client, url, params)
             
             # Handle case where API returns empty list or error
             if not isinstance(certificates, list):
@@ -62,35 +96,36 @@ async def run_ssl(target: str) -> Dict[str, Any]:
                 "total_certificates": len(certificates) if isinstance(certificates, list) else 0,
             }
             
-            if isinstance(certificates, list):
-                for cert in certificates[:100]:  # Limit to first 100 certificates
-                    cert_data = {
-                        "id": cert.get("id"),
-                        "logged_at": cert.get("entry_timestamp"),
-                        "not_before": cert.get("not_before"),
-                        "not_after": cert.get("not_after"),
-                        "issuer_name": cert.get("issuer_name"),
-                        "common_name": cert.get("name_value"),
-                    }
+            with span("crtsh.parse", **{"osint.certificates": len(certificates)}):
+                if isinstance(certificates, list):
+                    for cert in certificates[:100]:  # Limit to first 100 certificates
+                        cert_data = {
+                            "id": cert.get("id"),
+                            "logged_at": cert.get("entry_timestamp"),
+                            "not_before": cert.get("not_before"),
+                            "not_after": cert.get("not_after"),
+                            "issuer_name": cert.get("issuer_name"),
+                            "common_name": cert.get("name_value"),
+                        }
                     
-                    result["certificates"].append(cert_data)
+                        result["certificates"].append(cert_data)
                     
-                    # Extract subdomains from common name and name_value
-                    name_value = cert.get("name_value", "")
-                    if name_value:
-                        # Split by newlines (crt.sh returns multiple domains per cert)
-                        for name in name_value.split("\n"):
-                            name = name.strip()
-                            if name and domain in name:
-                                result["subdomains"].add(name)
+                        # Extract subdomains from common name and name_value
+                        name_value = cert.get("name_value", "")
+                        if name_value:
+                            # Split by newlines (crt.sh returns multiple domains per cert)
+                            for name in name_value.split("\n"):
+                                name = name.strip()
+                                if name and domain in name:
+                                    result["subdomains"].add(name)
                     
-                    # Track issuers
-                    if cert.get("issuer_name"):
-                        result["issuers"].add(cert.get("issuer_name"))
+                        # Track issuers
+                        if cert.get("issuer_name"):
+                            result["issuers"].add(cert.get("issuer_name"))
                 
-                # Convert sets to lists for JSON serialization
-                result["subdomains"] = sorted(list(result["subdomains"]))
-                result["issuers"] = sorted(list(result["issuers"]))
+                    # Convert sets to lists for JSON serialization
+                    result["subdomains"] = sorted(list(result["subdomains"]))
+                    result["issuers"] = sorted(list(result["issuers"]))
             
             return {
                 "success": True,
@@ -98,7 +133,8 @@ async def run_ssl(target: str) -> Dict[str, Any]:
                 "timestamp": datetime.utcnow().isoformat(),
             }
             
-    except httpx.TimeoutException:
+    except httpx.TimeoutException as e:
+        _record_failure(e)
         logger.error(f"Timeout querying crt.sh for {target}")
         return {
             "success": False,
@@ -113,6 +149,7 @@ async def run_ssl(target: str) -> Dict[str, Any]:
             "timestamp": datetime.utcnow().isoformat(),
         }
     except Exception as e:
+        _record_failure(e)
         logger.error(f"Error querying SSL certificates for {target}: {e}", exc_info=True)
         return {
             "success": False,
@@ -1,7 +1,6 @@
 """
 WHOIS module
 """
-import whois
 from typing import Dict, Any
 from datetime import datetime
 
@@ -16,6 +15,9 @@ async def run_whois(target: str) -> Dict[str, Any]:
     Returns:
         Dictionary with WHOIS data
     """
+    # python-whois is only imported by processes that run the module
+    import whois
+    
     try:
         domain = whois.whois(target)
         
@@ -0,0 +1,173 @@
+"""
+Watchlist scheduling and change recording
+
+Entries are spread over their interval: a new entry first runs at a random
+point within one interval, and every run moves the next one by the
+interval plus or minus WATCHLIST_JITTER of it, so thousands of daily
+targets are scanned at a steady rate instead of in a burst.
+
+A rescan records only what differs from the previous run of its entry:
+entities that appeared or disappeared, and findings whose payload was not
+seen by the previous run. The entry's last known entity set is kept in
+watchlist_entities and updated by those differences alone. Findings are
+compared with the previous run and the last complete one, so findings a
+failed module missed are not reported again once it succeeds.
+"""
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select, delete, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.models.watchlist import ChangeKind, WatchlistChange, WatchlistEntity, WatchlistEntry
+
+
+def as_utc(value: datetime) -> datetime:
+    """Timezone-aware UTC datetime (SQLite returns naive ones)"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def first_run_at(interval_seconds: int, now: datetime, rng: Optional[random.Random] = None) -> datetime:
+    """Random point within the first interval of a new entry"""
+    rng = rng or random
+    return now + timedelta(seconds=rng.uniform(0, interval_seconds))
+
+
+def next_run_at(
+    scheduled: datetime,
+    interval_seconds: int,
+    now: datetime,
+    rng: Optional[random.Random] = None,
+) -> datetime:
+    """
+    Run after the one scheduled at `scheduled`, started at `now`
+
+    Runs keep their phase when started late (the next one is counted from
+    the scheduled time) unless more than an interval behind.
+    """
+    rng = rng or random
+    scheduled = as_utc(scheduled)
+    base = scheduled if scheduled + timedelta(seconds=interval_seconds) > now else now
+    jitter = settings.WATCHLIST_JITTER
+    return base + timedelta(seconds=interval_seconds * (1 + rng.uniform(-jitter, jitter)))
+
+
+async def _changed_findings(
+    db: AsyncSession,
+    finding_ids: set,
+    previous_scan_ids: set,
+) -> Dict[int, tuple]:
+    """
+    Findings of this run none of the previous runs observed
+
+    Maps finding id -> (entity id, ChangeKind): changed when a previous
+    run observed another payload of the same entity, source and type.
+    """
+    if not finding_ids:
+        return {}
+    seen_before = set()
+    if previous_scan_ids:
+        seen_before = set((await db.execute(
+            select(FindingObservation.finding_id).where(
+                FindingObservation.scan_id.in_(previous_scan_ids),
+                FindingObservation.finding_id.in_(finding_ids),
+            )
+        )).scalars())
+    new_ids = finding_ids - seen_before
+    if not new_ids:
+        return {}
+
+    replaced = set()
+    if previous_scan_ids:
+        earlier = aliased(Finding)
+        replaced = set((await db.execute(
+            select(Finding.id)
+            .join(earlier, and_(
+                earlier.entity_id == Finding.entity_id,
+                earlier.source == Finding.source,
+                earlier.type == Finding.type,
+                earlier.id != Finding.id,
+            ))
+            .join(FindingObservation, FindingObservation.finding_id == earlier.id)
+            .where(Finding.id.in_(new_ids), FindingObservation.scan_id.in_(previous_scan_ids))
+        )).scalars())
+    rows = await db.execute(select(Finding.id, Finding.entity_id).where(Finding.id.in_(new_ids)))
+    return {
+        finding_id: (
+            entity_id,
+            ChangeKind.FINDING_CHANGED if finding_id in replaced else ChangeKind.FINDING_ADDED,
+        )
+        for finding_id, entity_id in rows
+    }
+
+
+async def record_changes(
+    db: AsyncSession,
+    watchlist_id: int,
+    scan_id: int,
+    entity_ids: Iterable[int],
+    finding_ids: Iterable[int],
+    complete: bool = True,
+) -> Dict[str, int]:
+    """
+    Record how a watchlist run differs from the previous one
+
+    `entity_ids` and `finding_ids` are everything the run saw. Removals
+    are only recorded when `complete` (every module succeeded); otherwise
+    a failed module would make all its entities look gone. The entry then
+    points at this scan as the previous run of the next one (and as its
+    baseline when complete), and recording the same scan again is a no-op.
+
+    Returns the number of changes per kind.
+    """
+    entry = (await db.execute(
+        select(WatchlistEntry).where(WatchlistEntry.id == watchlist_id)
+    )).scalar_one_or_none()
+    if entry is None or entry.last_scan_id == scan_id:
+        # Unknown entry, or a retried finish of a scan already recorded
+        return {}
+
+    seen = set(entity_ids)
+    known = set((await db.execute(
+        select(WatchlistEntity.entity_id).where(WatchlistEntity.watchlist_id == watchlist_id)
+    )).scalars())
+    added = seen - known
+    removed = known - seen if complete else set()
+    previous = {entry.last_scan_id, entry.baseline_scan_id} - {None}
+    findings = await _changed_findings(db, set(finding_ids), previous)
+
+    def change(kind: ChangeKind, entity_id: int, finding_id: Optional[int] = None) -> WatchlistChange:
+        return WatchlistChange(
+            watchlist_id=watchlist_id, scan_id=scan_id, kind=kind.value,
+            entity_id=entity_id, finding_id=finding_id,
+        )
+
+    changes = [change(ChangeKind.ENTITY_ADDED, e) for e in sorted(added)]
+    changes += [change(ChangeKind.ENTITY_REMOVED, e) for e in sorted(removed)]
+    changes += [
+        change(kind, entity_id, finding_id)
+        for finding_id, (entity_id, kind) in sorted(findings.items())
+    ]
+    db.add_all(changes)
+    db.add_all(WatchlistEntity(watchlist_id=watchlist_id, entity_id=e) for e in added)
+    if removed:
+        await db.execute(
+            delete(WatchlistEntity).where(
+                WatchlistEntity.watchlist_id == watchlist_id,
+                WatchlistEntity.entity_id.in_(removed),
+            )
+        )
+    entry.last_scan_id = scan_id
+    if complete:
+        entry.baseline_scan_id = scan_id
+    entry.last_change_count = len(changes)
+    await db.commit()
+    return dict(Counter(c.kind for c in changes))
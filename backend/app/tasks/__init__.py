@@ -1,13 +1,3 @@
 """Celery background tasks"""
-
-
-
-
-
-
-
-
-
-
-
-
+# First, so that STARTUP_PROFILE times every import of the worker
+from app.core.startup import startup_profile  # noqa: F401
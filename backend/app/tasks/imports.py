@@ -0,0 +1,42 @@
+"""
+Bulk import background task
+"""
+from typing import Dict, Optional
+
+from app.db.database import AsyncSessionLocal, run_async
+from app.services.importer import ImportReport, detect_format, import_stream, open_input
+from app.tasks.scan import celery_app
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def _import_file_async(task, path: str, fmt: str) -> Dict:
+    def on_progress(report: ImportReport):
+        task.update_state(state="PROGRESS", meta=report.as_dict())
+        logger.info(
+            f"Import of {path}: {report.rows_read} rows read, "
+            f"{report.rows_per_second:.0f} rows/s"
+        )
+
+    async with AsyncSessionLocal() as db:
+        with open_input(path) as stream:
+            report = await import_stream(db, stream, fmt, on_progress=on_progress)
+    return report.as_dict()
+
+
+@celery_app.task(bind=True, name="import_file")
+def import_file_task(self, path: str, fmt: Optional[str] = None):
+    """
+    Import a CSV or NDJSON file readable by the worker
+
+    Progress is published as the PROGRESS state of the task, with the
+    counters of ImportReport.
+    """
+    try:
+        report = run_async(_import_file_async(self, path, fmt or detect_format(path)))
+        logger.info(f"Import of {path} finished: {report}")
+        return report
+    except Exception as e:
+        logger.error(f"Import of {path} failed: {e}", exc_info=True)
+        raise
@@ -0,0 +1,251 @@
+"""
+Retention and partition maintenance tasks
+
+Runs daily from Celery beat. On PostgreSQL, where findings and observations
+are partitioned by month (see app.db.partitions), it creates the partitions
+for the coming months and drops, or archives, every partition whose whole
+time range is older than its retention period. Findings are also
+subpartitioned by source, so each source expires on its own schedule
+without DELETE, VACUUM or index churn.
+
+A finding expires by its last observation, not its creation: rescans
+observe an unchanged payload without writing a new finding. Before a
+partition is dropped, findings it holds that were observed within the
+retention period are moved out of it (their created_at set to their last
+observation), and batched DELETEs skip them.
+
+Rows that have no partition of their own fall back to batched DELETEs:
+sources with a retention override that share the _default subpartition,
+and any database where the tables are not partitioned (SQLite, or a
+schema created with create_all).
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, delete, and_, exists, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, run_async
+from app.db.partitions import (
+    FINDINGS_TABLE, OBSERVATIONS_TABLE, PARTITION_COLUMNS, PARTITIONED_SOURCES,
+    DEFAULT_SUBPARTITION, IS_PARTITIONED_SQL, CHILD_TABLES_SQL,
+    add_months, month_start, months_between, parse_partition_name,
+    create_month_partition_sql,
+)
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.tasks.scan import celery_app
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SCHEMA = "archive"
+
+# Moves findings of an expiring partition observed since :cutoff to the
+# partition of their last observation (rows change partition through the parent)
+MOVE_OBSERVED_FINDINGS_SQL = """
+    UPDATE findings
+    SET created_at = observed.last_observed_at
+    FROM (
+        SELECT o.finding_id, max(o.observed_at) AS last_observed_at
+        FROM finding_observations o
+        JOIN {partition} f ON f.id = o.finding_id
+        WHERE o.observed_at >= :cutoff
+        GROUP BY o.finding_id
+    ) observed
+    WHERE findings.id = observed.finding_id AND findings.tableoid = '{partition}'::regclass
+"""
+
+
+def retention_days(source: Optional[str]) -> int:
+    """Retention period of a findings source (None for the default)"""
+    return settings.FINDINGS_RETENTION_BY_SOURCE.get(source, settings.FINDINGS_RETENTION_DAYS)
+
+
+def _default_subpartition_days() -> int:
+    """
+    Retention of the _default findings subpartition
+
+    It holds every source without a subpartition of its own, so it is kept
+    as long as the longest of them; shorter ones are then DELETEd.
+    """
+    return max([settings.FINDINGS_RETENTION_DAYS] + [
+        days for source, days in settings.FINDINGS_RETENTION_BY_SOURCE.items()
+        if source not in PARTITIONED_SOURCES
+    ])
+
+
+def _cutoff(today: date, days: int) -> datetime:
+    return datetime.combine(today - timedelta(days=days), datetime.min.time(), tzinfo=timezone.utc)
+
+
+def _month_expired(month: date, days: int, today: date) -> bool:
+    """True when the whole month lies before the retention cutoff"""
+    return add_months(month, 1) <= today - timedelta(days=days)
+
+
+async def _is_partitioned(db: AsyncSession, table: str) -> bool:
+    if db.bind.dialect.name != "postgresql":
+        return False
+    return bool((await db.execute(text(IS_PARTITIONED_SQL), {"table": table})).scalar())
+
+
+async def _children(db: AsyncSession, table: str) -> List[str]:
+    return list((await db.execute(text(CHILD_TABLES_SQL), {"table": table})).scalars())
+
+
+async def ensure_partitions(db: AsyncSession, today: date) -> None:
+    """Create partitions for this month and PARTITION_PREMAKE_MONTHS ahead"""
+    last = add_months(month_start(today), settings.PARTITION_PREMAKE_MONTHS)
+    for table in PARTITION_COLUMNS:
+        for month in months_between(today, last):
+            for statement in create_month_partition_sql(table, month):
+                await db.execute(text(statement))
+
+
+async def _move_observed_findings(db: AsyncSession, partition: str, cutoff: datetime, today: date) -> int:
+    """Move the findings of `partition` observed since `cutoff` out of it"""
+    # Their new months are within the retention period; make sure they exist
+    for month in months_between(cutoff.date(), today):
+        for statement in create_month_partition_sql(FINDINGS_TABLE, month):
+            await db.execute(text(statement))
+    result = await db.execute(text(MOVE_OBSERVED_FINDINGS_SQL.format(partition=partition)), {"cutoff": cutoff})
+    return result.rowcount
+
+
+async def _expire_partition(db: AsyncSession, parent: str, name: str, report: Dict) -> None:
+    """Drop a partition, or detach it into the archive schema"""
+    if settings.RETENTION_ACTION == "archive":
+        await db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        await db.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {name}"))
+        await db.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        report["archived"].append(name)
+    else:
+        await db.execute(text(f"DROP TABLE {name}"))
+        report["dropped"].append(name)
+
+
+async def _expire_partitions(db: AsyncSession, today: date, report: Dict) -> None:
+    for month_table in await _children(db, FINDINGS_TABLE):
+        parsed = parse_partition_name(FINDINGS_TABLE, month_table)
+        if parsed is None:
+            continue
+        month, _ = parsed
+        subpartitions = await _children(db, month_table)
+        expired = 0
+        for name in subpartitions:
+            sub = parse_partition_name(FINDINGS_TABLE, name)
+            if sub is None:
+                continue
+            if sub[1] == DEFAULT_SUBPARTITION:
+                days = _default_subpartition_days()
+            else:
+                days = retention_days(sub[1])
+            if _month_expired(month, days, today):
+                report["moved"] += await _move_observed_findings(db, name, _cutoff(today, days), today)
+                await _expire_partition(db, month_table, name, report)
+                expired += 1
+        if expired == len(subpartitions):
+            # Nothing left below this month
+            await db.execute(text(f"DROP TABLE {month_table}"))
+
+    for name in await _children(db, OBSERVATIONS_TABLE):
+        parsed = parse_partition_name(OBSERVATIONS_TABLE, name)
+        if parsed and _month_expired(parsed[0], settings.OBSERVATIONS_RETENTION_DAYS, today):
+            await _expire_partition(db, OBSERVATIONS_TABLE, name, report)
+
+
+async def _delete_in_batches(db: AsyncSession, model, condition, cascade_observations: bool) -> int:
+    """Delete matching rows RETENTION_DELETE_BATCH at a time, committing each batch"""
+    deleted = 0
+    while True:
+        ids = (await db.execute(
+            select(model.id).where(condition).limit(settings.RETENTION_DELETE_BATCH)
+        )).scalars().all()
+        if not ids:
+            return deleted
+        if cascade_observations:
+            await db.execute(delete(FindingObservation).where(FindingObservation.finding_id.in_(ids)))
+        await db.execute(delete(model).where(model.id.in_(ids)))
+        await db.commit()
+        deleted += len(ids)
+
+
+def _expired_findings(cutoff: datetime):
+    """Findings created before `cutoff` and not observed since"""
+    return and_(
+        Finding.created_at < cutoff,
+        ~exists().where(
+            FindingObservation.finding_id == Finding.id,
+            FindingObservation.observed_at >= cutoff,
+        ),
+    )
+
+
+async def _delete_expired(db: AsyncSession, today: date, partitioned: bool, report: Dict) -> None:
+    """DELETE-based retention for rows without a partition of their own"""
+    overrides = settings.FINDINGS_RETENTION_BY_SOURCE
+    conditions = []
+    for source, days in overrides.items():
+        # Partitioned sources expire with their subpartitions
+        if partitioned and source in PARTITIONED_SOURCES:
+            continue
+        conditions.append(and_(Finding.source == source, _expired_findings(_cutoff(today, days))))
+    if not partitioned or _default_subpartition_days() > settings.FINDINGS_RETENTION_DAYS:
+        excluded = list(overrides) + (list(PARTITIONED_SOURCES) if partitioned else [])
+        conditions.append(and_(
+            Finding.source.notin_(excluded),
+            _expired_findings(_cutoff(today, settings.FINDINGS_RETENTION_DAYS)),
+        ))
+
+    for condition in conditions:
+        report["deleted"][FINDINGS_TABLE] += await _delete_in_batches(
+            db, Finding, condition, cascade_observations=not partitioned
+        )
+    if not partitioned:
+        report["deleted"][OBSERVATIONS_TABLE] += await _delete_in_batches(
+            db, FindingObservation,
+            FindingObservation.observed_at < _cutoff(today, settings.OBSERVATIONS_RETENTION_DAYS),
+            cascade_observations=False,
+        )
+
+
+async def enforce_retention(db: AsyncSession, today: Optional[date] = None) -> Dict:
+    """Apply the retention policy; returns what was dropped, archived, moved or deleted"""
+    today = today or datetime.now(timezone.utc).date()
+    report = {
+        "dropped": [],
+        "archived": [],
+        "moved": 0,
+        "deleted": {FINDINGS_TABLE: 0, OBSERVATIONS_TABLE: 0},
+    }
+    partitioned = await _is_partitioned(db, FINDINGS_TABLE)
+    if partitioned:
+        await ensure_partitions(db, today)
+        await _expire_partitions(db, today, report)
+        await db.commit()
+    await _delete_expired(db, today, partitioned, report)
+    await db.commit()
+    return report
+
+
+async def _enforce_retention_async() -> Dict:
+    async with AsyncSessionLocal() as db:
+        return await enforce_retention(db)
+
+
+@celery_app.task(name="enforce_retention")
+def enforce_retention_task():
+    """Daily retention and partition maintenance"""
+    try:
+        report = run_async(_enforce_retention_async())
+        logger.info(
+            f"Retention: dropped {len(report['dropped'])} and archived "
+            f"{len(report['archived'])} partitions, kept {report['moved']} observed findings, "
+            f"deleted {report['deleted']}"
+        )
+        return report
+    except Exception as e:
+        logger.error(f"Retention task failed: {e}", exc_info=True)
+        raise
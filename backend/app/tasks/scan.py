@@ -1,18 +1,39 @@
 """
 Scan background tasks
 """
+# First, so that STARTUP_PROFILE times every import below
+from app.core.startup import startup_profile
+
 import asyncio
-from datetime import datetime
-from celery import Celery
-from sqlalchemy import select
+import time
+from datetime import datetime, timedelta
+from celery import Celery, chord
+from celery.signals import worker_init, worker_ready
+from celery.schedules import crontab
+from sqlalchemy import select, update, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.database import AsyncSessionLocal
-from app.models.scan import Scan, ScanStatus
+from app.core.metrics import (
+    SCAN_ENTITIES, SCAN_FINDINGS, record_module, record_written, start_worker_exporter,
+)
+from app.core.tracing import aggregated, combine, span, start_trace
+from app.db.database import AsyncSessionLocal, run_async
+from app.db.dialect import advisory_xact_locks, insert_for
+from app.models.scan import Scan, ScanStatus, ScanType
 from app.models.entity import Entity, EntityType
+from app.models.edge import EntityEdge, EdgeType
 from app.models.finding import Finding
-from app.services.osint import run_whois, run_ssl
+from app.models.observation import FindingObservation
+from app.models.scan_entity import ScanEntity
+from app.models.scan_module_run import ScanModuleRun
+from app.services.osint import run_whois, run_ssl, run_mx, run_mail_auth, run_hibp
+from app.services.attributes import record_attributes, touch_last_seen
+from app.services.blobstore import get_blob_store, payload_hash, summarize_payload
+from app.services.cache import response_cache
+from app.services.events import publish_scan_event
+from app.services.lookups import domain_lookups
+from app.services.watchlist import record_changes
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,8 +43,18 @@ celery_app = Celery(
     "osint_kit",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.tasks.retention", "app.tasks.imports", "app.tasks.watchlist"],
 )
 
+# Entities created between two "entities_found" progress events
+PROGRESS_EVERY = 100
+
+# Rows per INSERT when recording the entities a scan saw
+SCAN_ENTITIES_BATCH = 1000
+
+# WHOIS fields recorded as domain attributes; the raw record stays in the finding blob
+WHOIS_ATTRIBUTES = ("registrar", "creation_date", "expiration_date", "status", "name_servers")
+
 # Celery configuration
 celery_app.conf.update(
     task_serializer="json",
@@ -31,15 +62,43 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    worker_concurrency=settings.CELERY_WORKER_CONCURRENCY or None,
+    worker_prefetch_multiplier=settings.CELERY_PREFETCH_MULTIPLIER,
+    beat_schedule={
+        "enforce-retention": {
+            "task": "enforce_retention",
+            "schedule": crontab(hour=3, minute=17),
+        },
+        "schedule-watchlist": {
+            "task": "schedule_watchlist",
+            "schedule": float(settings.WATCHLIST_TICK_SECONDS),
+            # A tick not started within its period is superseded by the next
+            "options": {"expires": settings.WATCHLIST_TICK_SECONDS},
+        },
+    },
 )
 
 
+@worker_init.connect
+def _start_metrics_exporter(**kwargs):
+    """Expose worker metrics (module latency, DB, upstream calls) to Prometheus"""
+    with startup_profile.phase("metrics exporter"):
+        start_worker_exporter()
+
+
+@worker_ready.connect
+def _report_startup(**kwargs):
+    """Log the startup profile (STARTUP_PROFILE) once the worker consumes"""
+    startup_profile.finish()
+
+
 async def _update_scan_status(
     db: AsyncSession,
     scan_id: int,
     status: ScanStatus,
     started_at: datetime = None,
-    finished_at: datetime = None
+    finished_at: datetime = None,
+    timeline: dict = None
 ):
     """Update scan status in database"""
     result = await db.execute(select(Scan).where(Scan.id == scan_id))
@@ -51,20 +110,34 @@ async def _update_scan_status(
             scan.started_at = started_at
         if finished_at:
             scan.finished_at = finished_at
+        if timeline is not None:
+            scan.timeline = timeline
         await db.commit()
         await db.refresh(scan)
+        await response_cache.invalidate("scan", scan_id)
         return scan
     return None
 
 
+@aggregated("entity.upsert")
 async def _get_or_create_entity(
     db: AsyncSession,
     scan_id: int,
     entity_type: EntityType,
     canonical_value: str,
-    metadata: dict = None
+    metadata: dict = None,
+    source: str = None
 ) -> Entity:
-    """Get existing entity or create a new one"""
+    """
+    Get existing entity or create a new one
+
+    Metadata is recorded as attribute rows (only keys whose value changed
+    are written) and last_seen is refreshed at most once per
+    ENTITY_LAST_SEEN_RESOLUTION, so re-seeing a known entity is usually a
+    single read.
+    """
+    source = source or (metadata or {}).get("source")
+    
     # Check if entity already exists
     result = await db.execute(
         select(Entity).where(
@@ -75,157 +148,707 @@ async def _get_or_create_entity(
     entity = result.scalar_one_or_none()
     
     if entity:
-        # Update last_seen and metadata
-        entity.last_seen = datetime.utcnow()
-        if metadata:
-            # Merge metadata
-            if entity.metadata_json:
-                entity.metadata_json.update(metadata)
-            else:
-                entity.metadata_json = metadata
+        changed = await record_attributes(db, entity.id, metadata, source, scan_id)
+        touched = await touch_last_seen(db, entity.id)
         await db.commit()
-        await db.refresh(entity)
+        if changed or touched:
+            # Earlier, already cached scans list the entity with its attributes
+            seen_by = set((await db.execute(
+                select(ScanEntity.scan_id).where(ScanEntity.entity_id == entity.id)
+            )).scalars())
+            await response_cache.invalidate("entity", entity.id)
+            await asyncio.gather(*(response_cache.invalidate("scan", s) for s in seen_by - {scan_id}))
         return entity
     else:
-        # Create new entity
-        entity = Entity(
-            scan_id=scan_id,
-            type=entity_type,
-            canonical_value=canonical_value,
-            metadata_json=metadata or {}
+        # Create new entity; a concurrent scan or import may win the race
+        insert = insert_for(db)
+        await db.execute(
+            insert(Entity)
+            .values(scan_id=scan_id, type=entity_type, canonical_value=canonical_value)
+            .on_conflict_do_nothing(index_elements=[Entity.type, Entity.canonical_value])
         )
-        db.add(entity)
+        entity = (await db.execute(
+            select(Entity).where(
+                Entity.canonical_value == canonical_value,
+                Entity.type == entity_type
+            )
+        )).scalar_one()
+        await record_attributes(db, entity.id, metadata, source, scan_id)
         await db.commit()
         await db.refresh(entity)
         return entity
 
 
+@aggregated("edge.link")
+async def _link_entities(
+    db: AsyncSession,
+    scan_id: int,
+    src_entity_id: int,
+    dst_entity_id: int,
+    edge_type: EdgeType,
+    source: str
+) -> None:
+    """Record a relationship between two entities (no-op if already known)"""
+    insert = insert_for(db)
+    await db.execute(
+        insert(EntityEdge)
+        .values(
+            src_entity_id=src_entity_id,
+            dst_entity_id=dst_entity_id,
+            type=edge_type.value,
+            source=source,
+            scan_id=scan_id,
+        )
+        .on_conflict_do_nothing(
+            index_elements=[EntityEdge.src_entity_id, EntityEdge.dst_entity_id, EntityEdge.type]
+        )
+    )
+    await db.commit()
+
+
+async def _find_existing_finding(
+    db: AsyncSession,
+    entity_id: int,
+    source: str,
+    finding_type: str,
+    content_hash: str,
+):
+    """Finding already recorded with the same payload, if any"""
+    result = await db.execute(
+        select(Finding).where(
+            Finding.entity_id == entity_id,
+            Finding.source == source,
+            Finding.type == finding_type,
+            Finding.content_hash == content_hash,
+        ).limit(1)
+    )
+    return result.scalars().first()
+
+
+@aggregated("finding.write")
 async def _create_finding(
     db: AsyncSession,
+    scan_id: int,
     entity_id: int,
     source: str,
     finding_type: str,
     confidence_score: float = 0.0,
     raw_result: dict = None
 ):
-    """Create a finding record"""
-    finding = Finding(
-        entity_id=entity_id,
-        source=source,
-        type=finding_type,
-        confidence_score=confidence_score,
-        raw_result=raw_result or {}
-    )
-    db.add(finding)
+    """
+    Record a finding for this scan
+
+    A payload identical to one already recorded for the entity, source and
+    type only adds an observation row (none if this scan already observed
+    it); otherwise a new finding is created and its raw payload moved to
+    the blob store.
+    """
+    raw_result = raw_result or {}
+    content_hash = payload_hash(raw_result)
+    
+    # Serialize writers of the same payload until commit; findings are
+    # partitioned, so no unique constraint can do this
+    await advisory_xact_locks(db, [(entity_id, source, finding_type, content_hash)])
+    
+    finding = await _find_existing_finding(db, entity_id, source, finding_type, content_hash)
+    if finding is None:
+        stored_result = raw_result
+        raw_blob_hash = raw_size = None
+        if raw_result:
+            try:
+                blob = await get_blob_store().put(raw_result)
+                raw_blob_hash, raw_size = blob.hash, blob.size
+                stored_result = summarize_payload(raw_result)
+            except Exception as e:
+                # Keep the payload inline rather than lose it
+                logger.warning(f"Blob store unavailable, storing {source} payload inline: {e}")
+        
+        finding = Finding(
+            entity_id=entity_id,
+            source=source,
+            type=finding_type,
+            confidence_score=confidence_score,
+            raw_result=stored_result,
+            raw_blob_hash=raw_blob_hash,
+            raw_size=raw_size,
+            content_hash=content_hash,
+        )
+        db.add(finding)
+        await db.flush()
+    
+    # A retried module observes the same finding again: one row per scan
+    observed = (await db.execute(
+        select(FindingObservation.id).where(
+            FindingObservation.scan_id == scan_id,
+            FindingObservation.finding_id == finding.id,
+        ).limit(1)
+    )).scalar_one_or_none()
+    if observed is None:
+        db.add(FindingObservation(finding_id=finding.id, scan_id=scan_id))
     await db.commit()
     await db.refresh(finding)
+    
+    # Only this scan observed it; its cached listing is invalidated when it finishes
+    await response_cache.invalidate("entity", entity_id)
     return finding
 
 
-async def _run_scan_async(scan_id: int, target: str, modules: list):
-    """Async function to run OSINT scan"""
-    async with AsyncSessionLocal() as db:
+async def _record_scan_entities(db: AsyncSession, scan_id: int, entity_ids: set) -> None:
+    """Remember the entities a scan saw, the set scan diffs compare"""
+    insert = insert_for(db)
+    ordered = sorted(entity_ids)
+    for i in range(0, len(ordered), SCAN_ENTITIES_BATCH):
+        await db.execute(
+            insert(ScanEntity)
+            .values([{"scan_id": scan_id, "entity_id": e} for e in ordered[i:i + SCAN_ENTITIES_BATCH]])
+            .on_conflict_do_nothing()
+        )
+    await db.commit()
+
+
+def _mark_failed(module_span, error) -> None:
+    """Flag a module span whose module failed without raising"""
+    if module_span is not None:
+        module_span.status = "error"
+        module_span.set_attribute("error.message", str(error))
+
+
+async def _whois_module(db: AsyncSession, scan_id: int, target: str, result: dict):
+    """WHOIS record of the target and its name servers; returns an error or None"""
+    with span("whois.lookup"):
+        whois_result = await run_whois(target)
+    if not whois_result.get("success"):
+        return whois_result.get("error")
+    whois_data = whois_result.get("data", {})
+    
+    with span("whois.store"):
+        # Create or update domain entity
+        domain_entity = await _get_or_create_entity(
+            db, scan_id, EntityType.DOMAIN, target,
+            {key: whois_data.get(key) for key in WHOIS_ATTRIBUTES}, source="whois"
+        )
+        
+        # Create finding for WHOIS data
+        finding = await _create_finding(
+            db, scan_id, domain_entity.id, "whois", "domain_info",
+            confidence_score=1.0, raw_result=whois_data
+        )
+        result["entity_ids"].append(domain_entity.id)
+        result["finding_ids"].append(finding.id)
+        
+        # Extract name servers as entities
+        name_servers = whois_data.get("name_servers", [])
+        for ns in name_servers:
+            if ns:
+                ns_entity = await _get_or_create_entity(
+                    db, scan_id, EntityType.DOMAIN, ns.lower(),
+                    metadata={"source": "whois", "type": "name_server"}
+                )
+                result["entity_ids"].append(ns_entity.id)
+                await _link_entities(
+                    db, scan_id, domain_entity.id, ns_entity.id,
+                    EdgeType.NAME_SERVER, "whois"
+                )
+    
+    await publish_scan_event(scan_id, "entities_found", "whois", count=1 + len(name_servers))
+    result["entities"], result["findings"] = 1 + len(name_servers), 1
+    return None
+
+
+async def _ssl_module(db: AsyncSession, scan_id: int, target: str, result: dict):
+    """Subdomains from certificate transparency; returns an error or None"""
+    with span("ssl.lookup"):
+        ssl_result = await run_ssl(target)
+    if not ssl_result.get("success"):
+        return ssl_result.get("error")
+    ssl_data = ssl_result.get("data", {})
+    
+    with span("ssl.store") as store_span:
+        # Create finding for SSL certificate data
+        domain_entity = await _get_or_create_entity(
+            db, scan_id, EntityType.DOMAIN, target
+        )
+        
+        finding = await _create_finding(
+            db, scan_id, domain_entity.id, "ssl", "certificate_transparency",
+            confidence_score=1.0, raw_result=ssl_data
+        )
+        result["entity_ids"].append(domain_entity.id)
+        result["finding_ids"].append(finding.id)
+        
+        # Extract subdomains as entities
+        subdomains = ssl_data.get("subdomains", [])
+        found = 0
+        for subdomain in subdomains:
+            if subdomain and subdomain != target:
+                subdomain_entity = await _get_or_create_entity(
+                    db, scan_id, EntityType.SUBDOMAIN, subdomain.lower(),
+                    metadata={"source": "ssl", "parent_domain": target}
+                )
+                result["entity_ids"].append(subdomain_entity.id)
+                await _link_entities(
+                    db, scan_id, subdomain_entity.id, domain_entity.id,
+                    EdgeType.SUBDOMAIN_OF, "ssl"
+                )
+                found += 1
+                if found % PROGRESS_EVERY == 0:
+                    await publish_scan_event(
+                        scan_id, "entities_found", "ssl", count=found
+                    )
+        if store_span is not None:
+            store_span.set_attribute("osint.subdomains", found)
+    
+    await publish_scan_event(scan_id, "entities_found", "ssl", count=found)
+    result["entities"], result["findings"] = 1 + found, 1
+    logger.info(f"SSL certificate lookup for {target} found {len(subdomains)} subdomains")
+    return None
+
+
+def _email_domain(email: str):
+    """Domain of an email address, None if it is not one"""
+    local, at, domain = email.strip().lower().rpartition("@")
+    domain = domain.rstrip(".")
+    return domain if at and local and "." in domain else None
+
+
+async def _email_entities(db: AsyncSession, scan_id: int, email: str, source: str, result: dict):
+    """The address, its domain and the edge between them (email_domain)"""
+    email_entity = await _get_or_create_entity(db, scan_id, EntityType.EMAIL, email.strip().lower())
+    domain_entity = await _get_or_create_entity(db, scan_id, EntityType.DOMAIN, _email_domain(email))
+    await _link_entities(
+        db, scan_id, email_entity.id, domain_entity.id, EdgeType.EMAIL_DOMAIN, source
+    )
+    result["entity_ids"] += [email_entity.id, domain_entity.id]
+    return email_entity, domain_entity
+
+
+async def _mx_module(db: AsyncSession, scan_id: int, target: str, result: dict):
+    """Mail servers of an email's domain (shared by its addresses); returns an error or None"""
+    domain = _email_domain(target)
+    if domain is None:
+        return f"Not an email address: {target}"
+    with span("mx.lookup") as lookup_span:
+        mx_result = await domain_lookups.get("mx", domain, lambda: run_mx(domain))
+        if lookup_span is not None:
+            lookup_span.set_attribute("osint.shared", bool(mx_result.get("shared")))
+    if not mx_result.get("success"):
+        return mx_result.get("error")
+    mx_data = mx_result.get("data", {})
+    
+    with span("mx.store"):
+        _, domain_entity = await _email_entities(db, scan_id, target, "mx", result)
+        finding = await _create_finding(
+            db, scan_id, domain_entity.id, "mx", "mail_servers",
+            confidence_score=1.0, raw_result=mx_data
+        )
+        result["finding_ids"].append(finding.id)
+        
+        # Mail servers as entities
+        hosts = [mx["host"] for mx in mx_data.get("mx", []) if mx.get("host")]
+        for host in hosts:
+            host_entity = await _get_or_create_entity(
+                db, scan_id, EntityType.DOMAIN, host,
+                metadata={"source": "mx", "type": "mail_server"}
+            )
+            result["entity_ids"].append(host_entity.id)
+            await _link_entities(
+                db, scan_id, domain_entity.id, host_entity.id, EdgeType.MAIL_SERVER, "mx"
+            )
+    
+    await publish_scan_event(scan_id, "entities_found", "mx", count=2 + len(hosts))
+    result["entities"], result["findings"] = 2 + len(hosts), 1
+    return None
+
+
+async def _mail_auth_module(db: AsyncSession, scan_id: int, target: str, result: dict):
+    """SPF and DMARC policies of an email's domain (shared); returns an error or None"""
+    domain = _email_domain(target)
+    if domain is None:
+        return f"Not an email address: {target}"
+    with span("mail_auth.lookup") as lookup_span:
+        auth_result = await domain_lookups.get("mail_auth", domain, lambda: run_mail_auth(domain))
+        if lookup_span is not None:
+            lookup_span.set_attribute("osint.shared", bool(auth_result.get("shared")))
+    if not auth_result.get("success"):
+        return auth_result.get("error")
+    
+    with span("mail_auth.store"):
+        _, domain_entity = await _email_entities(db, scan_id, target, "mail_auth", result)
+        finding = await _create_finding(
+            db, scan_id, domain_entity.id, "mail_auth", "spf_dmarc",
+            confidence_score=1.0, raw_result=auth_result.get("data", {})
+        )
+        result["finding_ids"].append(finding.id)
+    
+    result["entities"], result["findings"] = 2, 1
+    return None
+
+
+async def _hibp_module(db: AsyncSession, scan_id: int, target: str, result: dict):
+    """Breaches the address appears in; returns an error or None"""
+    if _email_domain(target) is None:
+        return f"Not an email address: {target}"
+    with span("hibp.lookup"):
+        hibp_result = await run_hibp(target.strip().lower())
+    if not hibp_result.get("success"):
+        return hibp_result.get("error")
+    hibp_data = hibp_result.get("data", {})
+    
+    with span("hibp.store"):
+        email_entity, _ = await _email_entities(db, scan_id, target, "hibp", result)
+        finding = await _create_finding(
+            db, scan_id, email_entity.id, "hibp", "breaches",
+            confidence_score=1.0, raw_result=hibp_data
+        )
+        result["finding_ids"].append(finding.id)
+    
+    logger.info(f"HIBP lookup for {target} found {hibp_data.get('breach_count', 0)} breaches")
+    result["entities"], result["findings"] = 2, 1
+    return None
+
+
+# Scan modules, in the order an inline run executes them
+MODULES = {
+    "whois": _whois_module,
+    "ssl": _ssl_module,
+    "mx": _mx_module,
+    "mail_auth": _mail_auth_module,
+    "hibp": _hibp_module,
+}
+
+# Modules of each scan type, all run when a scan names none
+PIPELINES = {
+    ScanType.EMAIL: ["mx", "mail_auth", "hibp"],
+}
+
+# Modules of the other scan types
+DEFAULT_MODULES = ["whois", "ssl"]
+
+
+def _configured(module: str) -> bool:
+    """Modules needing an API key are skipped without one"""
+    return module != "hibp" or bool(settings.HIBP_API_KEY)
+
+
+def _scan_modules(modules: list, scan_type: ScanType = ScanType.DOMAIN) -> list:
+    """Known modules of a scan request, in run order"""
+    available = PIPELINES.get(scan_type, DEFAULT_MODULES)
+    modules = modules or available
+    return [name for name in available if name in modules and _configured(name)]
+
+
+def module_queue(module: str) -> str:
+    """Celery queue a module's subtasks are routed to"""
+    return settings.SCAN_MODULE_QUEUES.get(module, settings.SCAN_MODULE_DEFAULT_QUEUE)
+
+
+async def _start_scan(db: AsyncSession, scan_id: int, target: str, modules: list) -> dict:
+    """Mark the scan running; returns the timeline of this stage"""
+    with start_trace("scan.start", **{"osint.scan.id": scan_id, "osint.scan.target": target}) as trace:
+        started_at = datetime.utcnow()
+        await _update_scan_status(db, scan_id, ScanStatus.RUNNING, started_at=started_at)
+        logger.info(f"Starting scan {scan_id} for target {target}")
+        await publish_scan_event(scan_id, "scan_started", target=target, modules=modules)
+    return trace.timeline()
+
+
+class ModuleBusy(Exception):
+    """Another attempt of the module holds its claim"""
+
+    def __init__(self, scan_id: int, module: str, retry_in: float):
+        super().__init__(f"{module} of scan {scan_id} is already running")
+        self.retry_in = retry_in
+
+
+async def _claim_module(db: AsyncSession, scan_id: int, module: str):
+    """
+    Checkpointed result of a module this scan already ran successfully
+
+    Otherwise records a new attempt of the module and returns None with
+    the attempt number. An attempt still running within SCAN_MODULE_LEASE
+    keeps its claim: ModuleBusy is raised instead of running the module
+    twice at once.
+    """
+    run = (await db.execute(
+        select(ScanModuleRun).where(ScanModuleRun.scan_id == scan_id, ScanModuleRun.module == module)
+    )).scalar_one_or_none()
+    if run is not None and run.status == "success":
+        return run.result, run.attempts
+    now = datetime.utcnow()
+    lease = timedelta(seconds=settings.SCAN_MODULE_LEASE)
+    insert = insert_for(db)
+    claimed = await db.execute(
+        insert(ScanModuleRun)
+        .values(scan_id=scan_id, module=module, status="running", attempts=1, started_at=now)
+        .on_conflict_do_update(
+            index_elements=[ScanModuleRun.scan_id, ScanModuleRun.module],
+            set_={
+                "status": "running",
+                "attempts": ScanModuleRun.attempts + 1,
+                "started_at": now,
+                "finished_at": None,
+            },
+            # Not over a live attempt; one past its lease was abandoned
+            where=or_(ScanModuleRun.status != "running", ScanModuleRun.started_at < now - lease),
+        )
+    )
+    if claimed.rowcount == 0:
+        started_at = run.started_at.replace(tzinfo=None) if run is not None and run.started_at else now
+        await db.rollback()
+        raise ModuleBusy(scan_id, module, max((started_at + lease - now).total_seconds(), 1))
+    attempts = (await db.execute(
+        select(ScanModuleRun.attempts)
+        .where(ScanModuleRun.scan_id == scan_id, ScanModuleRun.module == module)
+    )).scalar_one()
+    await db.commit()
+    return None, attempts
+
+
+async def _checkpoint_module(db: AsyncSession, scan_id: int, result: dict, attempt: int) -> None:
+    """
+    Save the outcome of a module run (without its timeline)
+
+    Only while the run still holds its claim: an attempt taken over after
+    its lease expired does not overwrite the newer one.
+    """
+    await db.execute(
+        update(ScanModuleRun)
+        .where(
+            ScanModuleRun.scan_id == scan_id,
+            ScanModuleRun.module == result["module"],
+            ScanModuleRun.attempts == attempt,
+        )
+        .values(
+            status=result["status"],
+            result={k: v for k, v in result.items() if k != "timeline"},
+            finished_at=datetime.utcnow(),
+        )
+    )
+    await db.commit()
+
+
+async def _run_module(
+    db: AsyncSession,
+    scan_id: int,
+    target: str,
+    module: str,
+    trace_id: str = None,
+) -> dict:
+    """
+    Run one module of a scan
+
+    Never raises: the outcome is returned as a JSON-serializable result
+    (status, error, ids of the entities and findings seen, counts and the
+    module's timeline) for _finish_scan to aggregate.
+
+    The outcome is checkpointed in scan_module_runs. A module that already
+    succeeded for this scan (a Celery redelivery, a resumed scan) returns
+    its checkpointed result without running again; failed or interrupted
+    ones run again, and their writes are idempotent. ModuleBusy is raised
+    while another attempt of the module is running.
+    """
+    result = {
+        "module": module, "status": "success", "error": None,
+        "entity_ids": [], "finding_ids": [], "entities": 0, "findings": 0,
+    }
+    with start_trace(f"module.{module}", trace_id, **{"osint.scan.id": scan_id}) as trace:
+        module_span = trace.spans[0]
+        module_started = time.perf_counter()
+        checkpointed = attempt = None
         try:
-            # Update scan status to running
-            started_at = datetime.utcnow()
-            await _update_scan_status(db, scan_id, ScanStatus.RUNNING, started_at=started_at)
-            logger.info(f"Starting scan {scan_id} for target {target}")
-            
-            # Default modules if none specified
-            if not modules:
-                modules = ["whois", "ssl"]
-            
-            # Run WHOIS module
-            if "whois" in modules:
-                try:
-                    logger.info(f"Running WHOIS for {target}")
-                    whois_result = await run_whois(target)
-                    
-                    if whois_result.get("success"):
-                        whois_data = whois_result.get("data", {})
-                        
-                        # Create or update domain entity
-                        domain_entity = await _get_or_create_entity(
-                            db, scan_id, EntityType.DOMAIN, target, whois_data
-                        )
-                        
-                        # Create finding for WHOIS data
-                        await _create_finding(
-                            db, domain_entity.id, "whois", "domain_info",
-                            confidence_score=1.0, raw_result=whois_data
-                        )
-                        
-                        # Extract name servers as entities
-                        name_servers = whois_data.get("name_servers", [])
-                        for ns in name_servers:
-                            if ns:
-                                await _get_or_create_entity(
-                                    db, scan_id, EntityType.DOMAIN, ns.lower(),
-                                    metadata={"source": "whois", "type": "name_server"}
-                                )
-                        
-                        logger.info(f"WHOIS completed for {target}")
-                    else:
-                        logger.warning(f"WHOIS failed for {target}: {whois_result.get('error')}")
-                        
-                except Exception as e:
-                    logger.error(f"Error running WHOIS for {target}: {e}", exc_info=True)
-            
-            # Run SSL certificate module
-            if "ssl" in modules:
-                try:
-                    logger.info(f"Running SSL certificate lookup for {target}")
-                    ssl_result = await run_ssl(target)
-                    
-                    if ssl_result.get("success"):
-                        ssl_data = ssl_result.get("data", {})
-                        
-                        # Create finding for SSL certificate data
-                        domain_entity = await _get_or_create_entity(
-                            db, scan_id, EntityType.DOMAIN, target
-                        )
-                        
-                        await _create_finding(
-                            db, domain_entity.id, "ssl", "certificate_transparency",
-                            confidence_score=1.0, raw_result=ssl_data
-                        )
-                        
-                        # Extract subdomains as entities
-                        subdomains = ssl_data.get("subdomains", [])
-                        for subdomain in subdomains:
-                            if subdomain and subdomain != target:
-                                await _get_or_create_entity(
-                                    db, scan_id, EntityType.SUBDOMAIN, subdomain.lower(),
-                                    metadata={"source": "ssl", "parent_domain": target}
-                                )
-                        
-                        logger.info(f"SSL certificate lookup completed for {target}, found {len(subdomains)} subdomains")
-                    else:
-                        logger.warning(f"SSL lookup failed for {target}: {ssl_result.get('error')}")
-                        
-                except Exception as e:
-                    logger.error(f"Error running SSL lookup for {target}: {e}", exc_info=True)
-            
-            # Update scan status to completed
-            finished_at = datetime.utcnow()
-            await _update_scan_status(db, scan_id, ScanStatus.COMPLETED, finished_at=finished_at)
-            logger.info(f"Scan {scan_id} completed successfully")
+            checkpointed, attempt = await _claim_module(db, scan_id, module)
+            if checkpointed is not None:
+                result.update(checkpointed)
+                if module_span is not None:
+                    module_span.set_attribute("osint.checkpointed", True)
+                logger.info(f"{module} already completed for scan {scan_id}, reusing its checkpoint")
+                await publish_scan_event(scan_id, "module_finished", module, checkpointed=True)
+            else:
+                logger.info(f"Running {module} for {target}")
+                await publish_scan_event(scan_id, "module_started", module)
+                error = await MODULES[module](db, scan_id, target, result)
+                if error is None:
+                    await publish_scan_event(scan_id, "module_finished", module)
+                    record_written(module, entities=result["entities"], findings=result["findings"])
+                    logger.info(f"{module} completed for {target}")
+                else:
+                    logger.warning(f"{module} failed for {target}: {error}")
+                    result.update(status="failure", error=error)
+        except ModuleBusy:
+            raise
+        except Exception as e:
+            logger.error(f"Error running {module} for {target}: {e}", exc_info=True)
+            await db.rollback()
+            result.update(status="error", error=str(e))
+        if checkpointed is None and attempt is not None:
+            record_module(module, result["status"], module_started)
+            try:
+                await _checkpoint_module(db, scan_id, result, attempt)
+            except Exception as e:
+                logger.error(f"Failed to checkpoint {module} of scan {scan_id}: {e}", exc_info=True)
+                await db.rollback()
+        if result["error"] is not None:
+            _mark_failed(module_span, result["error"])
+            await publish_scan_event(scan_id, "module_failed", module, error=result["error"])
+    result["timeline"] = trace.timeline()
+    return result
+
+
+async def _finish_scan(
+    db: AsyncSession,
+    scan_id: int,
+    target: str,
+    results: list,
+    start_timeline: dict = None,
+) -> ScanStatus:
+    """
+    Aggregate the module results and set the final status
+
+    The scan fails when every module it ran failed. Otherwise it completes,
+    records the entities its modules saw and, for a watchlist scan, the
+    changes since the entry's previous run. The stage timelines are merged
+    into the scan's.
+    """
+    trace_id = start_timeline["trace_id"] if start_timeline else None
+    with start_trace("scan.finish", trace_id, **{"osint.scan.id": scan_id}) as trace:
+        failed = [r["module"] for r in results if r["status"] != "success"]
+        status = ScanStatus.FAILED if results and len(failed) == len(results) else ScanStatus.COMPLETED
+        entity_ids = {e for r in results for e in r["entity_ids"]}
+        finding_ids = {f for r in results for f in r["finding_ids"]}
+        
+        if status == ScanStatus.COMPLETED:
+            with span("scan.entities"):
+                await _record_scan_entities(db, scan_id, entity_ids)
             
+            watchlist_id = (await db.execute(
+                select(Scan.watchlist_id).where(Scan.id == scan_id)
+            )).scalar_one_or_none()
+            if watchlist_id is not None:
+                with span("scan.changes"):
+                    changes = await record_changes(
+                        db, watchlist_id, scan_id, entity_ids, finding_ids, complete=not failed,
+                    )
+                    await publish_scan_event(scan_id, "changes_recorded", changes=changes)
+        
+        with span("scan.status"):
+            timeline = combine(
+                "scan",
+                [start_timeline, *(r.get("timeline") for r in results), trace.timeline()],
+                **{"osint.scan.id": scan_id, "osint.scan.target": target},
+            )
+            await _update_scan_status(
+                db, scan_id, status, finished_at=datetime.utcnow(), timeline=timeline,
+            )
+            if status == ScanStatus.COMPLETED:
+                await publish_scan_event(scan_id, "scan_completed")
+            else:
+                await publish_scan_event(scan_id, "scan_failed", error=f"All modules failed: {', '.join(failed)}")
+    SCAN_ENTITIES.observe(sum(r["entities"] for r in results))
+    SCAN_FINDINGS.observe(sum(r["findings"] for r in results))
+    logger.info(f"Scan {scan_id} {status.value}")
+    return status
+
+
+async def _fail_scan(db: AsyncSession, scan_id: int, error: str, timelines: list = ()) -> None:
+    """Mark a scan failed by an error outside its modules"""
+    try:
+        await db.rollback()
+        await _update_scan_status(
+            db, scan_id, ScanStatus.FAILED, finished_at=datetime.utcnow(),
+            timeline=combine("scan", list(timelines), **{"osint.scan.id": scan_id}),
+        )
+        await publish_scan_event(scan_id, "scan_failed", error=error)
+    except Exception as update_error:
+        logger.error(f"Failed to update scan status: {update_error}", exc_info=True)
+
+
+async def _run_scan_async(
+    scan_id: int,
+    target: str,
+    modules: list,
+    scan_type: ScanType = ScanType.DOMAIN,
+):
+    """
+    Run a whole scan in this process: start, every module, finish
+
+    The same stages the Celery chord of scan_domain_task distributes; used
+    where no workers are involved (tests, benchmarks). Each stage is traced
+    (app.core.tracing) and the merged timeline is saved on the scan.
+    """
+    modules = _scan_modules(modules, scan_type)
+    async with AsyncSessionLocal() as db:
+        timelines = []
+        try:
+            timelines.append(await _start_scan(db, scan_id, target, modules))
+            results = []
+            for module in modules:
+                results.append(await _run_module(db, scan_id, target, module, timelines[0]["trace_id"]))
+                timelines.append(results[-1]["timeline"])
+            await _finish_scan(db, scan_id, target, results, timelines[0])
         except Exception as e:
             logger.error(f"Error in scan {scan_id}: {e}", exc_info=True)
-            # Update scan status to failed
-            try:
-                finished_at = datetime.utcnow()
-                await _update_scan_status(db, scan_id, ScanStatus.FAILED, finished_at=finished_at)
-            except Exception as update_error:
-                logger.error(f"Failed to update scan status: {update_error}", exc_info=True)
+            await _fail_scan(db, scan_id, str(e), timelines)
+            raise
+
+
+async def _start_scan_async(scan_id: int, target: str, modules: list) -> dict:
+    async with AsyncSessionLocal() as db:
+        try:
+            return await _start_scan(db, scan_id, target, modules)
+        except Exception as e:
+            await _fail_scan(db, scan_id, str(e))
+            raise
+
+
+async def _run_module_async(scan_id: int, target: str, module: str, trace_id: str) -> dict:
+    async with AsyncSessionLocal() as db:
+        return await _run_module(db, scan_id, target, module, trace_id)
+
+
+async def _finish_scan_async(scan_id: int, target: str, results: list, start_timeline: dict) -> str:
+    async with AsyncSessionLocal() as db:
+        try:
+            return (await _finish_scan(db, scan_id, target, results, start_timeline)).value
+        except Exception as e:
+            timelines = [start_timeline, *(r.get("timeline") for r in results)]
+            await _fail_scan(db, scan_id, str(e), timelines)
             raise
 
 
+async def _fail_scan_async(scan_id: int, error: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await _fail_scan(db, scan_id, error)
+
+
+def _dispatch_scan(
+    scan_id: int,
+    target: str,
+    modules: list,
+    scan_type: ScanType = ScanType.DOMAIN,
+) -> None:
+    """
+    Mark the scan running and fan its modules out as a chord
+
+    Each module runs as a run_module subtask on its own queue
+    (module_queue); finish_scan receives all their results.
+    """
+    modules = _scan_modules(modules, scan_type)
+    start_timeline = run_async(_start_scan_async(scan_id, target, modules))
+    callback = finish_scan_task.s(scan_id, target, start_timeline).on_error(scan_failed_task.s(scan_id))
+    if not modules:
+        callback.delay([])
+        return
+    chord(
+        run_module_task.si(scan_id, target, module, start_timeline["trace_id"]).set(queue=module_queue(module))
+        for module in modules
+    )(callback)
+    logger.info(f"Dispatched scan {scan_id} modules: {', '.join(modules)}")
+
+
 @celery_app.task(name="scan_domain", bind=True)
 def scan_domain_task(self, scan_id: int, target: str, modules: list):
     """
-    Background task to run OSINT scan on a domain
+    Background task starting an OSINT scan of a domain
     
     Args:
         scan_id: Scan database ID
@@ -233,10 +856,7 @@ def scan_domain_task(self, scan_id: int, target: str, modules: list):
         modules: List of modules to run
     """
     try:
-        # Run async scan function
-        # Use asyncio.run() which creates a new event loop
-        # Celery tasks run in separate processes, so this should work
-        asyncio.run(_run_scan_async(scan_id, target, modules))
+        _dispatch_scan(scan_id, target, modules)
     except Exception as e:
         logger.error(f"Celery task failed for scan {scan_id}: {e}", exc_info=True)
         raise
@@ -245,19 +865,49 @@ def scan_domain_task(self, scan_id: int, target: str, modules: list):
 @celery_app.task(name="scan_email", bind=True)
 def scan_email_task(self, scan_id: int, target: str, modules: list):
     """
-    Background task to run OSINT scan on an email
+    Background task starting an OSINT scan of an email
     
     Args:
         scan_id: Scan database ID
         target: Email to scan
         modules: List of modules to run
     """
-    # For now, email scans use the same logic as domain scans
-    # TODO: Implement email-specific OSINT modules
     try:
-        asyncio.run(_run_scan_async(scan_id, target, modules))
+        _dispatch_scan(scan_id, target, modules, ScanType.EMAIL)
     except Exception as e:
         logger.error(f"Celery task failed for email scan {scan_id}: {e}", exc_info=True)
         raise
 
 
+# Subtasks are acknowledged once done, so a worker dying mid-module gets
+# them redelivered; checkpoints skip what already finished
+@celery_app.task(name="run_module", bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=None)
+def run_module_task(self, scan_id: int, target: str, module: str, trace_id: str = None):
+    """
+    One module of a scan; routed to the module's queue
+
+    A redelivery while the first delivery still runs the module waits for
+    it: the subtask is retried until that attempt finishes (its checkpoint
+    is then reused) or its lease expires.
+    """
+    try:
+        return run_async(_run_module_async(scan_id, target, module, trace_id))
+    except ModuleBusy as e:
+        raise self.retry(exc=e, countdown=min(e.retry_in, 60))
+
+
+@celery_app.task(name="finish_scan", acks_late=True, reject_on_worker_lost=True)
+def finish_scan_task(results: list, scan_id: int, target: str, start_timeline: dict = None):
+    """Chord callback: aggregate the module results and set the scan status"""
+    try:
+        return run_async(_finish_scan_async(scan_id, target, results, start_timeline))
+    except Exception as e:
+        logger.error(f"Finishing scan {scan_id} failed: {e}", exc_info=True)
+        raise
+
+
+@celery_app.task(name="scan_failed")
+def scan_failed_task(request, exc, traceback, scan_id: int):
+    """Chord error callback: a subtask or the callback itself raised"""
+    logger.error(f"Scan {scan_id} failed in task {request.id}: {exc}")
+    run_async(_fail_scan_async(scan_id, str(exc)))
@@ -0,0 +1,107 @@
+"""
+Watchlist scheduling task
+
+Runs every WATCHLIST_TICK_SECONDS from Celery beat. Each tick queues the
+entries that are due, oldest first, as long as fewer than
+WATCHLIST_MAX_CONCURRENT watchlist scans are queued or running; whatever
+is left waits for a later tick. Queued scans start at a random point
+within the tick rather than all at its beginning.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, run_async
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.models.watchlist import WatchlistEntry
+from app.services.watchlist import next_run_at
+from app.tasks.scan import celery_app, scan_domain_task, scan_email_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def active_scans(db: AsyncSession, now: datetime) -> int:
+    """Watchlist scans counted against WATCHLIST_MAX_CONCURRENT"""
+    return (await db.execute(
+        select(func.count(Scan.id)).where(
+            Scan.watchlist_id.is_not(None),
+            Scan.status.in_([ScanStatus.QUEUED, ScanStatus.RUNNING]),
+            Scan.created_at >= now - timedelta(seconds=settings.WATCHLIST_STALE_AFTER),
+        )
+    )).scalar_one()
+
+
+async def schedule_due(
+    db: AsyncSession,
+    now: Optional[datetime] = None,
+    rng: Optional[random.Random] = None,
+) -> List[int]:
+    """Create and queue the scans of due entries; returns their ids"""
+    now = now or datetime.now(timezone.utc)
+    rng = rng or random.Random()
+    budget = settings.WATCHLIST_MAX_CONCURRENT - await active_scans(db, now)
+    if budget <= 0:
+        logger.info("Watchlist: concurrency cap reached, nothing queued")
+        return []
+
+    # SKIP LOCKED lets overlapping ticks share the due entries
+    entries = (await db.execute(
+        select(WatchlistEntry)
+        .where(WatchlistEntry.enabled.is_(True), WatchlistEntry.next_run_at <= now)
+        .order_by(WatchlistEntry.next_run_at)
+        .limit(budget)
+        .with_for_update(skip_locked=True)
+    )).scalars().all()
+
+    scans = []
+    for entry in entries:
+        scan = Scan(
+            target=entry.target,
+            type=entry.type,
+            status=ScanStatus.QUEUED,
+            settings={"modules": entry.modules or []},
+            watchlist_id=entry.id,
+            created_at=now,
+        )
+        db.add(scan)
+        scans.append(scan)
+        entry.last_run_at = now
+        entry.next_run_at = next_run_at(entry.next_run_at, entry.interval_seconds, now, rng)
+    await db.commit()
+
+    # Queue after commit so workers find the scan rows
+    for scan in scans:
+        task = scan_email_task if scan.type == ScanType.EMAIL else scan_domain_task
+        try:
+            task.apply_async(
+                (scan.id, scan.target, scan.settings["modules"]),
+                countdown=rng.uniform(0, settings.WATCHLIST_TICK_SECONDS),
+            )
+        except Exception as e:
+            logger.error(f"Watchlist: failed to queue scan {scan.id} of {scan.target}: {e}")
+            scan.status = ScanStatus.FAILED
+            scan.finished_at = now
+    await db.commit()
+    if scans:
+        logger.info(f"Watchlist: queued {len(scans)} scans ({budget - len(scans)} slots left)")
+    return [scan.id for scan in scans]
+
+
+async def _schedule_watchlist_async() -> List[int]:
+    async with AsyncSessionLocal() as db:
+        return await schedule_due(db)
+
+
+@celery_app.task(name="schedule_watchlist")
+def schedule_watchlist_task():
+    """Queue the watchlist rescans that are due"""
+    try:
+        return run_async(_schedule_watchlist_async())
+    except Exception as e:
+        logger.error(f"Watchlist scheduling failed: {e}", exc_info=True)
+        raise
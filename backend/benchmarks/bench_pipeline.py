@@ -0,0 +1,314 @@
+"""
+Offline benchmark of the scan pipeline and the API hot paths
+
+Runs against local stand-ins only (benchmarks.fakes): crt.sh answers served
+by an httpx mock transport, a fake WHOIS record, a fake Ollama server, and
+SQLite, or the PostgreSQL database given with --database-url. It measures:
+
+    scan      end-to-end scan time per crt.sh answer size, with the phase
+              breakdown recorded by the scan's trace
+    upserts   entity upserts per second, one by one as scans write them and
+              in chunks as the bulk import does
+    ssl       run_ssl time and peak Python memory per crt.sh answer size
+    api       search and get_scan latency (p50/p99)
+    llm       summary round trip through LLMRunner to the fake Ollama
+
+Results are written as JSON to benchmarks/results/ (or --output), with the
+commit, interpreter and database they were taken on. --compare prints the
+change of every timing, throughput and memory figure against an earlier
+results file, and --fail-over makes regressions beyond a percentage fail
+the run.
+
+Use a scratch database with --database-url: benchmark rows are left in it.
+
+Usage:
+    python -m benchmarks.bench_pipeline --quick
+    python -m benchmarks.bench_pipeline --only upserts --upsert-sizes 10000,100000,1000000
+    python -m benchmarks.bench_pipeline --compare benchmarks/results/pipeline-20261019T090000.json
+"""
+import argparse
+import asyncio
+import functools
+import io
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import List, Optional
+from unittest import mock
+
+import httpx
+import orjson
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.tracing import trace_engine, waterfall
+from app.db.database import Base, get_db, get_read_db
+from app.models.entity import Entity, EntityType
+from app.models.scan import Scan, ScanType
+from app.services.importer import import_stream
+from app.services.osint.ssl import run_ssl
+from app.tasks import scan as scan_tasks
+from benchmarks.bench_serialization import _populate
+from benchmarks.fakes import FakeOllama, crtsh_payload, crtsh_transport, load_recorded, offline
+from benchmarks.reporting import compare, environment, latency, load, regressions, save
+
+SECTIONS = ("scan", "upserts", "ssl", "api", "llm")
+
+
+def _sizes(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+async def bench_scan(session_factory, certificate_counts: List[int], recorded: Optional[bytes]) -> dict:
+    """End-to-end scans (WHOIS + SSL) against the stand-ins"""
+    answers = {str(n): orjson.dumps(crtsh_payload("example.com", n)) for n in certificate_counts}
+    if recorded is not None:
+        answers["recorded"] = recorded
+    results = {}
+    for label, body in answers.items():
+        async with session_factory() as db:
+            scan = Scan(target=f"scan-{label}.example.com", type=ScanType.DOMAIN)
+            db.add(scan)
+            await db.commit()
+
+        async with httpx.AsyncClient(transport=crtsh_transport(body)) as client:
+            run = functools.partial(run_ssl, client=client)
+            started = time.perf_counter()
+            with mock.patch.object(scan_tasks, "run_ssl", run):
+                await scan_tasks._run_scan_async(scan.id, scan.target, ["whois", "ssl"])
+            elapsed = time.perf_counter() - started
+
+        async with session_factory() as db:
+            scan = (await db.execute(select(Scan).where(Scan.id == scan.id))).scalar_one()
+            entities = (await db.execute(
+                select(func.count()).select_from(Entity).where(Entity.scan_id == scan.id)
+            )).scalar_one()
+        results[label] = {
+            "status": scan.status.value,
+            "payload_bytes": len(body),
+            "entities": entities,
+            "total_s": round(elapsed, 4),
+            "phases": {
+                s["name"]: {"duration_ms": s["duration_ms"], "self_ms": s["self_ms"]}
+                for s in waterfall(scan.timeline)["spans"] if s["depth"] > 0
+            },
+        }
+    return results
+
+
+async def bench_upserts(session_factory, sizes: List[int], scan_limit: int) -> dict:
+    """
+    Entity upserts per second through the scan and bulk import paths
+
+    The scan path commits every row, so sizes over `scan_limit` only go
+    through the import.
+    """
+    results = {}
+    for size in sizes:
+        async with session_factory() as db:
+            if size <= scan_limit:
+                scan = Scan(target=f"upserts-{size}.example.com", type=ScanType.DOMAIN)
+                db.add(scan)
+                await db.commit()
+
+                # As the SSL module stores subdomains: one upsert and commit each
+                started = time.perf_counter()
+                for i in range(size):
+                    await scan_tasks._get_or_create_entity(
+                        db, scan.id, EntityType.SUBDOMAIN, f"host{i}.{scan.target}",
+                        metadata={"source": "ssl", "parent_domain": scan.target},
+                    )
+                elapsed = time.perf_counter() - started
+                results[f"scan/{size}"] = {
+                    "rows": size, "total_s": round(elapsed, 3), "rows_per_s": round(size / elapsed),
+                }
+
+            # The same number of new entities through the chunked import
+            data = b"".join(
+                orjson.dumps({"type": "subdomain", "value": f"host{i}.import-{size}.example.com"})
+                + b"\n"
+                for i in range(size)
+            )
+            started = time.perf_counter()
+            report = await import_stream(db, io.BytesIO(data), "ndjson")
+            elapsed = time.perf_counter() - started
+            results[f"import/{size}"] = {
+                "rows": report.entities, "total_s": round(elapsed, 3),
+                "rows_per_s": round(size / elapsed),
+            }
+    return results
+
+
+async def bench_ssl(certificate_counts: List[int], recorded: Optional[bytes], repeat: int) -> dict:
+    """run_ssl wall time and peak Python allocations per crt.sh answer size"""
+    answers = {str(n): orjson.dumps(crtsh_payload("example.com", n)) for n in certificate_counts}
+    if recorded is not None:
+        answers["recorded"] = recorded
+    results = {}
+    for label, body in answers.items():
+        async with httpx.AsyncClient(transport=crtsh_transport(body)) as client:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                result = await run_ssl("example.com", client)
+                timings.append(time.perf_counter() - started)
+            tracemalloc.start()
+            await run_ssl("example.com", client)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        results[label] = {
+            "payload_bytes": len(body),
+            "subdomains": len(result["data"]["subdomains"]),
+            "p50_ms": latency(timings)["p50_ms"],
+            "peak_memory_mb": round(peak / 1_000_000, 2),
+        }
+    return results
+
+
+async def bench_api(session_factory, entities: int, requests: int) -> dict:
+    """Latency of search and get_scan through the ASGI app"""
+    from main import app
+
+    async with session_factory() as db:
+        scan_id = await _populate(db, entities, certificates=5)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    queries = ["host1", "host42.example", "example.com", "no-such-host"]
+    pages = [{}, {"include": "metadata,raw_result"}, {"entities_limit": 500}]
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+            timings = {"search": [], "get_scan": []}
+            for i in range(requests):
+                started = time.perf_counter()
+                response = await client.get(
+                    "/api/v1/search", params={"q": queries[i % len(queries)], "limit": 20}
+                )
+                timings["search"].append(time.perf_counter() - started)
+                response.raise_for_status()
+
+                started = time.perf_counter()
+                response = await client.get(f"/api/v1/scan/{scan_id}", params=pages[i % len(pages)])
+                timings["get_scan"].append(time.perf_counter() - started)
+                response.raise_for_status()
+    finally:
+        app.dependency_overrides.clear()
+    return {"entities": entities, **{name: latency(t) for name, t in timings.items()}}
+
+
+async def bench_llm(requests: int) -> dict:
+    """Summary round trips through LLMRunner to the fake Ollama"""
+    from app.services.llm.runner import LLMRunner
+
+    context = " ".join(f"host{i}.example.com" for i in range(500))
+    with FakeOllama() as ollama, mock.patch.object(settings, "OLLAMA_BASE_URL", ollama.base_url), \
+            mock.patch.object(settings, "LLM_BACKEND", "ollama"):
+        runner = LLMRunner()
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            await runner.generate_summary(context, "Summarize the exposure of: {context}")
+            timings.append(time.perf_counter() - started)
+    return {"generate": latency(timings)}
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Run the selected sections"""
+    tmpdir = tempfile.TemporaryDirectory(prefix="bench-")
+    url = args.database_url or f"sqlite+aiosqlite:///{tmpdir.name}/bench.db"
+    engine = create_async_engine(url)
+    trace_engine(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    recorded = load_recorded(args.crtsh_fixture) if args.crtsh_fixture else None
+
+    results = {}
+    try:
+        with offline(), mock.patch.object(scan_tasks, "AsyncSessionLocal", session_factory):
+            if "scan" in args.only:
+                results["scan"] = await bench_scan(session_factory, args.scan_certificates, recorded)
+            if "upserts" in args.only:
+                results["upserts"] = await bench_upserts(
+                    session_factory, args.upsert_sizes, args.scan_upsert_limit
+                )
+            if "ssl" in args.only:
+                results["ssl"] = await bench_ssl(args.ssl_certificates, recorded, args.repeat)
+            if "api" in args.only:
+                results["api"] = await bench_api(session_factory, args.api_entities, args.requests)
+            if "llm" in args.only:
+                results["llm"] = await bench_llm(args.requests)
+        database = engine.dialect.name
+    finally:
+        await engine.dispose()
+        tmpdir.cleanup()
+
+    return {
+        "benchmark": "pipeline",
+        "started_at": args.started_at.isoformat(),
+        "environment": environment(database=database),
+        "parameters": {
+            key: value for key, value in vars(args).items()
+            if key not in ("started_at", "compare", "output", "database_url")
+        },
+        "results": results,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", default=",".join(SECTIONS),
+                        help=f"Comma-separated sections among: {', '.join(SECTIONS)}")
+    parser.add_argument("--quick", action="store_true",
+                        help="Small sizes, for a smoke run")
+    parser.add_argument("--database-url", help="Default: a temporary SQLite file")
+    parser.add_argument("--crtsh-fixture", help="Recorded crt.sh JSON answer to replay as well")
+    parser.add_argument("--scan-certificates", default="10,100,1000")
+    parser.add_argument("--upsert-sizes", default="10000,100000,1000000")
+    parser.add_argument("--scan-upsert-limit", type=int, default=10000,
+                        help="Largest size also run through the scan's per-row path")
+    parser.add_argument("--ssl-certificates", default="100,1000,10000,50000")
+    parser.add_argument("--api-entities", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200,
+                        help="Requests per API and LLM latency measurement")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/pipeline-<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    parser.add_argument("--fail-over", type=float,
+                        help="Exit with 1 when a figure got worse by more than this percentage")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.scan_certificates, args.upsert_sizes = "10,100", "1000"
+        args.ssl_certificates, args.api_entities, args.requests = "100,1000", 1000, 50
+    args.only = [s.strip() for s in args.only.split(",") if s.strip()]
+    unknown = set(args.only) - set(SECTIONS)
+    if unknown:
+        parser.error(f"Unknown sections: {', '.join(sorted(unknown))}")
+    for name in ("scan_certificates", "upsert_sizes", "ssl_certificates"):
+        setattr(args, name, _sizes(getattr(args, name)))
+    args.started_at = datetime.now(timezone.utc)
+
+    result = asyncio.run(run(args))
+
+    output = save(result, args.output)
+    print(orjson.dumps(result["results"], option=orjson.OPT_INDENT_2).decode())
+    print(f"Results written to {output}")
+
+    if args.compare:
+        worse = regressions(compare(load(args.compare), result), args.fail_over)
+        for path, change in worse:
+            print(f"Regression: {path} is {change:.1f}% worse", file=sys.stderr)
+        return 1 if worse else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Serialization benchmark for scan payloads
+
+Compares the original response path (ORM hydration, jsonable_encoder and
+stdlib json) with the current one (column projection and orjson) on a large
+synthetic scan held in an in-memory SQLite database.
+
+Usage:
+    python -m benchmarks.bench_serialization --entities 20000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from app.db.database import Base
+from app.models.entity import Entity, EntityType
+from app.models.finding import Finding
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.api.v1.endpoints.scan import _entity_query, _finding_query, _row_dict
+from app.services.attributes import hydrate_metadata
+
+
+def _ssl_payload(i: int, certificates: int) -> dict:
+    """crt.sh-shaped raw_result like the SSL module stores"""
+    issued = datetime(2025, 1, 1) + timedelta(days=i % 365)
+    return {
+        "domain": f"host{i}.example.com",
+        "certificates": [
+            {
+                "id": i * certificates + c,
+                "logged_at": issued.isoformat(),
+                "not_before": issued.isoformat(),
+                "not_after": (issued + timedelta(days=90)).isoformat(),
+                "issuer_name": "C=US, O=Let's Encrypt, CN=R3",
+                "common_name": f"host{i}.example.com\nwww.host{i}.example.com",
+            }
+            for c in range(certificates)
+        ],
+        "subdomains": [f"host{i}.example.com", f"www.host{i}.example.com"],
+        "issuers": ["C=US, O=Let's Encrypt, CN=R3"],
+        "total_certificates": certificates,
+    }
+
+
+async def _populate(session: AsyncSession, entities: int, certificates: int) -> int:
+    """Insert one scan with `entities` entities, each carrying an SSL finding"""
+    scan = Scan(target="example.com", type=ScanType.DOMAIN, status=ScanStatus.COMPLETED)
+    session.add(scan)
+    await session.flush()
+
+    await session.execute(Entity.__table__.insert(), [
+        {
+            "scan_id": scan.id,
+            "type": EntityType.SUBDOMAIN,
+            "canonical_value": f"host{i}.example.com",
+            "metadata": {"source": "ssl", "parent_domain": "example.com"},
+        }
+        for i in range(entities)
+    ])
+    ids = (await session.execute(
+        select(Entity.id).where(Entity.scan_id == scan.id).order_by(Entity.id)
+    )).scalars().all()
+    await session.execute(Finding.__table__.insert(), [
+        {
+            "entity_id": entity_id,
+            "source": "ssl",
+            "type": "certificate_transparency",
+            "confidence_score": 1.0,
+            "raw_result": _ssl_payload(i, certificates),
+        }
+        for i, entity_id in enumerate(ids)
+    ])
+    await session.commit()
+    return scan.id
+
+
+async def _before(session: AsyncSession, scan_id: int) -> bytes:
+    """Original path: ORM objects, hand-built dicts, jsonable_encoder + json"""
+    entities = (await session.execute(
+        select(Entity).where(Entity.scan_id == scan_id)
+    )).scalars().all()
+    findings = (await session.execute(
+        select(Finding).where(Finding.entity_id.in_([e.id for e in entities]))
+    )).scalars().all()
+    content = {
+        "entities": [
+            {
+                "id": e.id,
+                "scan_id": e.scan_id,
+                "type": e.type.value,
+                "canonical_value": e.canonical_value,
+                "metadata": e.metadata_json,
+                "first_seen": e.first_seen,
+                "last_seen": e.last_seen,
+            }
+            for e in entities
+        ],
+        "findings": [
+            {
+                "id": f.id,
+                "entity_id": f.entity_id,
+                "source": f.source,
+                "type": f.type,
+                "confidence_score": f.confidence_score,
+                "raw_result": f.raw_result,
+                "created_at": f.created_at,
+            }
+            for f in findings
+        ],
+    }
+    session.expunge_all()
+    return JSONResponse(content=jsonable_encoder(content)).body
+
+
+async def _after(session: AsyncSession, scan_id: int) -> bytes:
+    """Current path: column projection straight into orjson"""
+    fields = {"metadata", "raw_result"}
+    entities = (await session.execute(_entity_query(scan_id, fields))).all()
+    findings = (await session.execute(_finding_query(scan_id, fields))).all()
+    return ORJSONResponse({
+        "entities": await hydrate_metadata(session, [_row_dict(e) for e in entities]),
+        "findings": [_row_dict(f) for f in findings],
+    }).body
+
+
+async def _measure(fn, session, scan_id: int, repeat: int) -> dict:
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(await fn(session, scan_id))
+        timings.append(time.perf_counter() - started)
+    median = statistics.median(timings)
+    return {
+        "median_s": round(median, 4),
+        "min_s": round(min(timings), 4),
+        "bytes": size,
+        "mb_per_s": round(size / median / 1_000_000, 2),
+    }
+
+
+async def run(entities: int, certificates: int, repeat: int) -> dict:
+    """Build the corpus and time both paths"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as session:
+        scan_id = await _populate(session, entities, certificates)
+        before = await _measure(_before, session, scan_id, repeat)
+        after = await _measure(_after, session, scan_id, repeat)
+    await engine.dispose()
+
+    rows = entities * 2
+    for result in (before, after):
+        result["rows_per_s"] = round(rows / result["median_s"])
+    return {
+        "entities": entities,
+        "certificates_per_finding": certificates,
+        "before": before,
+        "after": after,
+        "speedup": round(before["median_s"] / after["median_s"], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entities", type=int, default=5000)
+    parser.add_argument("--certificates", type=int, default=20,
+                        help="certificates per SSL finding payload")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.entities, args.certificates, args.repeat))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+"""
+Synthetic corpus generator
+
+Bulk-loads a production-shaped dataset through the models' tables:
+
+    scans         one per apex domain, plus --rescans later scans of it,
+                  spread over the last --months months
+    entities      apex domains with trees of subdomains up to three labels
+                  deep (a few huge domains, many small ones: Pareto sized),
+                  their IPs and contact emails, and a shared pool of name
+                  servers that many domains point to
+    edges         subdomain_of and name_server
+    scan entities what each scan saw: everything for the first scan, all but
+                  --entity-churn of the apex's entities for the rescans
+    attributes    current values and first observations, as scans record them
+    findings      whois, ssl, shodan, scraping and hibp findings with inline
+                  payloads, several per entity
+    observations  one per finding, and re-observations by the rescans
+    reports       for --reports-share of the scans
+
+Rows go in with multi-row inserts of --batch-size rows, committed about
+every --batch-size entities. On PostgreSQL the monthly partitions the
+findings and observations fall in are created first.
+
+Sizing: entities ~ domains * (subdomains-mean + ips + emails + 1), findings
+~ entities * findings-per-entity. 2000 domains at a mean of 500 subdomains
+and 10 findings per entity make about 1M entities and 10M findings.
+
+Usage (against the docker-compose services, from the backend container):
+    docker compose -f docker-compose.yml -f docker-compose.dev.yml exec backend \\
+        python -m benchmarks.dataset --domains 2000 --subdomains-mean 500
+    python -m benchmarks.dataset --database-url sqlite+aiosqlite:///corpus.db --domains 50
+"""
+import argparse
+import asyncio
+import ipaddress
+import random
+import sys
+import time
+import zlib
+from dataclasses import dataclass, field, asdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import orjson
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.partitions import (
+    IS_PARTITIONED_SQL, PARTITION_COLUMNS, create_month_partition_sql, months_between,
+)
+from app.models.attribute import EntityAttribute, EntityAttributeCurrent
+from app.models.edge import EdgeType, EntityEdge
+from app.models.entity import Entity, EntityType, reverse_domain_labels
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.models.report import Report
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.models.scan_entity import ScanEntity
+from app.services.attributes import value_type
+from app.services.blobstore import payload_hash
+
+WORDS = (
+    "acme", "northwind", "contoso", "globex", "initech", "umbrella", "hooli", "vandelay",
+    "stark", "wayne", "tyrell", "cyberdyne", "aperture", "soylent", "wonka", "oscorp",
+    "massive", "dynamic", "blue", "red", "green", "rapid", "cloud", "data", "secure",
+    "atlas", "zenith", "orbit", "pioneer", "summit", "harbor", "maple", "cedar", "falcon",
+)
+TLDS = ("com", "com", "com", "net", "org", "io", "de", "co.uk", "fr", "nl", "app", "dev")
+SERVICES = (
+    "www", "api", "mail", "smtp", "vpn", "cdn", "static", "app", "admin", "portal", "shop",
+    "blog", "docs", "status", "auth", "sso", "git", "ci", "grafana", "m", "beta", "intranet",
+    "assets", "img", "files", "crm", "jira", "wiki", "remote", "owa", "autodiscover",
+)
+ENVIRONMENTS = ("dev", "stg", "staging", "prod", "qa", "uat", "test", "preprod")
+REGIONS = ("eu", "us", "ap", "eu-west-1", "us-east-1", "ap-south-1", "fra", "ams", "nyc", "sgp")
+# Subdomain depth below the apex: 1, 2 or 3 labels
+DEPTH_WEIGHTS = (0.65, 0.27, 0.08)
+ISSUERS = ("C=US, O=Let's Encrypt, CN=R3", "C=US, O=Let's Encrypt, CN=E1",
+           "C=GB, O=Sectigo Limited, CN=Sectigo RSA DV CA", "C=US, O=DigiCert Inc, CN=DigiCert TLS RSA")
+PORTS = ((22, "ssh"), (25, "smtp"), (80, "http"), (443, "https"), (3306, "mysql"),
+         (5432, "postgresql"), (6379, "redis"), (8080, "http-alt"), (9200, "elasticsearch"))
+BREACHES = ("Adobe", "LinkedIn", "Dropbox", "Canva", "MyFitnessPal", "Zynga", "Dubsmash")
+# Pareto shape of subdomains per domain: heavy tail, mean = alpha / (alpha - 1) * scale
+PARETO_ALPHA = 1.5
+NAME_SERVER_PROVIDERS = 200
+
+
+@dataclass
+class CorpusSpec:
+    """Shape of the corpus"""
+    domains: int = 100
+    subdomains_mean: int = 50
+    max_subdomains: int = 200_000
+    ips_per_domain: int = 4
+    emails_per_domain: int = 2
+    findings_per_entity: float = 3.0
+    rescans: int = 1
+    reobserve_share: float = 0.5
+    entity_churn: float = 0.05
+    reports_share: float = 0.2
+    months: int = 6
+    seed: int = 42
+    namespace: str = ""
+
+
+@dataclass
+class LoadReport:
+    """Rows written per table"""
+    rows: Dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def add(self, table: str, count: int) -> None:
+        self.rows[table] = self.rows.get(table, 0) + count
+
+    @property
+    def rows_per_second(self) -> float:
+        return sum(self.rows.values()) / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> Dict:
+        return {**asdict(self), "rows_per_second": round(self.rows_per_second, 1)}
+
+
+def subdomain_count(rng: random.Random, spec: CorpusSpec) -> int:
+    """Subdomains of one domain: most have a third of the mean, a few thousands"""
+    scale = spec.subdomains_mean * (PARETO_ALPHA - 1) / PARETO_ALPHA
+    return min(spec.max_subdomains, int(scale * rng.paretovariate(PARETO_ALPHA)))
+
+
+def subdomain_names(rng: random.Random, apex: str, count: int) -> List[str]:
+    """`count` distinct subdomains of `apex`, shaped like real ones"""
+    names = set()
+    while len(names) < count:
+        service = rng.choice(SERVICES)
+        if len(names) >= len(SERVICES) // 2:
+            service = f"{service}{rng.randrange(1, max(count, 10))}"
+        depth = rng.choices((1, 2, 3), DEPTH_WEIGHTS)[0]
+        if depth == 1:
+            labels = service
+        elif depth == 2:
+            labels = f"{service}.{rng.choice(ENVIRONMENTS + REGIONS)}"
+        else:
+            labels = f"{service}.{rng.choice(ENVIRONMENTS)}.{rng.choice(REGIONS)}"
+        names.add(f"{labels}.{apex}")
+    return sorted(names)
+
+
+class _Addresses:
+    """Distinct IP addresses: 10/8 by default, a 2001:db8 /64 per namespace"""
+
+    def __init__(self, namespace: str):
+        if namespace:
+            prefix = zlib.crc32(namespace.encode()) & 0xFFFFFFFF
+            self._base = int(ipaddress.IPv6Address("2001:db8::")) + (prefix << 64)
+        else:
+            self._base = int(ipaddress.IPv4Address("10.0.0.0"))
+        self._next = 1
+
+    def take(self) -> str:
+        address = ipaddress.ip_address(self._base + self._next)
+        self._next += 1
+        return str(address)
+
+
+def _payload(rng: random.Random, source: str, version: int, value: str) -> Dict:
+    """A raw_result shaped like the module that produces `source`"""
+    if source == "ssl":
+        issued = date(2025, 1, 1) + timedelta(days=rng.randrange(600))
+        return {
+            "domain": value,
+            "issuer_name": rng.choice(ISSUERS),
+            "not_before": issued.isoformat(),
+            "not_after": (issued + timedelta(days=90)).isoformat(),
+            "serial_number": f"{rng.getrandbits(128):032x}",
+            "version": version,
+        }
+    if source == "shodan":
+        port, service = rng.choice(PORTS)
+        return {"ip_or_host": value, "port": port, "transport": "tcp", "service": service,
+                "banner": f"{service} server ready ({version})"}
+    if source == "hibp":
+        return {"email": value, "breach": rng.choice(BREACHES),
+                "data_classes": ["Email addresses", "Passwords"], "version": version}
+    if source == "scraping":
+        return {"url": f"https://{value}/", "status": rng.choice((200, 301, 403, 404)),
+                "title": f"{value.split('.')[0].title()} portal", "version": version}
+    return {"domain": value, "registrar": "Example Registrar, Inc.", "version": version}
+
+
+# Findings each entity type gets, as (source, finding type)
+FINDING_KINDS = {
+    EntityType.DOMAIN: (("whois", "domain_info"), ("ssl", "certificate_transparency")),
+    EntityType.SUBDOMAIN: (("ssl", "certificate_transparency"), ("shodan", "open_port"),
+                           ("scraping", "http_title")),
+    EntityType.IP: (("shodan", "open_port"), ("shodan", "service_banner")),
+    EntityType.EMAIL: (("hibp", "breach"), ("hibp", "leaked_creds")),
+}
+
+
+class CorpusLoader:
+    """Generates the corpus domain by domain and writes it in batches"""
+
+    def __init__(self, db: AsyncSession, spec: CorpusSpec, batch_size: int, on_progress=None):
+        self.db = db
+        self.spec = spec
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+        self.rng = random.Random(spec.seed)
+        self.addresses = _Addresses(spec.namespace)
+        self.report = LoadReport()
+        self.now = datetime.now(timezone.utc)
+        self.start = self.now - timedelta(days=30 * spec.months)
+        self.name_servers: List[int] = []
+
+    def _when(self, after: Optional[datetime] = None) -> datetime:
+        """A random time between `after` (default: the corpus start) and now"""
+        low = (after or self.start).timestamp()
+        return datetime.fromtimestamp(self.rng.uniform(low, self.now.timestamp()), timezone.utc)
+
+    async def _insert(self, model, rows: List[Dict], returning: bool = False) -> List[int]:
+        """Multi-row insert in batches; the new ids in row order if asked"""
+        table = model.__table__
+        ids: List[int] = []
+        for i in range(0, len(rows), self.batch_size):
+            batch = rows[i:i + self.batch_size]
+            if returning:
+                result = await self.db.execute(
+                    table.insert().returning(table.c.id, sort_by_parameter_order=True), batch
+                )
+                ids.extend(result.scalars().all())
+            else:
+                await self.db.execute(table.insert(), batch)
+        self.report.add(str(table.name), len(rows))
+        return ids
+
+    async def prepare(self) -> None:
+        """Refuse to load twice; create partitions; add the name server pool"""
+        first = self._apex(0)
+        existing = await self.db.execute(
+            select(Entity.id).where(Entity.type == EntityType.DOMAIN, Entity.canonical_value == first)
+        )
+        if existing.first() is not None:
+            raise SystemExit(f"A corpus is already loaded ({first} exists); pass another --namespace")
+
+        if self.db.bind.dialect.name == "postgresql":
+            for table in PARTITION_COLUMNS:
+                partitioned = (await self.db.execute(text(IS_PARTITIONED_SQL), {"table": table})).scalar()
+                if partitioned:
+                    for month in months_between(self.start.date(), self.now.date()):
+                        for statement in create_month_partition_sql(table, month):
+                            await self.db.execute(text(statement))
+
+        suffix = f"-{self.spec.namespace}" if self.spec.namespace else ""
+        names = [
+            f"ns{n}.dnsprovider{p}{suffix}.net"
+            for p in range(NAME_SERVER_PROVIDERS) for n in range(1, 5)
+        ]
+        self.name_servers = await self._insert(Entity, [
+            {"type": EntityType.DOMAIN, "canonical_value": name,
+             "reversed_domain": reverse_domain_labels(name), "first_seen": self.start}
+            for name in names
+        ], returning=True)
+        await self.db.commit()
+
+    def _apex(self, index: int) -> str:
+        rng = random.Random(self.spec.seed * 1_000_003 + index)
+        suffix = f"-{self.spec.namespace}" if self.spec.namespace else ""
+        return f"{rng.choice(WORDS)}-{index}{suffix}.{rng.choice(TLDS)}"
+
+    async def load_domain(self, index: int) -> None:
+        """One apex domain with its scans, entities and findings"""
+        rng, spec = self.rng, self.spec
+        apex = self._apex(index)
+
+        scanned_at = sorted(self._when() for _ in range(1 + spec.rescans))
+        scan_ids = await self._insert(Scan, [
+            {
+                "target": apex, "type": ScanType.DOMAIN, "status": ScanStatus.COMPLETED,
+                "settings": {"modules": ["whois", "ssl"]}, "created_at": at,
+                "started_at": at, "finished_at": at + timedelta(seconds=rng.uniform(5, 600)),
+            }
+            for at in scanned_at
+        ], returning=True)
+        first_scan, first_seen = scan_ids[0], scanned_at[0]
+
+        # (type, value, metadata) of the domain's entities; the apex comes first
+        entities = [(EntityType.DOMAIN, apex, {"registrar": "Example Registrar, Inc."})]
+        entities += [
+            (EntityType.SUBDOMAIN, name, {"source": "ssl", "parent_domain": apex})
+            for name in subdomain_names(rng, apex, subdomain_count(rng, spec))
+        ]
+        entities += [
+            (EntityType.IP, self.addresses.take(), {"asn": f"AS{rng.randrange(1000, 65000)}"})
+            for _ in range(spec.ips_per_domain)
+        ]
+        entities += [
+            (EntityType.EMAIL, f"{local}@{apex}", {"source": "whois"})
+            for local in ("admin", "security", "hostmaster", "abuse")[:spec.emails_per_domain]
+        ]
+        entity_ids = await self._insert(Entity, [
+            {
+                "scan_id": first_scan, "type": entity_type, "canonical_value": value,
+                "reversed_domain": reverse_domain_labels(value)
+                if entity_type in (EntityType.DOMAIN, EntityType.SUBDOMAIN) else None,
+                "first_seen": first_seen, "last_seen": scanned_at[-1],
+            }
+            for entity_type, value, _ in entities
+        ], returning=True)
+        apex_id = entity_ids[0]
+        name_servers = rng.sample(self.name_servers, 2)
+
+        edges = [
+            {"src_entity_id": apex_id, "dst_entity_id": ns, "type": EdgeType.NAME_SERVER.value,
+             "source": "whois", "scan_id": first_scan}
+            for ns in name_servers
+        ]
+        edges += [
+            {"src_entity_id": entity_id, "dst_entity_id": apex_id,
+             "type": EdgeType.SUBDOMAIN_OF.value, "source": "ssl", "scan_id": first_scan}
+            for entity_id, (entity_type, _, _) in zip(entity_ids, entities)
+            if entity_type == EntityType.SUBDOMAIN
+        ]
+        await self._insert(EntityEdge, edges)
+
+        members = [{"scan_id": first_scan, "entity_id": e} for e in entity_ids + name_servers]
+        for scan_id in scan_ids[1:]:
+            members += [
+                {"scan_id": scan_id, "entity_id": e} for e in [apex_id] + name_servers
+            ] + [
+                {"scan_id": scan_id, "entity_id": e}
+                for e in entity_ids[1:] if rng.random() >= spec.entity_churn
+            ]
+        await self._insert(ScanEntity, members)
+
+        current, history = [], []
+        for entity_id, (_, _, metadata) in zip(entity_ids, entities):
+            for key, value in metadata.items():
+                row = {"entity_id": entity_id, "key": key, "value": value,
+                       "value_type": value_type(value), "source": metadata.get("source", "whois"),
+                       "scan_id": first_scan}
+                current.append({**row, "updated_at": first_seen})
+                history.append({**row, "observed_at": first_seen})
+        await self._insert(EntityAttributeCurrent, current)
+        await self._insert(EntityAttribute, history)
+
+        findings = []
+        for entity_id, (entity_type, value, _) in zip(entity_ids, entities):
+            kinds = FINDING_KINDS[entity_type]
+            count = max(1, round(rng.gammavariate(2.0, spec.findings_per_entity / 2.0)))
+            for version in range(count):
+                source, finding_type = kinds[version % len(kinds)]
+                payload = _payload(rng, source, version, value)
+                findings.append({
+                    "entity_id": entity_id, "source": source, "type": finding_type,
+                    "confidence_score": round(rng.uniform(0.3, 1.0), 2), "raw_result": payload,
+                    "content_hash": payload_hash(payload), "created_at": self._when(first_seen),
+                })
+        finding_ids = await self._insert(Finding, findings, returning=True)
+
+        observations = [
+            {"finding_id": finding_id, "scan_id": first_scan, "observed_at": row["created_at"]}
+            for finding_id, row in zip(finding_ids, findings)
+        ]
+        for scan_id, at in zip(scan_ids[1:], scanned_at[1:]):
+            observations += [
+                {"finding_id": finding_id, "scan_id": scan_id, "observed_at": max(at, row["created_at"])}
+                for finding_id, row in zip(finding_ids, findings)
+                if rng.random() < spec.reobserve_share
+            ]
+        await self._insert(FindingObservation, observations)
+
+        reports = [
+            {
+                "scan_id": scan_id, "title": f"Exposure of {apex}", "created_at": at,
+                "generated_text": f"{apex} exposes {len(entities) - 1} related assets.",
+                "sections": {"summary": f"{len(findings)} findings", "risks": []},
+                "score": rng.randint(1, 10),
+            }
+            for scan_id, at in zip(scan_ids, scanned_at) if rng.random() < spec.reports_share
+        ]
+        if reports:
+            await self._insert(Report, reports)
+
+    async def run(self) -> LoadReport:
+        started = time.monotonic()
+        await self.prepare()
+        committed = 0
+        for index in range(self.spec.domains):
+            await self.load_domain(index)
+            # Commit about every batch_size entities
+            if self.report.rows.get("entities", 0) - committed >= self.batch_size:
+                await self.db.commit()
+                committed = self.report.rows["entities"]
+                self.report.elapsed = time.monotonic() - started
+                if self.on_progress is not None:
+                    self.on_progress(index + 1, self.report)
+        await self.db.commit()
+        self.report.elapsed = time.monotonic() - started
+        return self.report
+
+
+def _print_progress(domains: int, report: LoadReport) -> None:
+    print(
+        f"{domains} domains, {report.rows.get('entities', 0)} entities, "
+        f"{report.rows.get('findings', 0)} findings ({report.rows_per_second:.0f} rows/s)",
+        file=sys.stderr,
+    )
+
+
+async def _load(args: argparse.Namespace, spec: CorpusSpec) -> LoadReport:
+    engine = create_async_engine(args.database_url)
+    try:
+        if args.create_schema:
+            from app.db.database import Base
+            import app.models  # noqa: F401  (register all models on Base.metadata)
+
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as db:
+            return await CorpusLoader(db, spec, args.batch_size, _print_progress).run()
+    finally:
+        await engine.dispose()
+
+
+def main() -> int:
+    defaults = CorpusSpec()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--create-schema", action="store_true",
+                        help="Create missing tables first (use migrations for PostgreSQL)")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per insert")
+    for name, value in asdict(defaults).items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+    args = parser.parse_args()
+
+    spec = CorpusSpec(**{name: getattr(args, name) for name in asdict(defaults)})
+    report = asyncio.run(_load(args, spec))
+    print(orjson.dumps(
+        {"spec": asdict(spec), **report.as_dict()}, option=orjson.OPT_INDENT_2
+    ).decode())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Local stand-ins for the services a scan talks to
+
+    crtsh_payload / crtsh_transport  crt.sh answers, synthetic or recorded,
+                                     served through an httpx mock transport
+    fake_whois                       python-whois lookup returning a fixed record
+    FakeOllama                       Ollama HTTP API on a local port
+    offline                          the scan pipeline's side services (blob
+                                     store, Redis events and cache) kept in process
+
+Nothing here opens a connection outside the machine, so benchmarks using
+these give the same numbers with or without network access.
+"""
+import json
+import tempfile
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Iterator, List, Optional
+from unittest import mock
+
+import httpx
+import orjson
+
+ISSUERS = (
+    "C=US, O=Let's Encrypt, CN=R3",
+    "C=US, O=Let's Encrypt, CN=E1",
+    "C=GB, ST=Greater Manchester, L=Salford, O=Sectigo Limited, CN=Sectigo RSA DV CA",
+)
+
+
+def crtsh_payload(domain: str, certificates: int, names_per_certificate: int = 3) -> List[dict]:
+    """crt.sh JSON answer listing `certificates` certificates for a domain"""
+    logged = datetime(2025, 1, 1)
+    entries = []
+    for i in range(certificates):
+        issued = logged + timedelta(minutes=17 * i)
+        names = [f"host{i * names_per_certificate + n}.{domain}" for n in range(names_per_certificate)]
+        entries.append({
+            "issuer_ca_id": 183267 + i % len(ISSUERS),
+            "issuer_name": ISSUERS[i % len(ISSUERS)],
+            "common_name": names[0],
+            "name_value": "\n".join(names),
+            "id": 9_000_000_000 + i,
+            "entry_timestamp": issued.isoformat(timespec="milliseconds"),
+            "not_before": issued.isoformat(timespec="seconds"),
+            "not_after": (issued + timedelta(days=90)).isoformat(timespec="seconds"),
+            "serial_number": f"{i:036x}",
+            "result_count": names_per_certificate,
+        })
+    return entries
+
+
+def load_recorded(path: str) -> bytes:
+    """A crt.sh answer saved with e.g. curl 'https://crt.sh/?q=%.example.com&output=json'"""
+    with open(path, "rb") as f:
+        body = f.read()
+    orjson.loads(body)  # fail early on a truncated recording
+    return body
+
+
+def crtsh_transport(body: bytes) -> httpx.MockTransport:
+    """Transport answering every crt.sh query with `body`"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, content=body, headers={"content-type": "application/json"}, request=request
+        )
+    return httpx.MockTransport(handler)
+
+
+def fake_whois(name_servers: int = 2):
+    """Replacement for whois.whois() returning a plausible record"""
+    def lookup(target: str) -> SimpleNamespace:
+        return SimpleNamespace(
+            registrar="Example Registrar, Inc.",
+            creation_date=datetime(2001, 5, 14),
+            expiration_date=datetime(2031, 5, 14),
+            name_servers=[f"ns{n + 1}.{target}" for n in range(name_servers)],
+            status="clientTransferProhibited",
+        )
+    return lookup
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    """The subset of the Ollama API used by LocalOllamaDriver"""
+
+    def _reply(self, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply({"models": [{"name": "llama2"}]})
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = request.get("prompt", "")
+        if self.path == "/api/embeddings":
+            self._reply({"embedding": [0.0] * 768})
+        else:
+            words = len(prompt.split())
+            self._reply({
+                "model": request.get("model"),
+                "response": "Summary: " + " ".join(prompt.split()[:50]),
+                "done": True,
+                "prompt_eval_count": words,
+                "eval_count": min(words, 50) + 1,
+            })
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeOllama:
+    """Ollama stand-in listening on 127.0.0.1 for the duration of a with block"""
+
+    def __init__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _OllamaHandler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self) -> "FakeOllama":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@contextmanager
+def offline(blob_dir: Optional[str] = None, name_servers: int = 2) -> Iterator[None]:
+    """
+    Run the scan pipeline without Redis, S3, WHOIS or crt.sh
+
+    Blobs go to a local directory, progress events and cache invalidations
+    are dropped, the response cache is bypassed and WHOIS answers from
+    fake_whois(). crt.sh is not patched: pass a client on crtsh_transport()
+    to run_ssl.
+    """
+    from app.core.config import settings
+    from app.services import blobstore
+    from app.services.blobstore import LocalBlobStore
+    from app.services.cache import response_cache
+    import whois as python_whois
+    from app.tasks import scan as scan_tasks
+
+    async def noop(*args, **kwargs):
+        pass
+
+    with ExitStack() as stack:
+        if blob_dir is None:
+            blob_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="bench-blobs-"))
+        stack.enter_context(mock.patch.object(blobstore, "_store", LocalBlobStore(blob_dir)))
+        stack.enter_context(mock.patch.object(scan_tasks, "publish_scan_event", noop))
+        stack.enter_context(mock.patch.object(response_cache, "invalidate", noop))
+        stack.enter_context(mock.patch.object(settings, "CACHE_ENABLED", False))
+        stack.enter_context(
+            mock.patch.object(python_whois, "whois", fake_whois(name_servers))
+        )
+        yield
@@ -0,0 +1,248 @@
+"""
+Load test of a running API
+
+Drives the search, scan, entity and report endpoints concurrently for a
+fixed duration, then reports throughput and latency percentiles per
+endpoint and overall. Scan and entity ids and search terms are sampled from
+the API itself first, so any corpus works; benchmarks.dataset loads one.
+
+Endpoints and their default weights in the request mix:
+
+    search           4   GET /api/v1/search?q=<term>
+    scan_list        1   GET /api/v1/scan
+    scan_get         3   GET /api/v1/scan/{id}
+    entity_get       3   GET /api/v1/entity/{id}
+    entity_findings  2   GET /api/v1/entity/{id}/findings
+    entity_graph     1   GET /api/v1/entity/{id}/graph
+    report_list      1   GET /api/v1/report/scan/{id}
+
+Requests issued during --warmup are not counted. Results are saved like the
+benchmarks' (benchmarks.reporting) and can be compared between runs.
+
+Usage (with docker compose -f docker-compose.yml -f docker-compose.dev.yml up):
+    python -m benchmarks.loadtest --base-url http://localhost:8000 --concurrency 32 --duration 60
+    python -m benchmarks.loadtest --mix search=1,scan_get=1 --compare benchmarks/results/loadtest-<run>.json
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+import orjson
+
+from benchmarks.reporting import compare, environment, latency, load, regressions, save
+
+DEFAULT_MIX = {
+    "search": 4,
+    "scan_list": 1,
+    "scan_get": 3,
+    "entity_get": 3,
+    "entity_findings": 2,
+    "entity_graph": 1,
+    "report_list": 1,
+}
+
+
+@dataclass
+class Sample:
+    """Identifiers and search terms the requests pick from"""
+    scan_ids: List[int] = field(default_factory=list)
+    entity_ids: List[int] = field(default_factory=list)
+    terms: List[str] = field(default_factory=list)
+
+
+@dataclass
+class EndpointStats:
+    timings: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+
+
+# Request builders: (rng, sample) -> (path, query parameters)
+REQUESTS: Dict[str, Callable[[random.Random, Sample], Tuple[str, Dict]]] = {
+    "search": lambda rng, s: ("/api/v1/search", {"q": rng.choice(s.terms), "limit": 20}),
+    "scan_list": lambda rng, s: ("/api/v1/scan", {"limit": 50}),
+    "scan_get": lambda rng, s: (f"/api/v1/scan/{rng.choice(s.scan_ids)}", {}),
+    "entity_get": lambda rng, s: (f"/api/v1/entity/{rng.choice(s.entity_ids)}", {}),
+    "entity_findings": lambda rng, s: (f"/api/v1/entity/{rng.choice(s.entity_ids)}/findings", {}),
+    "entity_graph": lambda rng, s: (f"/api/v1/entity/{rng.choice(s.entity_ids)}/graph", {}),
+    "report_list": lambda rng, s: (f"/api/v1/report/scan/{rng.choice(s.scan_ids)}", {}),
+}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """'search=4,scan_get=1' -> weights; endpoints left out are not requested"""
+    mix = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in REQUESTS:
+            raise ValueError(f"Unknown endpoint: {name}. Must be among: {', '.join(REQUESTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _terms(rng: random.Random, value: str) -> List[str]:
+    """Search terms a user would type for an entity: a label, a name, a fragment"""
+    labels = value.replace("@", ".").split(".")
+    terms = [labels[0], value]
+    if len(value) > 6:
+        start = rng.randrange(len(value) - 4)
+        terms.append(value[start:start + rng.randint(3, 8)])
+    return terms
+
+
+async def discover(client: httpx.AsyncClient, scans: int, scans_opened: int, seed: int) -> Sample:
+    """Sample scan ids from the scan listing, then entities of some scans"""
+    rng = random.Random(seed)
+    sample = Sample()
+    cursor = None
+    while len(sample.scan_ids) < scans:
+        params = {"limit": min(500, scans - len(sample.scan_ids))}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/v1/scan", params=params)
+        response.raise_for_status()
+        sample.scan_ids += [scan["scan_id"] for scan in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    if not sample.scan_ids:
+        raise SystemExit("No scans to test with; load a corpus first (python -m benchmarks.dataset)")
+
+    for scan_id in rng.sample(sample.scan_ids, min(scans_opened, len(sample.scan_ids))):
+        response = await client.get(
+            f"/api/v1/scan/{scan_id}", params={"entities_limit": 1000, "findings_limit": 1, "include": ""}
+        )
+        response.raise_for_status()
+        for entity in response.json()["entities"]:
+            sample.entity_ids.append(entity["id"])
+            if rng.random() < 0.05:
+                sample.terms += _terms(rng, entity["canonical_value"])
+    if not sample.entity_ids:
+        raise SystemExit("The sampled scans have no entities")
+    sample.terms = sample.terms or ["example"]
+    return sample
+
+
+async def _worker(
+    client: httpx.AsyncClient,
+    rng: random.Random,
+    sample: Sample,
+    mix: Dict[str, float],
+    measure_from: float,
+    deadline: float,
+    stats: Dict[str, EndpointStats],
+) -> None:
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        path, params = REQUESTS[name](rng, sample)
+        started = time.perf_counter()
+        try:
+            response = await client.get(path, params=params)
+            await response.aread()
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if started >= measure_from:
+            stats[name].timings.append(time.perf_counter() - started)
+            stats[name].statuses[status] += 1
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    """Discover a sample, then drive the API for the configured duration"""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        sample = await discover(client, args.sample_scans, args.sample_scans_opened, args.seed)
+        print(
+            f"Sampled {len(sample.scan_ids)} scans, {len(sample.entity_ids)} entities, "
+            f"{len(sample.terms)} search terms",
+            file=sys.stderr,
+        )
+
+        stats = {name: EndpointStats() for name in args.mix}
+        measure_from = time.perf_counter() + args.warmup
+        deadline = measure_from + args.duration
+        await asyncio.gather(*(
+            _worker(client, random.Random(args.seed + n), sample, args.mix, measure_from, deadline, stats)
+            for n in range(args.concurrency)
+        ))
+
+    results = {}
+    all_timings, all_statuses = [], Counter()
+    for name, endpoint in stats.items():
+        all_timings += endpoint.timings
+        all_statuses += endpoint.statuses
+        results[name] = _summary(endpoint.timings, endpoint.statuses, args.duration)
+    results["total"] = _summary(all_timings, all_statuses, args.duration)
+    return {
+        "benchmark": "loadtest",
+        "started_at": args.started_at.isoformat(),
+        "environment": environment(target=args.base_url),
+        "parameters": {
+            "concurrency": args.concurrency, "duration": args.duration, "warmup": args.warmup,
+            "mix": args.mix, "seed": args.seed, "sample_scans": len(sample.scan_ids),
+            "sample_entities": len(sample.entity_ids),
+        },
+        "results": results,
+    }
+
+
+def _summary(timings: List[float], statuses: Counter, duration: float) -> Dict:
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    return {
+        **latency(timings),
+        "throughput_per_s": round(len(timings) / duration, 1),
+        "errors": errors,
+        "statuses": dict(statuses),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight")
+    parser.add_argument("--duration", type=float, default=60.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds before measuring")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per request, in seconds")
+    parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                        help="Endpoint weights, e.g. search=4,scan_get=1")
+    parser.add_argument("--sample-scans", type=int, default=2000,
+                        help="Scan ids to sample from the listing")
+    parser.add_argument("--sample-scans-opened", type=int, default=50,
+                        help="Sampled scans whose entities are read for ids and search terms")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/loadtest-<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    parser.add_argument("--fail-over", type=float,
+                        help="Exit with 1 when a figure got worse by more than this percentage")
+    args = parser.parse_args()
+    try:
+        args.mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    args.started_at = datetime.now(timezone.utc)
+
+    result = asyncio.run(run(args))
+    output = save(result, args.output)
+    print(orjson.dumps(result["results"], option=orjson.OPT_INDENT_2).decode())
+    print(f"Results written to {output}")
+
+    if args.compare:
+        worse = regressions(compare(load(args.compare), result), args.fail_over)
+        for path, change in worse:
+            print(f"Regression: {path} is {change:.1f}% worse", file=sys.stderr)
+        return 1 if worse else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Results files shared by the benchmark and load-test scripts
+
+Every run is saved as one JSON document:
+
+    {"benchmark": ..., "started_at": ..., "environment": {...},
+     "parameters": {...}, "results": {...}}
+
+Within results, figures are compared between runs by the suffix of their
+name: *_ms, *_s and *_mb are better lower, *_per_s better higher. Other
+numbers (sizes, counts) describe the run and are not compared.
+"""
+import math
+import os
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
+RESULTS_DIR = Path(__file__).parent / "results"
+# Compared figures, and whether higher is better
+COMPARED_SUFFIXES = {"_ms": False, "_s": False, "_mb": False, "_per_s": True}
+
+
+def latency(timings: List[float]) -> Dict[str, float]:
+    """Percentiles (nearest rank) and mean of timings in seconds, in ms"""
+    ordered = sorted(timings)
+    if not ordered:
+        return {"requests": 0}
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(math.ceil(p * len(ordered)) - 1, 0))]
+
+    return {
+        "requests": len(ordered),
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p90_ms": round(rank(0.90) * 1000, 3),
+        "p99_ms": round(rank(0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def environment(**extra) -> Dict:
+    """Where a run was taken: commit, interpreter, machine"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        **extra,
+    }
+
+
+def save(result: Dict, output: Optional[str] = None) -> Path:
+    """Write a run to `output`, by default results/<benchmark>-<start time>.json"""
+    started_at = datetime.fromisoformat(result["started_at"])
+    path = Path(output) if output else (
+        RESULTS_DIR / f"{result['benchmark']}-{started_at:%Y%m%dT%H%M%S}.json"
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+    return path
+
+
+def load(path: str) -> Dict:
+    return orjson.loads(Path(path).read_bytes())
+
+
+def _flatten(data: Dict, prefix: str = "") -> Dict[str, float]:
+    """Compared figures of a results tree, keyed by their path"""
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and any(key.endswith(s) for s in COMPARED_SUFFIXES):
+            flat[path] = value
+    return flat
+
+
+def compare(previous: Dict, current: Dict) -> List[Tuple[str, float]]:
+    """
+    Print the change of every figure present in both runs
+
+    Returns (figure, percentage) pairs, positive when the figure got worse.
+    """
+    before = _flatten(previous["results"])
+    after = _flatten(current["results"])
+    print(f"Compared with {previous['environment'].get('commit')} ({previous['started_at']})")
+    changes = []
+    for path in sorted(before.keys() & after.keys()):
+        if not before[path]:
+            continue
+        change = (after[path] - before[path]) / before[path] * 100
+        higher_is_better = next(v for s, v in COMPARED_SUFFIXES.items() if path.endswith(s))
+        changes.append((path, -change if higher_is_better else change))
+        print(f"  {path:<50} {before[path]:>12} -> {after[path]:>12}  {change:+7.1f}%")
+    return changes
+
+
+def regressions(changes: List[Tuple[str, float]], threshold: Optional[float]) -> List[Tuple[str, float]]:
+    """Figures worse by more than `threshold` percent (none without a threshold)"""
+    if threshold is None:
+        return []
+    return [(path, worse) for path, worse in changes if worse > threshold]
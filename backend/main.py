@@ -2,24 +2,32 @@
 AI-Powered OSINT Kit - FastAPI Backend
 Main application entry point
 """
+# First, so that STARTUP_PROFILE times every import below
+from app.core.startup import startup_profile
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 import os
 from contextlib import asynccontextmanager
 
 from app.api.v1 import router as v1_router
 from app.core.config import settings
+from app.core.metrics import api_metrics
 from app.db.database import init_db
+from app.services.events import scan_events
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
-    await init_db()
+    with startup_profile.phase("init_db"):
+        await init_db()
+    startup_profile.finish()
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    await scan_events.close()
 
 
 app = FastAPI(
@@ -27,6 +35,7 @@ app = FastAPI(
     description="AI-powered Open Source Intelligence toolkit",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -36,12 +45,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Include routers
 app.include_router(v1_router, prefix="/api/v1")
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics (a plain function: collection does blocking I/O)"""
+    body, content_type = api_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -0,0 +1,73 @@
+"""
+Shared test fixtures
+"""
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base, get_db, get_read_db
+import app.models  # noqa: F401  (register all models on Base.metadata)
+from app.services import blobstore
+from app.services.blobstore import LocalBlobStore
+from app.services.cache import response_cache
+from app.tasks import scan as scan_tasks
+from main import app
+
+
+@pytest.fixture
+async def db_engine():
+    """In-memory SQLite engine with the full schema"""
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db_session(db_engine):
+    """Database session bound to the in-memory engine"""
+    session_factory = async_sessionmaker(
+        db_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+async def client(db_session):
+    """HTTP client with the database dependency pointed at SQLite"""
+    async def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    async with httpx.AsyncClient(app=app, base_url="http://test") as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def isolated_services(tmp_path, monkeypatch):
+    """Local blob store in a temporary directory, cache invalidation and scan events disabled"""
+    monkeypatch.setattr(blobstore, "_store", LocalBlobStore(str(tmp_path / "blobs")))
+
+    async def noop(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(response_cache, "invalidate", noop)
+    monkeypatch.setattr(scan_tasks, "publish_scan_event", noop)
+
+
+@pytest.fixture
+def offline_scans(db_engine, isolated_services, monkeypatch):
+    """Scan tasks run against the test database; lookups are the test's to fake"""
+    monkeypatch.setattr(
+        scan_tasks, "AsyncSessionLocal",
+        async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False),
+    )
@@ -0,0 +1,54 @@
+"""
+Test append-only entity attributes
+"""
+import pytest
+from sqlalchemy import select
+
+from app.models.attribute import EntityAttribute
+from app.models.entity import EntityType
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.services.attributes import touch_last_seen
+from app.tasks import scan as scan_tasks
+
+
+pytestmark = pytest.mark.usefixtures("isolated_services")
+
+
+async def test_only_changed_attributes_are_written(client, db_session):
+    """Re-seeing an entity appends history only for values that changed"""
+    scans = [Scan(target="example.com", type=ScanType.DOMAIN, status=ScanStatus.COMPLETED) for _ in range(3)]
+    db_session.add_all(scans)
+    await db_session.commit()
+
+    metadata = {"source": "whois", "type": "name_server"}
+    ns = await scan_tasks._get_or_create_entity(
+        db_session, scans[0].id, EntityType.DOMAIN, "ns1.example.net", metadata
+    )
+    await scan_tasks._get_or_create_entity(
+        db_session, scans[1].id, EntityType.DOMAIN, "ns1.example.net", dict(metadata)
+    )
+    await scan_tasks._get_or_create_entity(
+        db_session, scans[2].id, EntityType.DOMAIN, "ns1.example.net", {"type": "mail_server"}
+    )
+
+    history = (await db_session.execute(
+        select(EntityAttribute.key, EntityAttribute.value, EntityAttribute.scan_id)
+        .where(EntityAttribute.entity_id == ns.id)
+        .order_by(EntityAttribute.id)
+    )).all()
+    assert [tuple(row) for row in history] == [
+        ("source", "whois", scans[0].id),
+        ("type", "name_server", scans[0].id),
+        ("type", "mail_server", scans[2].id),
+    ]
+
+    detail = (await client.get(f"/api/v1/entity/{ns.id}")).json()
+    assert detail["metadata"] == {"source": "whois", "type": "mail_server"}
+
+    changes = (await client.get(
+        f"/api/v1/entity/{ns.id}/attributes", params={"key": "type"}
+    )).json()["attributes"]
+    assert [c["value"] for c in changes] == ["mail_server", "name_server"]
+
+    # last_seen was just set on insert, so it is not rewritten again
+    assert await touch_last_seen(db_session, ns.id) is False
@@ -0,0 +1,82 @@
+"""
+Test the content-addressed blob store and lazy raw payloads
+"""
+import pytest
+
+from app.models.entity import Entity, EntityType
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.models.scan_entity import ScanEntity
+from app.services import blobstore
+from app.services.blobstore import BlobNotFound, LocalBlobStore
+
+
+@pytest.fixture
+def local_store(tmp_path, monkeypatch):
+    """Local blob store in a temporary directory, installed as the default"""
+    store = LocalBlobStore(str(tmp_path / "blobs"))
+    monkeypatch.setattr(blobstore, "_store", store)
+    return store
+
+
+async def test_identical_payloads_are_stored_once(local_store, tmp_path):
+    """Equal payloads share one compressed blob regardless of key order"""
+    first = await local_store.put({"domain": "example.com", "raw": "x" * 10000})
+    second = await local_store.put({"raw": "x" * 10000, "domain": "example.com"})
+    assert first == second
+
+    blobs = list((tmp_path / "blobs").rglob("*.z"))
+    assert len(blobs) == 1
+    assert blobs[0].stat().st_size < first.size
+    assert await local_store.get(first.hash) == {"domain": "example.com", "raw": "x" * 10000}
+
+    with pytest.raises(BlobNotFound):
+        await local_store.get("0" * 64)
+
+
+def test_backends_must_implement_storage():
+    class ReadOnlyStore(blobstore.BlobStore):
+        def _exists(self, blob_hash):
+            return False
+
+        def _read(self, blob_hash):
+            raise BlobNotFound(blob_hash)
+
+    with pytest.raises(TypeError):
+        ReadOnlyStore()
+
+
+async def test_raw_payload_is_loaded_on_request(client, db_session, local_store):
+    """Findings carry a summary; the full payload comes from the blob store"""
+    payload = {"domain": "example.com", "subdomains": [f"h{i}.example.com" for i in range(50)]}
+    blob = await local_store.put(payload)
+
+    scan = Scan(target="example.com", type=ScanType.DOMAIN, status=ScanStatus.COMPLETED)
+    db_session.add(scan)
+    await db_session.flush()
+    entity = Entity(scan_id=scan.id, type=EntityType.DOMAIN, canonical_value="example.com")
+    db_session.add(entity)
+    await db_session.flush()
+    finding = Finding(
+        entity_id=entity.id, source="ssl", type="certificate_transparency",
+        raw_result=blobstore.summarize_payload(payload), raw_blob_hash=blob.hash, raw_size=blob.size,
+    )
+    db_session.add(finding)
+    await db_session.flush()
+    db_session.add_all([
+        ScanEntity(scan_id=scan.id, entity_id=entity.id),
+        FindingObservation(finding_id=finding.id, scan_id=scan.id),
+    ])
+    await db_session.commit()
+
+    assert finding.raw_result == {"domain": "example.com", "subdomains_count": 50}
+
+    url = f"/api/v1/entity/{entity.id}/findings/{finding.id}/raw"
+    response = await client.get(url)
+    assert response.json() == payload
+    cached = await client.get(url, headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+    detail = await client.get(f"/api/v1/scan/{scan.id}", params={"include": "raw_result"})
+    assert detail.json()["findings"][0]["raw_result"] == payload
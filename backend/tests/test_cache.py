@@ -0,0 +1,96 @@
+"""
+Test the response cache
+"""
+from starlette.requests import Request
+
+from app.db.database import get_read_db
+from app.models.entity import Entity, EntityType
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.services.cache import ResponseCache
+from main import app
+
+
+class FakeRedis:
+    """Just enough of the redis.asyncio API for the cache"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+def _request(headers=None):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/v1/scan/1",
+        "query_string": b"include=metadata",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    })
+
+
+async def test_cached_responses_revalidate_and_invalidate():
+    """Bodies are reused with a strong ETag until the object is invalidated"""
+    redis = FakeRedis()
+    cache = ResponseCache(redis_factory=lambda: redis)
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return {"scan_id": 1, "revision": len(builds)}, True
+
+    first = await cache.respond(_request(), "scan", 1, build)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    second = await cache.respond(_request(), "scan", 1, build)
+    assert second.body == first.body
+    assert len(builds) == 1
+
+    not_modified = await cache.respond(_request({"If-None-Match": etag}), "scan", 1, build)
+    assert not_modified.status_code == 304
+
+    await cache.invalidate("scan", 1)
+    third = await cache.respond(_request({"If-None-Match": etag}), "scan", 1, build)
+    assert third.status_code == 200
+    assert third.headers["etag"] != etag
+    assert len(builds) == 2
+
+
+async def test_uncacheable_responses_are_not_stored():
+    """Running scans are rebuilt on every request and carry no ETag"""
+    redis = FakeRedis()
+    cache = ResponseCache(redis_factory=lambda: redis)
+
+    async def build():
+        return {"status": "running"}, False
+
+    response = await cache.respond(_request(), "scan", 1, build)
+    assert "etag" not in response.headers
+    assert not any(key.startswith("osint:cache:body") for key in redis.data)
+
+
+async def test_cached_details_are_built_from_the_primary(client, db_session):
+    """A lagging replica must not be cached under a version bumped on the primary"""
+    scan = Scan(target="example.com", type=ScanType.DOMAIN, status=ScanStatus.COMPLETED)
+    db_session.add(scan)
+    await db_session.flush()
+    entity = Entity(scan_id=scan.id, type=EntityType.DOMAIN, canonical_value="example.com")
+    db_session.add(entity)
+    await db_session.commit()
+
+    async def no_replica():
+        raise AssertionError("read from the replica")
+        yield
+
+    app.dependency_overrides[get_read_db] = no_replica
+    assert (await client.get(f"/api/v1/scan/{scan.id}")).status_code == 200
+    assert (await client.get(f"/api/v1/entity/{entity.id}")).status_code == 200
@@ -0,0 +1,109 @@
+"""
+Test the scan diff endpoint
+"""
+import pytest
+
+from app.models.attribute import EntityAttribute
+from app.models.entity import Entity, EntityType
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.models.scan_entity import ScanEntity
+
+
+@pytest.fixture
+async def two_scans(db_session):
+    """Two scans of example.com with one change of every kind between them"""
+    before, after = (
+        Scan(target="example.com", type=ScanType.DOMAIN, status=ScanStatus.COMPLETED) for _ in range(2)
+    )
+    db_session.add_all([before, after])
+    await db_session.flush()
+
+    entities = {
+        name: Entity(scan_id=before.id, type=EntityType.SUBDOMAIN, canonical_value=name)
+        for name in ("example.com", "old.example.com", "kept.example.com", "new.example.com")
+    }
+    db_session.add_all(entities.values())
+    await db_session.flush()
+    ids = {name: entity.id for name, entity in entities.items()}
+    db_session.add_all(
+        [ScanEntity(scan_id=before.id, entity_id=ids[n]) for n in ("example.com", "old.example.com", "kept.example.com")]
+        + [ScanEntity(scan_id=after.id, entity_id=ids[n]) for n in ("example.com", "kept.example.com", "new.example.com")]
+    )
+    db_session.add_all([
+        # Recorded by the first scan: its state, not a change
+        EntityAttribute(entity_id=ids["example.com"], key="registrar", value="A", value_type="str", scan_id=before.id),
+        EntityAttribute(entity_id=ids["kept.example.com"], key="ip", value="10.0.0.2", value_type="str", scan_id=after.id),
+    ])
+
+    def finding(name, source, payload):
+        return Finding(entity_id=ids[name], source=source, type="info", content_hash=payload)
+
+    findings = {
+        "whois_v1": finding("example.com", "whois", "v1"),
+        "whois_v2": finding("example.com", "whois", "v2"),
+        "ssl": finding("example.com", "ssl", "s"),
+        "old": finding("old.example.com", "ssl", "o"),
+        "new": finding("new.example.com", "ssl", "n"),
+    }
+    db_session.add_all(findings.values())
+    await db_session.flush()
+    observed = {before.id: ("whois_v1", "ssl", "old"), after.id: ("whois_v2", "ssl", "new")}
+    db_session.add_all([
+        FindingObservation(finding_id=findings[name].id, scan_id=scan_id)
+        for scan_id, names in observed.items() for name in names
+    ])
+    await db_session.commit()
+    return before, after, ids, {name: f.id for name, f in findings.items()}
+
+
+async def test_diff_classifies_changes(client, two_scans):
+    before, after, ids, findings = two_scans
+    data = (await client.get(f"/api/v1/scan/{before.id}/diff/{after.id}")).json()
+
+    assert data["summary"] == {
+        "entity_added": 1, "entity_removed": 1, "entity_changed": 1,
+        "finding_added": 1, "finding_removed": 1, "finding_changed": 1,
+    }
+    changes = {c["change"]: c for c in data["changes"]}
+    assert changes["entity_added"]["canonical_value"] == "new.example.com"
+    assert changes["entity_removed"]["canonical_value"] == "old.example.com"
+    assert changes["entity_changed"]["entity_id"] == ids["kept.example.com"]
+    assert changes["entity_changed"]["keys"] == ["ip"]
+    assert changes["finding_added"]["finding_id"] == findings["new"]
+    assert changes["finding_removed"]["finding_id"] == findings["old"]
+    assert changes["finding_changed"]["finding_id"] == findings["whois_v2"]
+    assert changes["finding_changed"]["previous_finding_id"] == findings["whois_v1"]
+    assert data["next_cursor"] is None
+
+    # The other way round, additions and removals swap
+    reverse = (await client.get(f"/api/v1/scan/{after.id}/diff/{before.id}")).json()
+    changes = {c["change"]: c for c in reverse["changes"]}
+    assert changes["entity_added"]["canonical_value"] == "old.example.com"
+    assert changes["finding_changed"]["previous_finding_id"] == findings["whois_v2"]
+
+    same = (await client.get(f"/api/v1/scan/{after.id}/diff/{after.id}")).json()
+    assert same["changes"] == [] and set(same["summary"].values()) == {0}
+
+
+async def test_diff_pages_across_kinds(client, two_scans):
+    before, after, _, _ = two_scans
+    url = f"/api/v1/scan/{before.id}/diff/{after.id}"
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get(url, params=params)).json()
+        assert (page["summary"] is None) == (cursor is not None)
+        seen += [c["change"] for c in page["changes"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [
+        "entity_added", "entity_removed", "entity_changed",
+        "finding_added", "finding_removed", "finding_changed",
+    ]
+
+    assert (await client.get(url, params={"cursor": "bogus"})).status_code == 400
+    assert (await client.get(f"/api/v1/scan/{before.id}/diff/999")).status_code == 404
@@ -0,0 +1,38 @@
+"""
+Test domain hierarchy endpoints
+"""
+from app.models.entity import Entity, EntityType, reverse_domain_labels
+
+
+def test_reverse_domain_labels():
+    """Labels are reversed and normalized"""
+    assert reverse_domain_labels("api.example.com") == "com.example.api"
+    assert reverse_domain_labels("Example.COM.") == "com.example"
+
+
+async def test_subdomains_lists_descendants_only(client, db_session):
+    """Descendants are returned in hierarchy order and paged by cursor"""
+    db_session.add_all([
+        Entity(type=EntityType.DOMAIN, canonical_value="example.com"),
+        Entity(type=EntityType.SUBDOMAIN, canonical_value="b.example.com"),
+        Entity(type=EntityType.SUBDOMAIN, canonical_value="a.example.com"),
+        Entity(type=EntityType.SUBDOMAIN, canonical_value="x.a.example.com"),
+        Entity(type=EntityType.SUBDOMAIN, canonical_value="badexample.com"),
+        Entity(type=EntityType.EMAIL, canonical_value="alice@example.com"),
+    ])
+    await db_session.commit()
+
+    response = await client.get("/api/v1/domain/example.com/subdomains", params={"limit": 2})
+    data = response.json()
+    assert [s["canonical_value"] for s in data["subdomains"]] == ["a.example.com", "x.a.example.com"]
+
+    response = await client.get(
+        "/api/v1/domain/example.com/subdomains",
+        params={"limit": 2, "cursor": data["next_cursor"]},
+    )
+    data = response.json()
+    assert [s["canonical_value"] for s in data["subdomains"]] == ["b.example.com"]
+    assert data["next_cursor"] is None
+
+    response = await client.get("/api/v1/domain/example.com/subdomains/count")
+    assert response.json()["count"] == 3
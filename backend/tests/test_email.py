@@ -0,0 +1,249 @@
+"""
+Test the email scan pipeline and shared domain lookups
+"""
+import asyncio
+from types import SimpleNamespace
+
+import dns.resolver
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.edge import EdgeType, EntityEdge
+from app.models.entity import Entity, EntityType
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.services.lookups import DomainLookups, RELEASE_LOCK
+from app.services.osint import hibp
+from app.services.osint.hibp import run_hibp
+from app.services.osint.mail import run_mail_auth, run_mx
+from app.tasks import scan as scan_tasks
+
+
+class FakeResolver:
+    def __init__(self, records):
+        self.records = records
+
+    async def resolve(self, name, rdtype):
+        if (name, rdtype) not in self.records:
+            raise dns.resolver.NoAnswer()
+        return self.records[(name, rdtype)]
+
+
+def _txt(text):
+    return SimpleNamespace(strings=(text.encode(),))
+
+
+async def test_mail_dns_lookups():
+    resolver = FakeResolver({
+        ("corp.com", "MX"): [
+            SimpleNamespace(preference=20, exchange="MX2.corp.com."),
+            SimpleNamespace(preference=10, exchange="mx1.corp.com."),
+        ],
+        ("corp.com", "TXT"): [_txt("google-site-verification=x"), _txt("v=spf1 include:_spf.corp.com ~all")],
+        ("_dmarc.corp.com", "TXT"): [_txt("v=DMARC1; p=reject; rua=mailto:d@corp.com")],
+    })
+
+    mx = await run_mx("corp.com", resolver)
+    assert [m["host"] for m in mx["data"]["mx"]] == ["mx1.corp.com", "mx2.corp.com"]
+
+    auth = (await run_mail_auth("corp.com", resolver))["data"]
+    assert auth["spf"] == "v=spf1 include:_spf.corp.com ~all"
+    assert (auth["spf_valid"], auth["spf_all"]) == (True, "softfail")
+    assert (auth["dmarc_policy"], auth["dmarc_rua"]) == ("reject", "mailto:d@corp.com")
+
+    bare = await run_mail_auth("bare.org", resolver)
+    assert bare["success"] and bare["data"]["spf"] is None and bare["data"]["dmarc_policy"] is None
+    assert (await run_mx("bare.org", resolver))["data"]["mx"] == []
+
+
+async def test_run_hibp(monkeypatch):
+    monkeypatch.setattr(settings, "HIBP_API_KEY", "")
+    assert (await run_hibp("alice@corp.com"))["error"] == "HIBP_API_KEY not configured"
+
+    monkeypatch.setattr(settings, "HIBP_API_KEY", "key")
+    breaches = [{"Name": "Adobe", "BreachDate": "2013-10-04", "PwnCount": 152445165, "Description": "..."}]
+
+    def handler(request):
+        assert request.headers["hibp-api-key"] == "key"
+        if "alice" in request.url.path:
+            return httpx.Response(200, json=breaches)
+        return httpx.Response(404)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        alice = (await run_hibp("alice@corp.com", client))["data"]
+        bob = (await run_hibp("bob@corp.com", client))["data"]
+    assert alice["breach_count"] == 1 and alice["breaches"][0]["Name"] == "Adobe"
+    assert "Description" not in alice["breaches"][0]
+    assert bob == {"email": "bob@corp.com", "breach_count": 0, "breaches": []}
+
+
+async def test_run_hibp_honours_retry_after(monkeypatch):
+    monkeypatch.setattr(settings, "HIBP_API_KEY", "key")
+    waits = []
+
+    async def sleep(seconds):
+        waits.append(seconds)
+
+    monkeypatch.setattr(hibp.asyncio, "sleep", sleep)
+    responses = []
+
+    def handler(request):
+        return responses.pop(0)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        responses[:] = [httpx.Response(429, headers={"retry-after": "2"}), httpx.Response(404)]
+        assert (await run_hibp("bob@corp.com", client))["success"]
+        assert waits == [2.0]
+
+        # Bounded: a long wait or repeated 429s give up
+        responses[:] = [httpx.Response(429, headers={"retry-after": "3600"})]
+        assert (await run_hibp("bob@corp.com", client))["error"] == "Rate limited (retry after 3600s)"
+        responses[:] = [httpx.Response(429, headers={"retry-after": "1"})] * (hibp.RATE_LIMIT_RETRIES + 1)
+        assert (await run_hibp("bob@corp.com", client))["success"] is False
+        assert responses == [] and waits == [2.0] + [1.0] * hibp.RATE_LIMIT_RETRIES
+
+
+class FakeRedis:
+    """Just enough of the redis.asyncio API for shared lookups"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def eval(self, script, numkeys, key, token):
+        assert script == RELEASE_LOCK
+        if self.data.get(key) == token:
+            return int(self.data.pop(key) is not None)
+        return 0
+
+
+async def test_domain_lookups_run_once():
+    redis = FakeRedis()
+    lookups = DomainLookups(redis_factory=lambda: redis)
+    calls = []
+
+    async def lookup():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"success": True, "data": {"mx": ["mx1.corp.com"]}}
+
+    results = await asyncio.gather(*(lookups.get("mx", "corp.com", lookup) for _ in range(50)))
+    assert len(calls) == 1
+    assert all(r["data"] == {"mx": ["mx1.corp.com"]} for r in results)
+    assert sum(bool(r.get("shared")) for r in results) == 49
+    assert not any(key.endswith(":lock") for key in redis.data)
+
+    async def failing():
+        calls.append(1)
+        return {"success": False, "error": "timeout"}
+
+    assert (await lookups.get("mx", "down.org", failing))["success"] is False
+    await lookups.get("mx", "down.org", failing)
+    assert len(calls) == 3  # failures are not shared
+
+
+async def test_domain_lookups_keep_a_lock_taken_over():
+    """A lock that expired mid-lookup and went to another scan is not released"""
+    redis = FakeRedis()
+    lookups = DomainLookups(redis_factory=lambda: redis)
+
+    async def slow_lookup():
+        redis.data["osint:lookup:mx:corp.com:lock"] = "other-scan"
+        return {"success": True, "data": {"mx": []}}
+
+    await lookups.get("mx", "corp.com", slow_lookup)
+    assert redis.data["osint:lookup:mx:corp.com:lock"] == "other-scan"
+
+
+@pytest.fixture
+def offline_email_scans(offline_scans, monkeypatch):
+    """Offline email scans with scripted lookups"""
+    monkeypatch.setattr(settings, "HIBP_API_KEY", "key")
+    redis = FakeRedis()
+    monkeypatch.setattr(scan_tasks, "domain_lookups", DomainLookups(redis_factory=lambda: redis))
+
+    calls = []
+
+    async def fake_mx(domain):
+        calls.append(("mx", domain))
+        return {"success": True, "data": {"domain": domain, "mx": [{"preference": 10, "host": f"mx.{domain}"}]}}
+
+    async def fake_mail_auth(domain):
+        calls.append(("mail_auth", domain))
+        return {"success": True, "data": {"domain": domain, "spf": "v=spf1 -all", "dmarc_policy": "reject"}}
+
+    async def fake_hibp(email):
+        calls.append(("hibp", email))
+        return {"success": True, "data": {"email": email, "breach_count": 0, "breaches": []}}
+
+    monkeypatch.setattr(scan_tasks, "run_mx", fake_mx)
+    monkeypatch.setattr(scan_tasks, "run_mail_auth", fake_mail_auth)
+    monkeypatch.setattr(scan_tasks, "run_hibp", fake_hibp)
+    return calls
+
+
+async def test_email_scans_share_domain_lookups(db_session, offline_email_scans):
+    scans = {}
+    for email in ("alice@corp.com", "Bob@Corp.com"):
+        scan = Scan(target=email, type=ScanType.EMAIL)
+        db_session.add(scan)
+        await db_session.commit()
+        await scan_tasks._run_scan_async(scan.id, email, [], ScanType.EMAIL)
+        await db_session.refresh(scan)
+        assert scan.status == ScanStatus.COMPLETED
+        scans[email] = scan
+
+    # Domain-level lookups ran once for both addresses; breaches per address
+    assert offline_email_scans == [
+        ("mx", "corp.com"), ("mail_auth", "corp.com"), ("hibp", "alice@corp.com"), ("hibp", "bob@corp.com"),
+    ]
+
+    entities = {
+        (e.type, e.canonical_value): e.id
+        for e in (await db_session.execute(select(Entity))).scalars()
+    }
+    assert set(entities) == {
+        (EntityType.EMAIL, "alice@corp.com"), (EntityType.EMAIL, "bob@corp.com"),
+        (EntityType.DOMAIN, "corp.com"), (EntityType.DOMAIN, "mx.corp.com"),
+    }
+    edges = {
+        (e.src_entity_id, e.dst_entity_id, e.type)
+        for e in (await db_session.execute(select(EntityEdge))).scalars()
+    }
+    domain = entities[(EntityType.DOMAIN, "corp.com")]
+    assert edges == {
+        (entities[(EntityType.EMAIL, "alice@corp.com")], domain, EdgeType.EMAIL_DOMAIN.value),
+        (entities[(EntityType.EMAIL, "bob@corp.com")], domain, EdgeType.EMAIL_DOMAIN.value),
+        (domain, entities[(EntityType.DOMAIN, "mx.corp.com")], EdgeType.MAIL_SERVER.value),
+    }
+
+    # One finding per domain lookup, observed by both scans
+    findings = (await db_session.execute(select(Finding.source, Finding.entity_id))).all()
+    assert sorted(f.source for f in findings) == ["hibp", "hibp", "mail_auth", "mx"]
+    observed = (await db_session.execute(select(FindingObservation.scan_id))).scalars().all()
+    assert sorted(observed) == sorted([scans["alice@corp.com"].id] * 3 + [scans["Bob@Corp.com"].id] * 3)
+
+
+def test_email_pipeline_modules(monkeypatch):
+    monkeypatch.setattr(settings, "HIBP_API_KEY", "")
+    assert scan_tasks._scan_modules([], ScanType.EMAIL) == ["mx", "mail_auth"]
+    assert scan_tasks._scan_modules(["whois", "mx"], ScanType.EMAIL) == ["mx"]
+    assert scan_tasks._scan_modules([], ScanType.DOMAIN) == ["whois", "ssl"]
+    assert scan_tasks._email_domain("not-an-email") is None
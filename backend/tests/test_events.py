@@ -0,0 +1,101 @@
+"""
+Test scan progress fan-out
+"""
+import asyncio
+
+import orjson
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import scan as scan_endpoints
+from app.services import events
+from app.services.events import ScanEventHub, events_channel
+from main import app
+
+
+class FakePubSub:
+    """In-memory stand-in for a redis.asyncio PubSub connection"""
+
+    def __init__(self, broker):
+        self.broker = broker
+        self.channels = set()
+        self.inbox = asyncio.Queue()
+        broker.connections.append(self)
+
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+
+    async def unsubscribe(self, *channels):
+        self.channels.difference_update(channels)
+
+    async def close(self):
+        pass
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return await asyncio.wait_for(self.inbox.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class FakeBroker:
+    def __init__(self):
+        self.connections = []
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def publish(self, channel, data):
+        for connection in self.connections:
+            if channel in connection.channels:
+                connection.inbox.put_nowait(
+                    {"type": "message", "channel": channel.encode(), "data": data}
+                )
+
+
+async def test_hub_fans_out_to_every_subscriber_of_a_scan(monkeypatch):
+    """One pub/sub subscription serves all local sockets watching a scan"""
+    broker = FakeBroker()
+    monkeypatch.setattr(events, "get_redis", lambda: broker)
+    hub = ScanEventHub()
+
+    first = await hub.subscribe(7)
+    second = await hub.subscribe(7)
+    other = await hub.subscribe(8)
+    assert len(broker.connections) == 1
+
+    payload = orjson.dumps({"scan_id": 7, "event": "module_started", "module": "ssl"})
+    broker.publish(events_channel(7), payload)
+
+    assert await asyncio.wait_for(first.get(), 1) == payload
+    assert await asyncio.wait_for(second.get(), 1) == payload
+    assert other.empty()
+
+    await hub.unsubscribe(7, first)
+    assert events_channel(7) in broker.connections[0].channels
+    await hub.unsubscribe(7, second)
+    assert events_channel(7) not in broker.connections[0].channels
+    await hub.unsubscribe(8, other)
+    await hub.close()
+
+
+def test_websocket_sends_text_frames(monkeypatch):
+    """Events reach browsers as JSON text, not binary frames"""
+    queue = asyncio.Queue()
+    queue.put_nowait(orjson.dumps({"scan_id": 1, "event": "scan_completed"}))
+
+    async def subscribe(scan_id):
+        return queue
+
+    async def unsubscribe(scan_id, queue):
+        pass
+
+    async def snapshot(scan_id):
+        return {"scan": {"event": "scan_started"}, "modules": {}}
+
+    monkeypatch.setattr(scan_endpoints.scan_events, "subscribe", subscribe)
+    monkeypatch.setattr(scan_endpoints.scan_events, "unsubscribe", unsubscribe)
+    monkeypatch.setattr(scan_endpoints, "get_scan_snapshot", snapshot)
+
+    with TestClient(app).websocket_connect("/api/v1/scan/1/ws") as ws:
+        assert orjson.loads(ws.receive_text())["scan"]["event"] == "scan_started"
+        assert orjson.loads(ws.receive_text())["event"] == "scan_completed"
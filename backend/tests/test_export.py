@@ -0,0 +1,123 @@
+"""
+Test streaming bulk export
+"""
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import cli
+from app.api.v1.endpoints import export as export_endpoints
+from app.models.entity import Entity, EntityType
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.models.scan_entity import ScanEntity
+from app.services import export as export_service
+
+
+@pytest.fixture
+async def two_scans(db_session, db_engine, monkeypatch):
+    """Two scans with a domain and a subdomain each; ssl and whois findings"""
+    monkeypatch.setattr(
+        export_endpoints, "ReadSessionLocal",
+        async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False),
+    )
+    scans = []
+    for target in ("example.com", "example.org"):
+        scan = Scan(target=target, type=ScanType.DOMAIN, status=ScanStatus.COMPLETED)
+        db_session.add(scan)
+        await db_session.flush()
+        for entity_type, name in ((EntityType.DOMAIN, target), (EntityType.SUBDOMAIN, f"www.{target}")):
+            entity = Entity(scan_id=scan.id, type=entity_type, canonical_value=name)
+            db_session.add(entity)
+            await db_session.flush()
+            findings = [
+                Finding(entity_id=entity.id, source="ssl", type="certificate", raw_result={"n": 1}),
+                Finding(entity_id=entity.id, source="whois", type="domain_info", raw_result={"n": 2}),
+            ]
+            db_session.add_all(findings)
+            await db_session.flush()
+            db_session.add(ScanEntity(scan_id=scan.id, entity_id=entity.id))
+            db_session.add_all(FindingObservation(finding_id=f.id, scan_id=scan.id) for f in findings)
+        scans.append(scan)
+    await db_session.commit()
+    return scans
+
+
+async def test_export_ndjson_filters(client, two_scans):
+    """Scan, entity type and source filters combine"""
+    response = await client.get(
+        "/api/v1/export/findings",
+        params={"scan_id": two_scans[1].id, "entity_type": "subdomain", "source": "ssl", "include": "raw_result"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(r["entity_value"], r["source"], r["raw_result"]) for r in rows] == [
+        ("www.example.org", "ssl", {"n": 1}),
+    ]
+
+    response = await client.get("/api/v1/export/entities", params={"source": "whois"})
+    assert len(response.text.splitlines()) == 4
+
+
+async def test_export_scan_filter_follows_what_scans_saw(client, db_session, two_scans):
+    """Entities a rescan saw again are exported for it, not only for their first scan"""
+    rescan = Scan(target="example.com", type=ScanType.DOMAIN, status=ScanStatus.COMPLETED)
+    db_session.add(rescan)
+    await db_session.flush()
+    entity = (await db_session.execute(
+        select(Entity).where(Entity.canonical_value == "example.com")
+    )).scalar_one()
+    db_session.add(ScanEntity(scan_id=rescan.id, entity_id=entity.id))
+    await db_session.commit()
+
+    response = await client.get("/api/v1/export/entities", params={"scan_id": rescan.id})
+    assert [json.loads(line)["canonical_value"] for line in response.text.splitlines()] == ["example.com"]
+    response = await client.get("/api/v1/export/findings", params={"scan_id": rescan.id})
+    assert response.text == ""
+
+
+async def test_export_csv_in_small_batches(client, two_scans, monkeypatch):
+    """Batches are encoded one at a time under a single header"""
+    monkeypatch.setattr(export_service, "EXPORT_BATCH_SIZE", 3)
+    response = await client.get("/api/v1/export/findings", params={"format": "csv"})
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 8
+    assert rows[0]["entity_type"] == "domain"
+    assert [int(r["id"]) for r in rows] == sorted(int(r["id"]) for r in rows)
+
+
+async def test_export_parquet_row_groups(client, two_scans, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(export_service, "EXPORT_BATCH_SIZE", 3)
+    response = await client.get(
+        "/api/v1/export/entities", params={"format": "parquet", "include": "metadata"}
+    )
+    parquet = pq.ParquetFile(io.BytesIO(response.content))
+    assert parquet.metadata.num_rows == 4
+    assert parquet.metadata.num_row_groups == 2
+    assert parquet.read().column("canonical_value").to_pylist()[0] == "example.com"
+
+
+async def test_export_rejects_bad_parameters(client):
+    assert (await client.get("/api/v1/export/scans")).status_code == 404
+    assert (await client.get("/api/v1/export/findings", params={"format": "xml"})).status_code == 400
+    assert (await client.get("/api/v1/export/findings", params={"entity_type": "planet"})).status_code == 400
+    assert (await client.get("/api/v1/export/entities", params={"include": "raw_result"})).status_code == 400
+
+
+@pytest.mark.parametrize("argv, error", [
+    (["--entity-type", "planet"], "Unknown entity type(s): planet"),
+    (["--include", "raw_result"], "Unknown include field(s) for entities: raw_result"),
+])
+def test_cli_export_rejects_bad_arguments(argv, error, capsys):
+    """The CLI runs the endpoint's checks and reports them as usage errors"""
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["export", "entities", *argv])
+    assert exit_info.value.code == 2
+    assert error in capsys.readouterr().err
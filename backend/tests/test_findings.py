@@ -0,0 +1,85 @@
+"""
+Test finding deduplication into observations
+"""
+import pytest
+from sqlalchemy import select, func
+
+from app.models.attribute import EntityAttribute
+from app.models.entity import Entity, EntityType
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.services import blobstore
+from app.tasks import scan as scan_tasks
+
+
+pytestmark = pytest.mark.usefixtures("isolated_services")
+
+
+async def test_identical_payloads_become_observations(client, db_session):
+    """Rescans seeing the same payload add an observation, not a finding"""
+    scans = [Scan(target="example.com", type=ScanType.DOMAIN, status=ScanStatus.COMPLETED) for _ in range(3)]
+    db_session.add_all(scans)
+    await db_session.flush()
+    entity = Entity(scan_id=scans[0].id, type=EntityType.DOMAIN, canonical_value="example.com")
+    db_session.add(entity)
+    await db_session.commit()
+
+    whois = {"domain": "example.com", "registrar": "Example Registrar", "raw": "x" * 5000}
+    first = await scan_tasks._create_finding(
+        db_session, scans[0].id, entity.id, "whois", "domain_info", 1.0, whois
+    )
+    again = await scan_tasks._create_finding(
+        db_session, scans[1].id, entity.id, "whois", "domain_info", 1.0, dict(whois)
+    )
+    changed = await scan_tasks._create_finding(
+        db_session, scans[2].id, entity.id, "whois", "domain_info", 1.0,
+        {**whois, "registrar": "Other Registrar"},
+    )
+
+    assert again.id == first.id
+    assert changed.id != first.id
+    assert (await db_session.execute(select(func.count()).select_from(Finding))).scalar_one() == 2
+    observed = (await db_session.execute(
+        select(FindingObservation.scan_id)
+        .where(FindingObservation.finding_id == first.id)
+        .order_by(FindingObservation.id)
+    )).scalars().all()
+    assert observed == [scans[0].id, scans[1].id]
+
+    response = await client.get(f"/api/v1/entity/{entity.id}/findings")
+    times_seen = {f["id"]: f["times_seen"] for f in response.json()["findings"]}
+    assert times_seen == {first.id: 2, changed.id: 1}
+
+    # Only the first page counts the findings
+    page = (await client.get(f"/api/v1/entity/{entity.id}/findings", params={"limit": 1})).json()
+    assert page["total"] == 2
+    page = (await client.get(
+        f"/api/v1/entity/{entity.id}/findings", params={"limit": 1, "cursor": page["next_cursor"]},
+    )).json()
+    assert page["total"] is None and len(page["findings"]) == 1
+
+
+async def test_whois_raw_record_is_not_an_attribute(db_session, monkeypatch):
+    """The WHOIS text dump goes to the finding blob, not to entity attributes"""
+    scan = Scan(target="example.com", type=ScanType.DOMAIN)
+    db_session.add(scan)
+    await db_session.commit()
+
+    async def fake_whois(target):
+        return {"success": True, "data": {
+            "domain": target, "registrar": "Example Registrar", "creation_date": "2001-01-01T00:00:00",
+            "expiration_date": None, "name_servers": ["ns1.example.net"], "status": "ok",
+            "raw": "x" * 5000,
+        }}
+
+    monkeypatch.setattr(scan_tasks, "run_whois", fake_whois)
+    result = {"entity_ids": [], "finding_ids": []}
+    assert await scan_tasks._whois_module(db_session, scan.id, "example.com", result) is None
+
+    keys = set((await db_session.execute(
+        select(EntityAttribute.key).where(EntityAttribute.entity_id == result["entity_ids"][0])
+    )).scalars())
+    assert keys == {"registrar", "creation_date", "expiration_date", "status", "name_servers"}
+    finding = await db_session.get(Finding, result["finding_ids"][0])
+    assert (await blobstore.get_blob_store().get(finding.raw_blob_hash))["raw"] == "x" * 5000
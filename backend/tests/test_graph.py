@@ -0,0 +1,50 @@
+"""
+Test entity relationship edges and the graph endpoint
+"""
+from app.models.edge import EntityEdge, EdgeType
+from app.models.entity import Entity, EntityType
+
+
+async def test_graph_walks_k_hops_with_caps(client, db_session):
+    """Neighbours are returned breadth first, bounded by depth and node cap"""
+    names = ["example.com", "ns1.dns.net", "other.org", "a.example.com", "x.a.example.com"]
+    entities = {
+        name: Entity(type=EntityType.DOMAIN, canonical_value=name) for name in names
+    }
+    db_session.add_all(entities.values())
+    await db_session.flush()
+    ids = {name: e.id for name, e in entities.items()}
+
+    def edge(src, dst, edge_type):
+        return EntityEdge(
+            src_entity_id=ids[src], dst_entity_id=ids[dst], type=edge_type.value
+        )
+
+    db_session.add_all([
+        edge("example.com", "ns1.dns.net", EdgeType.NAME_SERVER),
+        edge("other.org", "ns1.dns.net", EdgeType.NAME_SERVER),
+        edge("a.example.com", "example.com", EdgeType.SUBDOMAIN_OF),
+        edge("x.a.example.com", "a.example.com", EdgeType.SUBDOMAIN_OF),
+    ])
+    await db_session.commit()
+
+    url = f"/api/v1/entity/{ids['example.com']}/graph"
+    data = (await client.get(url, params={"depth": 1})).json()
+    assert {n["value"]: n["depth"] for n in data["nodes"]} == {
+        "example.com": 0, "ns1.dns.net": 1, "a.example.com": 1,
+    }
+    assert len(data["edges"]) == 2
+
+    # Shared name server links example.com to other.org in two hops
+    data = (await client.get(url, params={"depth": 2})).json()
+    assert {n["value"] for n in data["nodes"]} == set(names)
+    assert len(data["edges"]) == 4
+    assert data["truncated"] == {"nodes": False, "edges": False}
+
+    data = (await client.get(
+        url, params={"depth": 2, "edge_types": "subdomain_of", "max_nodes": 2}
+    )).json()
+    assert [n["value"] for n in data["nodes"]] == ["example.com", "a.example.com"]
+    assert data["truncated"]["nodes"] is True
+
+    assert (await client.get("/api/v1/entity/999999/graph")).status_code == 404
@@ -17,13 +17,8 @@ def test_health_check():
     assert data["service"] == "ai-osint-kit-api"
 
 
-
-
-
-
-
-
-
-
-
-
+def test_database_health_reports_pools():
+    """The db health endpoint reports the primary pool"""
+    response = client.get("/api/v1/health/db")
+    assert response.status_code == 200
+    assert "primary" in response.json()["pools"]
@@ -0,0 +1,133 @@
+"""
+Test streaming bulk import
+"""
+import io
+
+import orjson
+import pytest
+from sqlalchemy import select, func
+
+from app.core.config import settings
+from app.db import dialect
+from app.db.dialect import advisory_lock_key
+from app.models.entity import Entity, EntityType
+from app.models.scan import Scan, ScanType
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.services import blobstore
+from app.services.importer import import_stream, parse_row, ImportRowError
+from app.services import importer
+from app.tasks import scan as scan_tasks
+
+
+pytestmark = pytest.mark.usefixtures("isolated_services")
+
+
+def test_parse_row_normalizes_values():
+    row = parse_row({"type": "Domain", "value": " Example.COM. "})
+    assert (row.entity_type, row.value, row.source) == (EntityType.DOMAIN, "example.com", None)
+    assert parse_row({"entity_type": "ip", "value": "2001:DB8::0:1"}).value == "2001:db8::1"
+
+    for record in (
+        {"type": "planet", "value": "mars"},
+        {"type": "ip", "value": "300.1.1.1"},
+        {"type": "email", "value": "nobody"},
+        {"type": "domain", "value": "example.com", "source": "shodan"},
+        {"type": "domain", "value": "example.com", "confidence_score": "high"},
+    ):
+        with pytest.raises(ImportRowError):
+            parse_row(record)
+
+
+async def test_import_csv_upserts_entities_in_chunks(db_session, monkeypatch):
+    """Known entities are reused, chunks are committed, bad rows are reported"""
+    monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 2)
+    db_session.add(Entity(type=EntityType.DOMAIN, canonical_value="example.com"))
+    await db_session.commit()
+    invalidated = []
+
+    async def invalidate(kind, object_id):
+        invalidated.append((kind, object_id))
+
+    monkeypatch.setattr(importer.response_cache, "invalidate", invalidate)
+
+    data = (
+        "entity_type,value,source,finding_type,raw_result\n"
+        "domain,EXAMPLE.com,,,\n"
+        "subdomain,www.example.com,,,\n"
+        "ip,not-an-ip,,,\n"
+        "domain,example.com,inventory,owner,\"{\"\"team\"\": \"\"web\"\"}\"\n"
+        "ip,192.0.2.1,,,\n"
+    )
+    progress = []
+    report = await import_stream(
+        db_session, io.BytesIO(data.encode()), "csv",
+        on_progress=lambda r: progress.append(r.rows_read),
+    )
+
+    assert report.rows_read == 5 and report.rows_rejected == 1
+    assert report.errors == ["line 4: invalid IP address: 'not-an-ip'"]
+    assert report.findings_created == 1 and report.chunks == 2
+    assert progress == [2, 5]
+    values = (await db_session.execute(
+        select(Entity.canonical_value).order_by(Entity.id)
+    )).scalars().all()
+    assert values == ["example.com", "www.example.com", "192.0.2.1"]
+    # Entities without findings had last_seen bumped too
+    assert sorted(invalidated) == [("entity", 1), ("entity", 1), ("entity", 2), ("entity", 3)]
+    finding = (await db_session.execute(select(Finding))).scalar_one()
+    assert finding.raw_blob_hash is not None
+    assert await blobstore.get_blob_store().get(finding.raw_blob_hash) == {"team": "web"}
+
+
+async def test_import_ndjson_observes_known_findings(db_session):
+    """Re-importing the same findings only adds observations"""
+    lines = [
+        {"type": "domain", "value": "example.com", "source": "shodan", "finding_type": "open_port",
+         "confidence_score": 0.9, "raw_result": {"port": port}}
+        for port in (22, 443)
+    ]
+    data = b"".join(orjson.dumps(line) + b"\n" for line in lines) + b"[1, 2]\n"
+
+    first = await import_stream(db_session, io.BytesIO(data), "ndjson")
+    again = await import_stream(db_session, io.BytesIO(data), "ndjson")
+
+    assert (first.findings_created, first.findings_observed, first.rows_rejected) == (2, 0, 1)
+    assert (again.findings_created, again.findings_observed) == (0, 2)
+    assert (await db_session.execute(select(func.count()).select_from(Finding))).scalar_one() == 2
+    assert (await db_session.execute(
+        select(func.count()).select_from(FindingObservation)
+    )).scalar_one() == 4
+
+
+async def test_import_locks_findings_like_scans(db_session, monkeypatch):
+    """Imports and scans take the same per-payload locks before looking for a finding"""
+    locked = []
+
+    async def record_locks(db, keys):
+        locked.append(sorted(keys))
+
+    monkeypatch.setattr(importer, "advisory_xact_locks", record_locks)
+    monkeypatch.setattr(scan_tasks, "advisory_xact_locks", record_locks)
+    line = {"type": "domain", "value": "example.com", "source": "shodan", "finding_type": "open_port",
+            "raw_result": {"port": 22}}
+    await import_stream(db_session, io.BytesIO(orjson.dumps(line) + b"\n"), "ndjson")
+    scan = Scan(target="example.com", type=ScanType.DOMAIN)
+    db_session.add(scan)
+    await db_session.commit()
+    entity_id = (await db_session.execute(select(Entity.id))).scalar_one()
+    await scan_tasks._create_finding(db_session, scan.id, entity_id, "shodan", "open_port", 0.0, {"port": 22})
+    assert locked[0] == locked[1]
+
+    class Postgres:
+        """Session stand-in recording the lock statement"""
+        bind = type("Bind", (), {"dialect": type("Dialect", (), {"name": "postgresql"})})
+        params = None
+
+        async def execute(self, statement, params=None):
+            Postgres.params = params
+
+    keys = [(2, "b", "t", "h"), (1, "a", "t", "h"), (2, "b", "t", "h")]
+    await dialect.advisory_xact_locks(Postgres(), keys)
+    assert Postgres.params["ids"] == sorted({advisory_lock_key(key) for key in keys})
+    assert len(Postgres.params["ids"]) == 2
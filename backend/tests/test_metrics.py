@@ -0,0 +1,43 @@
+"""
+Test Prometheus metrics
+"""
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from app.core import metrics
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+async def test_instrumented_engine_times_queries(db_engine):
+    metrics.instrument_engine(db_engine, "test")
+    before = _sample("osint_db_query_duration_seconds_count", engine="test", operation="select")
+
+    async with db_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        await conn.execute(text("PRAGMA user_version"))
+
+    assert _sample("osint_db_query_duration_seconds_count", engine="test", operation="select") == before + 1
+    assert _sample("osint_db_query_duration_seconds_count", engine="test", operation="other") >= 1
+
+
+def test_labels_are_bounded():
+    before = _sample("osint_entities_written_total", module="other")
+    metrics.record_written("some-vendor-feed", entities=3)
+    metrics.record_upstream("example.net", "5xx")
+
+    assert _sample("osint_entities_written_total", module="other") == before + 3
+    assert _sample("osint_upstream_responses_total", upstream="other", status="5xx") >= 1
+    assert metrics.status_class(404) == "4xx"
+
+
+async def test_metrics_endpoint(client, monkeypatch):
+    monkeypatch.setattr(metrics, "_queue_depths", lambda: [("celery", 7)])
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'osint_celery_queue_depth{queue="celery"} 7.0' in response.text
+    assert "osint_module_duration_seconds" in response.text
@@ -0,0 +1,72 @@
+"""
+Test keyset pagination
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.db.pagination import encode_cursor, decode_cursor
+from app.models.scan import Scan, ScanStatus, ScanType
+
+
+def test_cursor_round_trip():
+    """Cursors decode to the values they were built from"""
+    cursor = encode_cursor("2026-10-19T09:00:00+00:00", 42)
+    assert decode_cursor(cursor, 2) == ["2026-10-19T09:00:00+00:00", 42]
+
+
+def test_malformed_cursor_is_rejected():
+    """Garbage and wrongly sized cursors raise a 400"""
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor", 2)
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor(1, 2, 3), 2)
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor({"id": 1}, [2]), 2)
+
+
+async def test_cursor_values_must_match_the_sort_columns(client):
+    """Crafted cursors with values of the wrong type are a 400, not a 500"""
+    for cursor in (
+        encode_cursor(5, 1),
+        encode_cursor("2026-10-19T09:00:00+00:00", "1"),
+        encode_cursor("2026-10-19T09:00:00+00:00", True),
+        encode_cursor("2026-10-19T09:00:00+00:00", {"id": 1}),
+    ):
+        response = await client.get("/api/v1/scan", params={"cursor": cursor})
+        assert response.status_code == 400
+
+    for cursor in (encode_cursor(0.5, "entity", [1]), encode_cursor(0.5, "planet", 1)):
+        response = await client.get("/api/v1/search", params={"q": "example", "cursor": cursor})
+        assert response.status_code == 400
+
+
+async def test_scans_are_paged_by_cursor(client, db_session):
+    """Pages follow (created_at, id) descending without gaps or repeats"""
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    db_session.add_all([
+        Scan(
+            target=f"host{i}.example.com",
+            type=ScanType.DOMAIN,
+            status=ScanStatus.COMPLETED,
+            created_at=base + timedelta(minutes=i // 2),  # pairs share a timestamp
+        )
+        for i in range(5)
+    ])
+    await db_session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/v1/scan", params=params)
+        assert response.status_code == 200
+        seen.extend(s["target"] for s in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == [f"host{i}.example.com" for i in (4, 3, 2, 1, 0)]
@@ -0,0 +1,60 @@
+"""
+Test connection pool instrumentation
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import database
+from app.db.pool import InstrumentedQueuePool, pool_status
+
+
+@pytest.fixture
+async def pooled_engine(tmp_path):
+    """File-backed SQLite engine on a one-connection instrumented pool"""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    yield engine
+    await engine.dispose()
+
+
+async def test_pool_status_tracks_checkouts_and_timeouts(pooled_engine):
+    """Checkouts are timed and an exhausted pool counts its timeouts"""
+    async with pooled_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        busy = pool_status(pooled_engine)
+        assert busy["checked_out"] == 1
+        assert busy["saturation"] == 1.0
+
+        with pytest.raises(PoolTimeoutError):
+            async with pooled_engine.connect():
+                pass
+
+    status = pool_status(pooled_engine)
+    assert status["checked_out"] == 0
+    assert status["checkouts"] == 1
+    assert status["timeouts"] == 1
+    assert status["wait_ms"]["p50"] >= 0
+
+
+def test_run_async_empties_pools_before_the_loop_closes(tmp_path, monkeypatch):
+    """Task loops leave no pooled connection behind for the next loop"""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'tasks.db'}", poolclass=InstrumentedQueuePool, pool_size=1,
+    )
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "read_engine", engine)
+
+    async def query():
+        async with engine.connect() as conn:
+            return (await conn.execute(text("SELECT 1"))).scalar_one()
+
+    assert database.run_async(query()) == 1
+    assert engine.pool.checkedin() == 0
+    assert database.run_async(query()) == 1
@@ -0,0 +1,109 @@
+"""
+Test finding retention and partition helpers
+"""
+from datetime import date, datetime, timezone
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.partitions import (
+    add_months, create_month_partition_sql, months_between, parse_partition_name, partition_name,
+)
+from app.models.entity import Entity, EntityType
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.tasks import retention
+
+
+def test_partition_names_round_trip():
+    month = date(2026, 10, 1)
+    assert partition_name("findings", month) == "findings_p202610"
+    assert partition_name("findings", month, "ssl") == "findings_p202610_ssl"
+    assert parse_partition_name("findings", "findings_p202610_default") == (month, "default")
+    assert parse_partition_name("finding_observations", "finding_observations_p202610") == (month, None)
+    assert parse_partition_name("findings", "findings_legacy") is None
+
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert months_between(date(2026, 11, 15), date(2027, 1, 1)) == [
+        date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1),
+    ]
+
+    statements = create_month_partition_sql("findings", date(2026, 12, 1))
+    assert "TO ('2027-01-01 00:00:00+00') PARTITION BY LIST (source)" in statements[0]
+    assert statements[-1].endswith("findings_p202612_default PARTITION OF findings_p202612 DEFAULT")
+    assert len(create_month_partition_sql("finding_observations", date(2026, 12, 1))) == 1
+
+
+async def test_retention_deletes_expired_rows(db_session, monkeypatch):
+    """Without partitions, expired findings and observations are deleted in batches"""
+    monkeypatch.setattr(settings, "FINDINGS_RETENTION_DAYS", 365)
+    monkeypatch.setattr(settings, "FINDINGS_RETENTION_BY_SOURCE", {"ssl": 30})
+    monkeypatch.setattr(settings, "OBSERVATIONS_RETENTION_DAYS", 90)
+    monkeypatch.setattr(settings, "RETENTION_DELETE_BATCH", 2)
+
+    scan = Scan(target="example.com", type=ScanType.DOMAIN, status=ScanStatus.COMPLETED)
+    db_session.add(scan)
+    await db_session.flush()
+    entity = Entity(scan_id=scan.id, type=EntityType.DOMAIN, canonical_value="example.com")
+    db_session.add(entity)
+    await db_session.flush()
+
+    def at(month, day=1):
+        return datetime(2026, month, day, tzinfo=timezone.utc)
+
+    findings = {
+        "old_whois": Finding(entity_id=entity.id, source="whois", type="domain_info", created_at=datetime(2025, 6, 1, tzinfo=timezone.utc)),
+        "recent_whois": Finding(entity_id=entity.id, source="whois", type="domain_info", created_at=at(6)),
+        "old_ssl": Finding(entity_id=entity.id, source="ssl", type="certificate", created_at=at(8)),
+        "recent_ssl": Finding(entity_id=entity.id, source="ssl", type="certificate", created_at=at(10, 1)),
+    }
+    db_session.add_all(findings.values())
+    await db_session.flush()
+    db_session.add_all([
+        FindingObservation(finding_id=f.id, scan_id=scan.id, observed_at=f.created_at)
+        for f in findings.values()
+    ])
+    await db_session.commit()
+
+    report = await retention.enforce_retention(db_session, today=date(2026, 10, 19))
+
+    assert report["dropped"] == [] and report["archived"] == []
+    assert report["deleted"] == {"findings": 2, "finding_observations": 1}
+    kept = set((await db_session.execute(select(Finding.id))).scalars())
+    assert kept == {findings["recent_whois"].id, findings["recent_ssl"].id}
+    observed = set((await db_session.execute(select(FindingObservation.finding_id))).scalars())
+    assert observed == {findings["recent_ssl"].id}
+
+
+async def test_retention_keeps_findings_observed_after_the_cutoff(db_session, monkeypatch):
+    """A finding expires by its last observation, not by when it was created"""
+    monkeypatch.setattr(settings, "FINDINGS_RETENTION_DAYS", 365)
+    monkeypatch.setattr(settings, "FINDINGS_RETENTION_BY_SOURCE", {"ssl": 30})
+    monkeypatch.setattr(settings, "OBSERVATIONS_RETENTION_DAYS", 90)
+
+    entity = Entity(type=EntityType.DOMAIN, canonical_value="example.com")
+    db_session.add(entity)
+    await db_session.flush()
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    whois = Finding(entity_id=entity.id, source="whois", type="domain_info", created_at=created)
+    ssl = Finding(entity_id=entity.id, source="ssl", type="certificate", created_at=created)
+    db_session.add_all([whois, ssl])
+    await db_session.flush()
+    db_session.add_all([
+        FindingObservation(finding_id=whois.id, observed_at=created),
+        # Rescans saw the same payloads after their cutoffs
+        FindingObservation(finding_id=whois.id, observed_at=datetime(2026, 10, 1, tzinfo=timezone.utc)),
+        FindingObservation(finding_id=ssl.id, observed_at=datetime(2026, 10, 18, tzinfo=timezone.utc)),
+    ])
+    await db_session.commit()
+
+    report = await retention.enforce_retention(db_session, today=date(2026, 10, 19))
+
+    assert report["deleted"] == {"findings": 0, "finding_observations": 1}
+    kept = set((await db_session.execute(select(Finding.id))).scalars())
+    assert kept == {whois.id, ssl.id}
+    observed = (await db_session.execute(
+        select(FindingObservation.finding_id).order_by(FindingObservation.finding_id)
+    )).scalars().all()
+    assert observed == [whois.id, ssl.id]
@@ -0,0 +1,301 @@
+"""
+Test scan detail endpoints
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api.v1.endpoints import scan as scan_endpoints
+from app.core.config import settings
+from app.models.entity import Entity, EntityType
+from app.models.finding import Finding
+from app.models.observation import FindingObservation
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.models.scan_entity import ScanEntity
+from app.models.scan_module_run import ScanModuleRun
+from app.tasks import scan as scan_tasks
+
+
+@pytest.fixture
+async def scan_with_findings(db_session):
+    """A completed scan with three entities, each carrying one finding"""
+    scan = Scan(target="example.com", type=ScanType.DOMAIN, status=ScanStatus.COMPLETED)
+    db_session.add(scan)
+    await db_session.flush()
+    for name in ("example.com", "a.example.com", "b.example.com"):
+        entity = Entity(scan_id=scan.id, type=EntityType.SUBDOMAIN, canonical_value=name)
+        db_session.add(entity)
+        await db_session.flush()
+        finding = Finding(
+            entity_id=entity.id, source="ssl", type="certificate_transparency",
+            raw_result={"blob": "x" * 100},
+        )
+        db_session.add(finding)
+        await db_session.flush()
+        db_session.add_all([
+            ScanEntity(scan_id=scan.id, entity_id=entity.id),
+            FindingObservation(finding_id=finding.id, scan_id=scan.id),
+        ])
+    await db_session.commit()
+    return scan
+
+
+async def test_get_scan_excludes_raw_result_by_default(client, scan_with_findings):
+    """raw_result is opt-in through include"""
+    response = await client.get(f"/api/v1/scan/{scan_with_findings.id}")
+    data = response.json()
+    assert data["findings_count"] == 3
+    assert "raw_result" not in data["findings"][0]
+
+    response = await client.get(
+        f"/api/v1/scan/{scan_with_findings.id}", params={"include": "raw_result"}
+    )
+    assert response.json()["findings"][0]["raw_result"] == {"blob": "x" * 100}
+
+    response = await client.get(
+        f"/api/v1/scan/{scan_with_findings.id}", params={"include": "bogus"}
+    )
+    assert response.status_code == 400
+
+
+async def test_get_scan_pages_embedded_entities(client, scan_with_findings):
+    """Embedded entities are paged by cursor"""
+    url = f"/api/v1/scan/{scan_with_findings.id}"
+    first = (await client.get(url, params={"entities_limit": 2})).json()
+    assert len(first["entities"]) == 2
+    assert first["entities_count"] == 3
+
+    second = (await client.get(
+        url, params={"entities_limit": 2, "entities_cursor": first["entities_next_cursor"]}
+    )).json()
+    assert [e["canonical_value"] for e in second["entities"]] == ["b.example.com"]
+    assert second["entities_next_cursor"] is None
+
+
+async def test_rescan_lists_what_it_saw(client, db_session, scan_with_findings):
+    """A rescan lists the entities it saw again, not only those it discovered"""
+    rescan = Scan(target="example.com", type=ScanType.DOMAIN, status=ScanStatus.COMPLETED)
+    db_session.add(rescan)
+    await db_session.flush()
+    seen = (await db_session.execute(
+        select(Entity.id).where(Entity.canonical_value != "b.example.com")
+    )).scalars().all()
+    kept = (await db_session.execute(
+        select(Finding.id).where(Finding.entity_id.in_(seen))
+    )).scalars().all()
+    db_session.add_all(
+        [ScanEntity(scan_id=rescan.id, entity_id=e) for e in seen]
+        + [FindingObservation(finding_id=f, scan_id=rescan.id) for f in kept]
+    )
+    await db_session.commit()
+
+    data = (await client.get(f"/api/v1/scan/{rescan.id}")).json()
+    assert sorted(e["canonical_value"] for e in data["entities"]) == ["a.example.com", "example.com"]
+    assert (data["entities_count"], data["findings_count"]) == (2, 2)
+    assert {e["scan_id"] for e in data["entities"]} == {scan_with_findings.id}
+
+    diff = (await client.get(f"/api/v1/scan/{scan_with_findings.id}/diff/{rescan.id}")).json()
+    assert [c["canonical_value"] for c in diff["changes"] if c["change"] == "entity_removed"] == ["b.example.com"]
+
+
+async def test_stream_scan_emits_ndjson(client, db_engine, scan_with_findings, monkeypatch):
+    """The stream holds one scan record followed by every entity and finding"""
+    monkeypatch.setattr(
+        scan_endpoints, "ReadSessionLocal",
+        async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False),
+    )
+    response = await client.get(f"/api/v1/scan/{scan_with_findings.id}/stream")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["kind"] for r in records] == ["scan"] + ["entity"] * 3 + ["finding"] * 3
+
+
+async def test_scan_fails_only_when_every_module_fails(db_session, offline_scans, monkeypatch):
+    """The finish stage aggregates module results into the scan status"""
+    async def fake_whois(target):
+        raise ConnectionError("whois unreachable")
+
+    ssl_results = []
+
+    async def fake_ssl(target):
+        return ssl_results.pop(0)
+
+    monkeypatch.setattr(scan_tasks, "run_whois", fake_whois)
+    monkeypatch.setattr(scan_tasks, "run_ssl", fake_ssl)
+
+    async def run(ssl_result):
+        ssl_results.append(ssl_result)
+        scan = Scan(target="example.com", type=ScanType.DOMAIN)
+        db_session.add(scan)
+        await db_session.commit()
+        await scan_tasks._run_scan_async(scan.id, "example.com", ["whois", "ssl", "unknown"])
+        await db_session.refresh(scan)
+        return scan
+
+    partial = await run({"success": True, "data": {"subdomains": ["a.example.com"]}})
+    assert partial.status == ScanStatus.COMPLETED
+    modules = {s["name"]: s for s in partial.timeline["spans"] if s["name"].startswith("module.")}
+    assert modules["module.whois"]["status"] == "error"
+    assert "status" not in modules["module.ssl"]
+
+    failed = await run({"success": False, "error": "crt.sh unavailable"})
+    assert failed.status == ScanStatus.FAILED
+    assert failed.finished_at is not None
+
+
+def test_dispatch_routes_modules_to_their_queues(monkeypatch):
+    """Each module is a chord subtask on its queue; finish_scan is the callback"""
+    monkeypatch.setattr(settings, "SCAN_MODULE_QUEUES", {"ssl": "network", "whois": "slow"})
+
+    async def fake_start(scan_id, target, modules):
+        return {"trace_id": "t", "spans": []}
+
+    chords = []
+
+    def fake_chord(header):
+        header = list(header)
+
+        def apply(callback):
+            chords.append((header, callback))
+        return apply
+
+    monkeypatch.setattr(scan_tasks, "_start_scan_async", fake_start)
+    monkeypatch.setattr(scan_tasks, "chord", fake_chord)
+
+    scan_tasks._dispatch_scan(7, "example.com", ["ssl", "whois"])
+    (header, callback), = chords
+    assert [(s.task, s.args, s.options["queue"]) for s in header] == [
+        ("run_module", (7, "example.com", "whois", "t"), "slow"),
+        ("run_module", (7, "example.com", "ssl", "t"), "network"),
+    ]
+    assert all(s.immutable for s in header)
+    assert callback.task == "finish_scan" and callback.args == (7, "example.com", {"trace_id": "t", "spans": []})
+    (errback,) = callback.options["link_error"]
+    assert errback.task == "scan_failed" and errback.args == (7,)
+
+
+def test_busy_module_subtask_is_retried(monkeypatch):
+    """A redelivered subtask waits for the attempt holding the module's claim"""
+    async def busy(scan_id, target, module, trace_id):
+        raise scan_tasks.ModuleBusy(scan_id, module, retry_in=300)
+
+    retries = []
+
+    def retry(exc, countdown):
+        retries.append((str(exc), countdown))
+        return RuntimeError("retry")
+
+    monkeypatch.setattr(scan_tasks, "_run_module_async", busy)
+    monkeypatch.setattr(scan_tasks.run_module_task, "retry", retry)
+    with pytest.raises(RuntimeError):
+        scan_tasks.run_module_task(7, "example.com", "ssl")
+    assert retries == [("ssl of scan 7 is already running", 60)]
+
+
+async def test_resumed_scan_skips_checkpointed_modules(client, db_session, offline_scans, monkeypatch):
+    """A rerun reuses finished modules and never duplicates findings"""
+    calls = []
+
+    async def fake_whois(target):
+        calls.append("whois")
+        return {"success": True, "data": {"registrar": "Example", "name_servers": ["ns1.example.net"]}}
+
+    ssl_results = [
+        {"success": False, "error": "crt.sh unavailable"},
+        {"success": True, "data": {"subdomains": ["a.example.com"]}},
+        {"success": True, "data": {"subdomains": ["a.example.com"]}},
+    ]
+
+    async def fake_ssl(target):
+        calls.append("ssl")
+        return ssl_results.pop(0)
+
+    monkeypatch.setattr(scan_tasks, "run_whois", fake_whois)
+    monkeypatch.setattr(scan_tasks, "run_ssl", fake_ssl)
+
+    scan = Scan(target="example.com", type=ScanType.DOMAIN, settings={"modules": []})
+    db_session.add(scan)
+    await db_session.commit()
+    scan_id = scan.id
+
+    async def run():
+        await scan_tasks._run_scan_async(scan_id, "example.com", [])
+        db_session.expire_all()
+        runs = (await db_session.execute(select(ScanModuleRun))).scalars().all()
+        return {r.module: (r.status, r.attempts) for r in runs}
+
+    assert await run() == {"whois": ("success", 1), "ssl": ("failure", 1)}
+    assert await run() == {"whois": ("success", 1), "ssl": ("success", 2)}
+    assert calls == ["whois", "ssl", "ssl"]
+
+    # A module another attempt is running is not claimed twice
+    ssl_run = await db_session.get(ScanModuleRun, (scan_id, "ssl"))
+    ssl_run.status, ssl_run.started_at = "running", datetime.utcnow()
+    await db_session.commit()
+    with pytest.raises(scan_tasks.ModuleBusy) as busy:
+        await scan_tasks._claim_module(db_session, scan_id, "ssl")
+    assert 0 < busy.value.retry_in <= settings.SCAN_MODULE_LEASE
+
+    # One whose attempt outlived its lease (worker died before saving its
+    # checkpoint) runs again without writing anything twice
+    async def counts():
+        return [
+            (await db_session.execute(select(func.count()).select_from(model))).scalar_one()
+            for model in (Entity, Finding, FindingObservation)
+        ]
+
+    before = await counts()
+    ssl_run = await db_session.get(ScanModuleRun, (scan_id, "ssl"))
+    ssl_run.started_at = datetime.utcnow() - timedelta(seconds=settings.SCAN_MODULE_LEASE + 1)
+    await db_session.commit()
+    assert (await run())["ssl"] == ("success", 3)
+    assert await counts() == before == [3, 2, 2]
+    await db_session.refresh(scan)
+    assert scan.status == ScanStatus.COMPLETED
+    whois_span = next(s for s in scan.timeline["spans"] if s["name"] == "module.whois")
+    assert whois_span["attributes"]["osint.checkpointed"] is True
+
+
+async def test_resume_endpoint(client, db_session, monkeypatch):
+    queued, events = [], []
+    monkeypatch.setattr(scan_endpoints.scan_domain_task, "delay", lambda *args: queued.append(args))
+
+    async def publish(scan_id, event, module=None, **data):
+        events.append((scan_id, event))
+
+    monkeypatch.setattr(scan_endpoints, "publish_scan_event", publish)
+
+    def scan(target, status):
+        return Scan(target=target, type=ScanType.DOMAIN, status=status, settings={"modules": ["ssl"]})
+
+    failed = scan("example.com", ScanStatus.FAILED)
+    done = scan("example.org", ScanStatus.COMPLETED)
+    partial = scan("example.net", ScanStatus.COMPLETED)
+    running = scan("example.edu", ScanStatus.RUNNING)
+    db_session.add_all([failed, done, partial, running])
+    await db_session.flush()
+    db_session.add_all([
+        ScanModuleRun(scan_id=done.id, module="ssl", status="success", attempts=1),
+        ScanModuleRun(scan_id=partial.id, module="whois", status="success", attempts=1),
+        ScanModuleRun(scan_id=partial.id, module="ssl", status="failure", attempts=1),
+    ])
+    await db_session.commit()
+
+    response = await client.post(f"/api/v1/scan/{failed.id}/resume")
+    assert response.json()["status"] == "queued"
+    assert queued == [(failed.id, "example.com", ["ssl"])]
+    # The snapshot no longer ends with the previous run's scan_failed
+    assert events == [(failed.id, "scan_queued")]
+    # Now queued: a second resume would run its modules twice at once
+    assert (await client.post(f"/api/v1/scan/{failed.id}/resume")).status_code == 409
+    assert (await client.post(f"/api/v1/scan/{running.id}/resume")).status_code == 409
+
+    # Completed with a failed module: that module can be retried
+    assert (await client.post(f"/api/v1/scan/{partial.id}/resume")).status_code == 200
+    assert (await client.post(f"/api/v1/scan/{done.id}/resume")).status_code == 409
+    assert (await client.post("/api/v1/scan/999/resume")).status_code == 404
+    assert len(queued) == 2
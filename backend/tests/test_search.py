@@ -0,0 +1,43 @@
+"""
+Test search endpoint
+"""
+from app.models.entity import Entity, EntityType
+from app.models.scan import Scan, ScanStatus, ScanType
+
+
+async def test_search_ranks_and_counts_across_entities_and_scans(client, db_session):
+    """Results from both tables are merged by relevance with a true total"""
+    scan = Scan(target="example.com", type=ScanType.DOMAIN, status=ScanStatus.COMPLETED)
+    db_session.add(scan)
+    await db_session.flush()
+    db_session.add_all([
+        Entity(scan_id=scan.id, type=EntityType.DOMAIN, canonical_value="example.com"),
+        Entity(scan_id=scan.id, type=EntityType.SUBDOMAIN, canonical_value="mail.example.com"),
+        Entity(scan_id=scan.id, type=EntityType.SUBDOMAIN, canonical_value="vpn.corp.example.com"),
+        Entity(scan_id=scan.id, type=EntityType.DOMAIN, canonical_value="unrelated.org"),
+    ])
+    await db_session.commit()
+
+    response = await client.get("/api/v1/search", params={"q": "example.com", "limit": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 4
+    assert len(data["results"]) == 2
+    assert data["results"][0]["type"] == "entity"
+    assert data["results"][0]["value"] == "example.com"
+    assert data["results"][1]["type"] == "scan"
+    assert data["results"][0]["score"] >= data["results"][1]["score"]
+
+
+async def test_search_escapes_like_wildcards(client, db_session):
+    """LIKE metacharacters in the query match literally"""
+    db_session.add_all([
+        Entity(type=EntityType.DOMAIN, canonical_value="a_b.com"),
+        Entity(type=EntityType.DOMAIN, canonical_value="axb.com"),
+    ])
+    await db_session.commit()
+
+    response = await client.get("/api/v1/search", params={"q": "a_b"})
+    data = response.json()
+    assert data["total"] == 1
+    assert data["results"][0]["value"] == "a_b.com"
@@ -0,0 +1,44 @@
+"""
+Test the crt.sh module against a mock transport
+"""
+import httpx
+import orjson
+
+from app.services.osint.ssl import run_ssl
+
+
+def _client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def test_run_ssl_extracts_subdomains_and_issuers():
+    certificates = [
+        {"id": 1, "issuer_name": "CN=R3", "name_value": "www.example.com\nmail.example.com"},
+        {"id": 2, "issuer_name": "CN=E1", "name_value": "www.example.com\nexample.org"},
+    ]
+
+    async with _client(lambda request: httpx.Response(200, content=orjson.dumps(certificates))) as client:
+        result = await run_ssl("https://example.com/login", client)
+
+    data = result["data"]
+    assert result["success"] and data["domain"] == "example.com"
+    assert data["subdomains"] == ["mail.example.com", "www.example.com"]
+    assert data["issuers"] == ["CN=E1", "CN=R3"]
+    assert data["total_certificates"] == 2
+
+
+async def test_run_ssl_falls_back_to_exact_match():
+    queries = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        queries.append(request.url.params["q"])
+        if request.url.params["q"].startswith("%"):
+            return httpx.Response(502)
+        return httpx.Response(200, json=[{"id": 3, "name_value": "example.com"}])
+
+    async with _client(handler) as client:
+        result = await run_ssl("example.com", client)
+        assert not client.is_closed  # a caller's client is left open
+
+    assert queries == ["%.example.com", "example.com"]
+    assert result["data"]["subdomains"] == ["example.com"]
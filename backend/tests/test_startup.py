@@ -0,0 +1,124 @@
+"""
+Test startup modes and the startup profile
+"""
+import builtins
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.startup import StartupProfile, component
+from app.db import database
+from app.db.migrations import migration_head
+
+
+def test_migration_head(tmp_path):
+    versions = tmp_path / "versions"
+    versions.mkdir()
+    for name, source in {
+        "0001_a.py": "revision = '0001'\ndown_revision = None\n",
+        "0002_b.py": "revision = '0002'\ndown_revision = '0001'\n",
+        "0003_c.py": "revision = '0003'\ndown_revision = '0001'\n",
+    }.items():
+        (versions / name).write_text(source)
+    assert migration_head(versions) is None  # two heads
+
+    (versions / "0004_merge.py").write_text("revision = '0004'\ndown_revision = ('0002', '0003')\n")
+    migration_head.cache_clear()
+    assert migration_head(versions) == "0004"
+    migration_head.cache_clear()
+    assert migration_head() is not None
+
+
+@pytest.fixture
+async def empty_engine(monkeypatch):
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool,
+    )
+    monkeypatch.setattr(database, "engine", engine)
+    yield engine
+    await engine.dispose()
+
+
+async def _tables(engine):
+    async with engine.connect() as conn:
+        return await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+
+
+async def test_init_db_skips_create_all_when_migrated(empty_engine, monkeypatch):
+    monkeypatch.setattr(settings, "DB_INIT_MODE", "auto")
+    async with empty_engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32))"))
+        await conn.execute(text("INSERT INTO alembic_version VALUES ('0001')"))
+
+    # Behind the latest migration: tables are created
+    await database.init_db()
+    assert "scans" in await _tables(empty_engine)
+
+    async with empty_engine.begin() as conn:
+        await conn.execute(text("DROP TABLE scans"))
+        await conn.execute(text("UPDATE alembic_version SET version_num = :head"), {"head": migration_head()})
+    await database.init_db()
+    assert "scans" not in await _tables(empty_engine)
+
+    monkeypatch.setattr(settings, "DB_INIT_MODE", "create_all")
+    await database.init_db()
+    assert "scans" in await _tables(empty_engine)
+
+    monkeypatch.setattr(settings, "DB_INIT_MODE", "bogus")
+    with pytest.raises(ValueError):
+        await database.init_db()
+
+
+def test_profile_charges_imports_to_components(tmp_path, monkeypatch):
+    package = tmp_path / "coldpkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("import time\ntime.sleep(0.02)\n")
+    (package / "heavy.py").write_text("import time\ntime.sleep(0.05)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    original = builtins.__import__
+
+    profile = StartupProfile()
+    profile.install()
+    try:
+        with profile.phase("init_db"):
+            from coldpkg import heavy  # noqa: F401
+    finally:
+        profile.finish()
+        for name in ("coldpkg", "coldpkg.heavy"):
+            sys.modules.pop(name, None)
+
+    assert builtins.__import__ is original
+    report = profile.report()
+    times = {c["name"]: c["ms"] for c in report["components"]}
+    # Package and submodule are one component, each counted once
+    assert 70 <= times["coldpkg"] < 1000
+    assert report["phases"][0]["name"] == "init_db"
+    assert report["phases"][0]["ms"] >= times["coldpkg"]
+    assert (component("app.services.osint.ssl"), component("sqlalchemy.orm")) == ("app.services", "sqlalchemy")
+
+
+async def test_startup_endpoint(client):
+    data = (await client.get("/api/v1/health/startup")).json()
+    assert set(data) == {"enabled", "total_ms", "imports_ms", "components", "phases"}
+
+
+def test_worker_imports_are_profiled():
+    # A fresh interpreter, as a worker start: the scan tasks' own imports are timed
+    script = (
+        "import json\n"
+        "from app.tasks.scan import startup_profile\n"
+        "print(json.dumps([c['name'] for c in startup_profile.report()['components']]))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True,
+        env={**os.environ, "STARTUP_PROFILE": "true"},
+    )
+    components = set(json.loads(result.stdout.strip().splitlines()[-1]))
+    assert {"sqlalchemy", "prometheus_client", "app.core", "app.services"} <= components
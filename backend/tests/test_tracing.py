@@ -0,0 +1,168 @@
+"""
+Test scan tracing and the timeline endpoint
+"""
+import orjson
+import pytest
+from sqlalchemy import select, text
+
+from app.core import tracing
+from app.core.config import settings
+from app.core.tracing import aggregate, combine, span, start_trace, waterfall
+from app.models.entity import Entity
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.models.scan_entity import ScanEntity
+from app.tasks import scan as scan_tasks
+
+
+def test_spans_nest_and_aggregate():
+    with span("outside") as orphan:
+        assert orphan is None
+
+    with start_trace("scan", **{"osint.scan.id": 1}) as trace:
+        with span("module.ssl"):
+            with span("ssl.lookup") as lookup:
+                lookup.set_attribute("http.response.status_code", 200)
+            for _ in range(3):
+                with aggregate("entity.upsert"):
+                    pass
+        with pytest.raises(RuntimeError):
+            with span("scan.finish"):
+                raise RuntimeError("boom")
+
+    timeline = trace.timeline()
+    spans = {s["name"]: s for s in timeline["spans"]}
+    assert spans["scan"]["parent"] is None
+    assert spans["ssl.lookup"]["parent"] == spans["module.ssl"]["id"]
+    assert spans["ssl.lookup"]["attributes"] == {"http.response.status_code": 200}
+    assert spans["scan.finish"]["status"] == "error"
+    assert timeline["aggregates"] == [{
+        "parent": spans["module.ssl"]["id"], "name": "entity.upsert", "count": 3,
+        "total_ms": timeline["aggregates"][0]["total_ms"],
+        "max_ms": timeline["aggregates"][0]["max_ms"],
+    }]
+
+
+def test_span_budget_falls_back_to_aggregates(monkeypatch):
+    monkeypatch.setattr(settings, "TRACE_MAX_SPANS", 3)
+    with start_trace("scan") as trace:
+        for _ in range(5):
+            with span("http GET crt.sh"):
+                pass
+
+    timeline = trace.timeline()
+    assert len(timeline["spans"]) == 3 and timeline["dropped_spans"] == 3
+    assert timeline["aggregates"][0]["count"] == 3
+
+
+async def test_traced_engine_aggregates_statements(db_engine):
+    tracing.trace_engine(db_engine)
+    async with db_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))  # outside any trace
+        with start_trace("scan") as trace:
+            with span("store"):
+                await conn.execute(text("SELECT 1"))
+                await conn.execute(text("SELECT 2"))
+
+    (entry,) = trace.timeline()["aggregates"]
+    assert (entry["parent"], entry["name"], entry["count"]) == (1, "db.select", 2)
+
+
+def test_otlp_export(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACE_EXPORT_PATH", str(path))
+    with start_trace("scan", **{"osint.scan.id": 7}) as trace:
+        with span("module.whois"):
+            with aggregate("finding.write"):
+                pass
+
+    (line,) = path.read_bytes().splitlines()
+    spans = orjson.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root, child = spans
+    assert root["traceId"] == trace.trace_id and len(root["traceId"]) == 32
+    assert child["parentSpanId"] == root["spanId"] and root["parentSpanId"] == ""
+    assert int(child["startTimeUnixNano"]) <= int(child["endTimeUnixNano"])
+    assert {"key": "osint.scan.id", "value": {"intValue": "7"}} in root["attributes"]
+    assert {"key": "osint.finding.write.count", "value": {"intValue": "1"}} in child["attributes"]
+
+
+def test_combine_places_parts_by_start():
+    part = {
+        "trace_id": "t", "duration_ms": 10.0, "dropped_spans": 1,
+        "spans": [
+            {"id": 0, "parent": None, "name": "module.ssl", "start_ms": 0.0, "duration_ms": 10.0},
+            {"id": 1, "parent": 0, "name": "ssl.lookup", "start_ms": 2.0, "duration_ms": 5.0},
+        ],
+        "aggregates": [{"parent": 1, "name": "db.select", "count": 1, "total_ms": 1.0, "max_ms": 1.0}],
+    }
+    first = {**part, "started_at": "2026-10-19T12:00:00.500000+00:00"}
+    second = {**part, "started_at": "2026-10-19T12:00:00+00:00"}
+
+    timeline = combine("scan", [None, first, second], **{"osint.scan.id": 1})
+    assert timeline["started_at"] == second["started_at"]
+    assert timeline["duration_ms"] == 510.0 and timeline["dropped_spans"] == 2
+    rows = [(s["id"], s["parent"], s["name"], s["start_ms"]) for s in timeline["spans"]]
+    assert rows == [
+        (0, None, "scan", 0.0),
+        (1, 0, "module.ssl", 500.0), (2, 1, "ssl.lookup", 502.0),
+        (3, 0, "module.ssl", 0.0), (4, 3, "ssl.lookup", 2.0),
+    ]
+    assert [a["parent"] for a in timeline["aggregates"]] == [2, 4]
+    assert combine("scan", [None]) is None
+
+
+def test_waterfall_self_time_and_share():
+    result = waterfall({
+        "trace_id": "t", "started_at": None, "duration_ms": 100.0, "dropped_spans": 0,
+        "spans": [
+            {"id": 0, "parent": None, "name": "scan", "start_ms": 0.0, "duration_ms": 100.0},
+            {"id": 1, "parent": 0, "name": "module.ssl", "start_ms": 10.0, "duration_ms": 80.0},
+            {"id": 2, "parent": 1, "name": "ssl.lookup", "start_ms": 10.0, "duration_ms": 30.0},
+        ],
+        "aggregates": [
+            {"parent": 1, "name": "db.select", "count": 4, "total_ms": 5.0, "max_ms": 2.0},
+            {"parent": 1, "name": "entity.upsert", "count": 2, "total_ms": 40.0, "max_ms": 30.0},
+        ],
+    })
+
+    rows = [(s["name"], s["depth"], s["self_ms"], s["share"]) for s in result["spans"]]
+    assert rows == [("scan", 0, 20.0, 1.0), ("module.ssl", 1, 50.0, 0.8), ("ssl.lookup", 2, 30.0, 0.3)]
+    assert [a["name"] for a in result["spans"][1]["aggregates"]] == ["entity.upsert", "db.select"]
+    assert waterfall(None)["spans"] == []
+
+
+async def test_scan_run_persists_timeline(client, db_engine, db_session, offline_scans, monkeypatch):
+    """A scan run saves its phases, served as a waterfall"""
+    tracing.trace_engine(db_engine)
+
+    async def fake_ssl(target):
+        return {"success": True, "data": {"subdomains": ["a.example.com", "b.example.com"]}}
+
+    monkeypatch.setattr(scan_tasks, "run_ssl", fake_ssl)
+
+    scan = Scan(target="example.com", type=ScanType.DOMAIN)
+    db_session.add(scan)
+    await db_session.commit()
+
+    empty = (await client.get(f"/api/v1/scan/{scan.id}/timeline")).json()
+    assert empty["spans"] == [] and empty["status"] == "queued"
+
+    await scan_tasks._run_scan_async(scan.id, "example.com", ["ssl"])
+
+    await db_session.refresh(scan)
+    assert scan.status == ScanStatus.COMPLETED
+    assert len((await db_session.execute(select(Entity))).scalars().all()) == 3
+    assert len((await db_session.execute(select(ScanEntity))).scalars().all()) == 3
+
+    data = (await client.get(f"/api/v1/scan/{scan.id}/timeline")).json()
+    names = [(s["name"], s["depth"]) for s in data["spans"]]
+    assert names == [
+        ("scan", 0), ("scan.start", 1), ("module.ssl", 1), ("ssl.lookup", 2),
+        ("ssl.store", 2), ("scan.finish", 1), ("scan.entities", 2), ("scan.status", 2),
+    ]
+    store = data["spans"][4]
+    assert store["attributes"] == {"osint.subdomains": 2}
+    upserts = {a["name"]: a["count"] for a in store["aggregates"]}
+    assert upserts["entity.upsert"] == 3 and upserts["finding.write"] == 1
+    assert upserts["db.insert"] >= 3
+
+    assert (await client.get("/api/v1/scan/999/timeline")).status_code == 404
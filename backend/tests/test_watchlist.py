@@ -0,0 +1,184 @@
+"""
+Test watchlist scheduling, change recording and endpoints
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.scan import Scan, ScanStatus, ScanType
+from app.models.watchlist import WatchlistChange, WatchlistEntry
+from app.services.watchlist import as_utc, first_run_at, next_run_at, record_changes
+from app.tasks import scan as scan_tasks
+from app.tasks import watchlist as watchlist_tasks
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+DAY = 24 * 60 * 60
+
+
+def test_runs_are_spread_over_the_interval(monkeypatch):
+    monkeypatch.setattr(settings, "WATCHLIST_JITTER", 0.1)
+    rng = random.Random(1)
+
+    firsts = [first_run_at(DAY, NOW, rng) for _ in range(1000)]
+    assert all(NOW <= at < NOW + timedelta(days=1) for at in firsts)
+    per_hour = {(at - NOW).seconds // 3600 for at in firsts}
+    assert len(per_hour) == 24
+
+    # Late by an hour: the next run keeps the phase of the scheduled one
+    scheduled = NOW - timedelta(hours=1)
+    following = next_run_at(scheduled, DAY, NOW, rng)
+    assert scheduled + timedelta(hours=21.6) <= following <= scheduled + timedelta(hours=26.4)
+
+    # More than an interval behind: counted from now
+    following = next_run_at(NOW - timedelta(days=3), DAY, NOW, rng)
+    assert following >= NOW + timedelta(hours=21.6)
+
+
+async def test_schedule_due_respects_concurrency_cap(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "WATCHLIST_MAX_CONCURRENT", 2)
+    queued = []
+
+    def apply_async(args, countdown):
+        assert 0 <= countdown <= settings.WATCHLIST_TICK_SECONDS
+        queued.append(args)
+
+    monkeypatch.setattr(watchlist_tasks.scan_domain_task, "apply_async", apply_async)
+
+    def entry(target, due_in, enabled=True):
+        return WatchlistEntry(
+            target=target, type=ScanType.DOMAIN, modules=["ssl"], interval_seconds=DAY,
+            enabled=enabled, next_run_at=NOW + timedelta(minutes=due_in),
+        )
+
+    db_session.add_all([
+        entry("a.com", -30), entry("b.com", -20), entry("c.com", -10),
+        entry("later.com", 10), entry("paused.com", -60, enabled=False),
+    ])
+    await db_session.commit()
+
+    scan_ids = await watchlist_tasks.schedule_due(db_session, NOW, random.Random(1))
+    assert [args[1] for args in queued] == ["a.com", "b.com"]
+    assert [args[2] for args in queued] == [["ssl"], ["ssl"]]
+    scans = (await db_session.execute(select(Scan).where(Scan.id.in_(scan_ids)))).scalars().all()
+    assert {s.status for s in scans} == {ScanStatus.QUEUED}
+
+    a = (await db_session.execute(select(WatchlistEntry).where(WatchlistEntry.target == "a.com"))).scalar_one()
+    assert as_utc(a.last_run_at) == NOW and as_utc(a.next_run_at) > NOW + timedelta(hours=20)
+
+    # Both slots are taken until those scans finish
+    assert await watchlist_tasks.schedule_due(db_session, NOW, random.Random(1)) == []
+    for scan in scans:
+        scan.status = ScanStatus.COMPLETED
+    await db_session.commit()
+    await watchlist_tasks.schedule_due(db_session, NOW, random.Random(1))
+    assert [args[1] for args in queued] == ["a.com", "b.com", "c.com"]
+
+
+@pytest.fixture
+def ssl_responses(offline_scans, monkeypatch):
+    """Offline scans with a scripted crt.sh"""
+    responses = []
+
+    async def fake_ssl(target):
+        return responses.pop(0)
+
+    monkeypatch.setattr(scan_tasks, "run_ssl", fake_ssl)
+    return responses
+
+
+async def test_rescans_record_only_changes(client, db_session, ssl_responses, monkeypatch):
+    entry = WatchlistEntry(
+        target="example.com", type=ScanType.DOMAIN, modules=["ssl"], interval_seconds=DAY,
+        enabled=True, next_run_at=NOW,
+    )
+    db_session.add(entry)
+    await db_session.commit()
+
+    async def fake_whois(target):
+        return {"success": True, "data": {"registrar": "Example Registrar", "name_servers": []}}
+
+    monkeypatch.setattr(scan_tasks, "run_whois", fake_whois)
+
+    async def rescan(subdomains=None, modules=("ssl",)):
+        ssl_responses.append(
+            {"success": True, "data": {"subdomains": subdomains}} if subdomains is not None
+            else {"success": False, "error": "crt.sh unavailable"}
+        )
+        scan = Scan(target="example.com", type=ScanType.DOMAIN, watchlist_id=entry.id)
+        db_session.add(scan)
+        await db_session.commit()
+        await scan_tasks._run_scan_async(scan.id, "example.com", list(modules))
+        response = await client.get(f"/api/v1/watchlist/{entry.id}/changes", params={"scan_id": scan.id})
+        return sorted((c["kind"], c["canonical_value"]) for c in response.json())
+
+    first = await rescan(["a.example.com", "b.example.com"])
+    assert first == [
+        ("entity_added", "a.example.com"), ("entity_added", "b.example.com"),
+        ("entity_added", "example.com"), ("finding_added", "example.com"),
+    ]
+    assert await rescan(["a.example.com", "b.example.com"]) == []
+
+    third = await rescan(["b.example.com", "c.example.com"])
+    assert third == [
+        ("entity_added", "c.example.com"), ("entity_removed", "a.example.com"),
+        ("finding_changed", "example.com"),
+    ]
+
+    # A failed module does not make its entities look removed
+    assert await rescan(modules=("whois", "ssl")) == [("finding_added", "example.com")]
+
+    await db_session.refresh(entry)
+    assert entry.last_change_count == 1
+    total = (await db_session.execute(select(WatchlistChange))).scalars().all()
+    assert len(total) == 8
+
+    # Finishing the same scan again (a retried callback) records nothing
+    assert await record_changes(db_session, entry.id, entry.last_scan_id, [], []) == {}
+
+    # Nor does a scan where every module failed, which records nothing
+    assert await rescan() == []
+    await db_session.refresh(entry)
+    assert entry.last_change_count == 1
+
+    # The certificate finding the failed ssl run missed was seen by the last
+    # complete run, so it is not reported again
+    assert await rescan(["b.example.com", "c.example.com"], modules=("whois", "ssl")) == []
+
+
+async def test_watchlist_endpoints(client, db_session):
+    response = await client.post(
+        "/api/v1/watchlist", json={"target": "example.com", "interval_seconds": 3600}
+    )
+    assert response.status_code == 201
+    created = response.json()
+    next_run = as_utc(datetime.fromisoformat(created["next_run_at"]))
+    assert datetime.now(timezone.utc) - timedelta(minutes=1) <= next_run
+    assert next_run <= datetime.now(timezone.utc) + timedelta(hours=1)
+
+    duplicate = await client.post("/api/v1/watchlist", json={"target": "example.com"})
+    assert duplicate.status_code == 409
+    invalid = await client.post("/api/v1/watchlist", json={"target": "x", "type": "planet"})
+    assert invalid.status_code == 400
+
+    response = await client.post("/api/v1/watchlist/bulk", json={"entries": [
+        {"target": "example.com", "interval_seconds": 7200, "modules": ["whois"]},
+        {"target": "example.org"},
+        {"target": "example.net", "enabled": False},
+    ]})
+    assert response.json() == {"created": 2, "updated": 1}
+    updated = (await client.get(f"/api/v1/watchlist/{created['id']}")).json()
+    assert (updated["interval_seconds"], updated["modules"]) == (7200, ["whois"])
+    assert updated["next_run_at"] == created["next_run_at"]
+
+    page = await client.get("/api/v1/watchlist", params={"limit": 2, "enabled": True})
+    assert [e["target"] for e in page.json()] == ["example.com", "example.org"]
+    assert "X-Next-Cursor" not in page.headers
+
+    response = await client.patch(f"/api/v1/watchlist/{created['id']}", json={"enabled": False})
+    assert response.json()["enabled"] is False
+
+    assert (await client.delete(f"/api/v1/watchlist/{created['id']}")).status_code == 204
+    assert (await client.get(f"/api/v1/watchlist/{created['id']}")).status_code == 404